@@ -18,12 +18,15 @@ email                : stdm@unhabitat.org
  *                                                                         *
  ***************************************************************************/
 """
+import hashlib
 from collections import (
     OrderedDict
 )
+from io import BytesIO
 
 import matplotlib
 from qgis.PyQt.QtCore import (
+    QDir,
     QTemporaryFile
 )
 from qgis.PyQt.QtGui import (
@@ -36,7 +39,8 @@ from qgis.PyQt.QtXml import (
 )
 
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 
 from stdm.composer.configuration_collection_base import (
@@ -45,6 +49,14 @@ from stdm.composer.configuration_collection_base import (
     LinkedTableItemConfiguration,
     col_values
 )
+from stdm.utils.lru_cache import LRUCache
+
+# Resolution of the chart images
+CHART_DPI = 200
+
+# Digest of the chart configuration and data -> temporary file containing
+# the rendered chart, so that identical charts are only rendered once
+_chart_images = LRUCache(200)
 
 legend_positions = OrderedDict({
     QApplication.translate("ChartConfiguration", "Automatic"): "best",
@@ -140,6 +152,7 @@ class ChartConfiguration:
     _y_label = ""
     _y_field = ""
     _replace_none_by_zero = True
+    _figure = None
 
     @classmethod
     def register(cls):
@@ -398,6 +411,19 @@ class ChartConfiguration:
         """
         return NotImplementedError("Chart handlers only supported in subclasses")
 
+    def figure(self):
+        """
+        :return: Returns the figure and axes on which the chart is drawn.
+        These are created once and reused by the handlers of each record.
+        :rtype: tuple
+        """
+        if self._figure is None:
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            self._figure = (fig, fig.add_subplot(111))
+
+        return self._figure
+
 
 class ChartConfigurationCollection(ConfigurationCollectionBase):
     """
@@ -421,12 +447,11 @@ class ChartItemValueHandler(LinkedTableValueHandler):
 
     def __init__(self, *args):
         LinkedTableValueHandler.__init__(self, *args)
-        self._fig, self._ax = plt.subplots()
+        self._fig, self._ax = self.config_item().figure()
         self._legend_items = OrderedDict()
 
-        # Clear figure and axes
-        # self.clear_figure()
-        # self.clear_axes()
+        # Clear the axes drawn for the previous record
+        self.clear_axes()
 
     def add_legend_artist(self, label, artist):
         """
@@ -518,27 +543,67 @@ class ChartItemValueHandler(LinkedTableValueHandler):
 
         return val_arr, rem_idx
 
-    def render_plot(self, tight_layout=False):
+    def chart_key(self, *chart_data):
+        """
+        :param chart_data: Values plotted in the chart.
+        :return: Returns a digest of the chart configuration and the values
+        plotted, which identifies identical charts.
+        :rtype: str
+        """
+        dom_document = QDomDocument()
+        dom_document.appendChild(
+            self.config_item().to_dom_element(dom_document)
+        )
+        chart_def = repr((dom_document.toString(), chart_data))
+
+        return hashlib.sha1(chart_def.encode('utf-8')).hexdigest()
+
+    def set_rendered_plot(self, key):
         """
-        Saves the pyplot instance as an image in the OS's temp folder
-        then refers the absolute path of the image to the QgsComposerPicture
-        item.
+        Sets the image of a chart with the same key, if it has already been
+        rendered, in the picture item.
+        :param key: Chart key.
+        :type key: str
+        :return: True if the chart had been rendered.
+        :rtype: bool
         """
-        chart_tmp = QTemporaryFile()
-        if chart_tmp.open():
-            tmp_file_name = chart_tmp.fileName()
+        chart_tmp = _chart_images.get(key, None)
+        if chart_tmp is None:
+            return False
+
+        self.composer_item().setPicturePath(chart_tmp.fileName())
 
-            if tight_layout:
-                plt.tight_layout()
+        return True
 
-            plt.savefig(tmp_file_name, format="tif", dpi=200)
+    def render_plot(self, tight_layout=False, key=None):
+        """
+        Renders the figure as a PNG image in memory, which is then written
+        to a file in the OS's temp folder whose absolute path is referred to
+        by the picture item. If a key is specified, the image is reused for
+        identical charts.
+        """
+        if tight_layout:
+            self._fig.tight_layout()
 
-            # Set path of picture item
-            self.composer_item().setPicturePath(tmp_file_name)
+        image_buffer = BytesIO()
+        self._fig.savefig(image_buffer, format="png", dpi=CHART_DPI)
 
-        else:
+        chart_tmp = QTemporaryFile(
+            '{0}/stdm_chart_XXXXXX.png'.format(QDir.tempPath())
+        )
+        if not chart_tmp.open():
             raise RuntimeError("Chart item could not be rendered")
 
+        chart_tmp.write(image_buffer.getvalue())
+        chart_tmp.close()
+
+        # The file is removed once the temporary file object is discarded
+        if key is not None:
+            _chart_images[key] = chart_tmp
+
+        # Set path of picture item
+        self.composer_item().setPicturePath(chart_tmp.fileName())
+
 
 class VerticalBarValueHandler(ChartItemValueHandler):
     """
@@ -576,6 +641,14 @@ class VerticalBarValueHandler(ChartItemValueHandler):
 
         x_values = column_values[self.config_item().x_field()]
 
+        # Reuse the image of an identical chart
+        chart_key = self.chart_key(
+            x_values,
+            [column_values[vf] for vf in value_fields]
+        )
+        if self.set_rendered_plot(chart_key):
+            return
+
         N = len(x_values)
         pos = np.arange(N)
         width = 0.35
@@ -628,7 +701,7 @@ class VerticalBarValueHandler(ChartItemValueHandler):
         if self.config_item().insert_legend():
             self.insert_legend()
 
-        self.render_plot()
+        self.render_plot(key=chart_key)
 
 
 class VerticalBarConfiguration(ChartConfiguration):
@@ -88,8 +88,7 @@ def load_table_layers(config_collection):
     registry.
     :rtype: list
     """
-    #table_configs = list(config_collection.items()).values()
-    table_configs = config_collection.items()
+    table_configs = config_collection.items().values()
 
     v_layers = []
 
@@ -0,0 +1,349 @@
+"""
+/***************************************************************************
+Name                 : DocumentGenerationJob
+Description          : Generates documents for a list of records while the
+                       records are fetched by background tasks.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+from collections import deque
+
+from qgis.PyQt.QtCore import (
+    pyqtSignal,
+    QObject,
+    QTimer
+)
+from qgis.PyQt.QtWidgets import (
+    QApplication
+)
+from qgis.core import (
+    QgsApplication,
+    QgsTask
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from stdm.data.database import STDMDb
+from stdm.settings.registryconfig import document_generator_workers
+
+LOGGER = logging.getLogger('stdm')
+
+# Number of entity records in a shard
+SHARD_SIZE = 100
+
+
+class ShardFetchTask(QgsTask):
+    """
+    Fetches the data source records of a shard of entity records in a
+    background thread, using a database session of its own.
+    """
+
+    def __init__(self, generator, context, record_ids):
+        """
+        :param generator: Document generator.
+        :type generator: DocumentGenerator
+        :param context: Context of the batch.
+        :type context: BatchContext
+        :param record_ids: Ids of the entity records in the shard.
+        :type record_ids: list
+        """
+        QgsTask.__init__(self, 'Fetch document records', QgsTask.CanCancel)
+        self._generator = generator
+        self._context = context
+        self.record_ids = record_ids
+        self.fetched = None
+        self.error = ''
+
+    def run(self):
+        # Thread-local session which is discarded once the shard is fetched
+        worker_session = STDMDb.instance().worker_session
+        try:
+            self.fetched = self._generator.fetch_records(
+                self._context,
+                self.record_ids,
+                worker_session()
+            )
+        except SQLAlchemyError as ex:
+            self.error = str(ex)
+
+            return False
+        except Exception as ex:
+            LOGGER.exception('Document records could not be fetched')
+            self.error = str(ex)
+
+            return False
+        finally:
+            worker_session.remove()
+
+        return not self.isCanceled()
+
+
+class DocumentGenerationJob(QObject):
+    """
+    Generates the documents of a list of entity records without blocking
+    the user interface. The records are split into shards whose data source
+    records are fetched by QgsTask workers, at most max_workers shards at a
+    time. Print layouts and map layers can only be used in the main thread
+    hence documents are rendered there, one record per iteration of the
+    event loop, as the shards become available.
+    Generation can be canceled part-way and, by skipping documents which
+    have already been written to the output directory, later resumed.
+    """
+    # Raised with the number of records processed, record id, status and
+    # error message once the documents of a record have been generated
+    record_generated = pyqtSignal(int, object, bool, str)
+
+    # Raised with the status and error message when generation ends
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, generator, template_path, record_ids, output_mode,
+                 file_path=None, data_fields=None, file_extension=None,
+                 data_source=None, shard_size=SHARD_SIZE, max_workers=None,
+                 skip_existing=False, records_per_file=0, parent=None):
+        """
+        Refer to DocumentGenerator.run_batch for a description of the
+        arguments.
+        :param shard_size: Number of entity records in a shard.
+        :type shard_size: int
+        :param max_workers: Maximum number of shards which are fetched, or
+        waiting to be rendered, at a time. Read from the registry if not
+        specified.
+        :type max_workers: int
+        :param skip_existing: True if documents whose output files exist
+        should not be generated again.
+        :type skip_existing: bool
+        :param records_per_file: Number of records whose pages are written
+        to a PDF before a new file is started, in PDFAtlas mode.
+        :type records_per_file: int
+        """
+        QObject.__init__(self, parent)
+        self._generator = generator
+        self._template_path = template_path
+        self._record_ids = list(record_ids)
+        self._output_mode = output_mode
+        self._file_path = file_path
+        self._data_fields = data_fields
+        self._file_extension = file_extension
+        self._data_source = data_source
+        self._skip_existing = skip_existing
+        self._records_per_file = records_per_file
+
+        if max_workers is None:
+            max_workers = document_generator_workers()
+        self._max_workers = max(1, max_workers)
+
+        self._shards = [
+            self._record_ids[i:i + shard_size]
+            for i in range(0, len(self._record_ids), shard_size)
+        ]
+
+        self._context = None
+        self._running = False
+        self._render_pending = False
+        self._num_processed = 0
+
+        # Index of the next shard to be fetched and rendered
+        self._next_fetch = 0
+        self._next_render = 0
+
+        # Shard index -> running task
+        self._tasks = {}
+
+        # Shard index -> (record ids, fetched records)
+        self._fetched = {}
+
+        # Records of the shard being rendered
+        self._render_queue = deque()
+
+    @property
+    def num_processed(self):
+        """
+        :return: Number of records whose documents have been generated.
+        :rtype: int
+        """
+        return self._num_processed
+
+    def is_running(self):
+        """
+        :return: True if the documents are being generated.
+        :rtype: bool
+        """
+        return self._running
+
+    def start(self):
+        """
+        Prepares the template and starts fetching the records. Errors in
+        the template are reported through the finished signal.
+        :return: True if generation has started.
+        :rtype: bool
+        """
+        if self._running:
+            return True
+
+        self._context, msg = self._generator.begin_batch(
+            self._template_path,
+            self._output_mode,
+            file_path=self._file_path,
+            data_fields=self._data_fields,
+            file_extension=self._file_extension,
+            data_source=self._data_source,
+            records_per_file=self._records_per_file
+        )
+        if self._context is None:
+            self.finished.emit(False, msg)
+
+            return False
+
+        if len(self._shards) == 0:
+            self._generator.end_batch(self._context)
+            self.finished.emit(True, "Success")
+
+            return True
+
+        self._running = True
+        self._fetch_shards()
+
+        return True
+
+    def cancel(self):
+        """
+        Stops generating the documents. Documents which have already been
+        written are not removed.
+        """
+        if not self._running:
+            return
+
+        for task in self._tasks.values():
+            task.cancel()
+
+        self._stop(False, QApplication.translate(
+            'DocumentGenerationJob',
+            'Document generation canceled'
+        ))
+
+    def _stop(self, status, msg):
+        self._running = False
+        self._tasks.clear()
+        self._fetched.clear()
+        self._render_queue.clear()
+        self._generator.end_batch(self._context)
+        self._generator.clear_temporary_layers()
+
+        self.finished.emit(status, msg)
+
+    def _fetch_shards(self):
+        # Starts fetching shards without exceeding the number of workers
+        while self._next_fetch < len(self._shards) and \
+                len(self._tasks) + len(self._fetched) < self._max_workers:
+            shard = self._next_fetch
+            self._next_fetch += 1
+
+            task = ShardFetchTask(
+                self._generator,
+                self._context,
+                self._shards[shard]
+            )
+            task.taskCompleted.connect(
+                lambda shard=shard: self._on_shard_fetched(shard)
+            )
+            task.taskTerminated.connect(
+                lambda shard=shard: self._on_shard_failed(shard)
+            )
+            self._tasks[shard] = task
+            QgsApplication.taskManager().addTask(task)
+
+    def _on_shard_fetched(self, shard):
+        task = self._tasks.pop(shard, None)
+        if task is None or not self._running:
+            return
+
+        self._fetched[shard] = (task.record_ids, task.fetched)
+        self._schedule_render()
+
+    def _on_shard_failed(self, shard):
+        task = self._tasks.pop(shard, None)
+        if task is None or not self._running:
+            return
+
+        LOGGER.debug('Document records could not be fetched: %s', task.error)
+        self._stop(False, QApplication.translate(
+            'DocumentGenerationJob',
+            'Document records could not be fetched, check QGIS logs.'
+        ))
+
+    def _schedule_render(self):
+        if self._render_pending:
+            return
+
+        self._render_pending = True
+        QTimer.singleShot(0, self._render_next)
+
+    def _render_next(self):
+        # Generates the documents of the next record
+        if not self._running:
+            self._render_pending = False
+            return
+
+        if len(self._render_queue) == 0:
+            shard = self._fetched.pop(self._next_render, None)
+            if shard is None:
+                # Wait for the shard to be fetched
+                self._render_pending = False
+                return
+
+            record_ids, fetched = shard
+            for record_id in record_ids:
+                self._render_queue.append((record_id, fetched))
+            self._next_render += 1
+            self._fetch_shards()
+
+        record_id, fetched = self._render_queue.popleft()
+        try:
+            status, msg = self._generator.generate_record(
+                self._context,
+                record_id,
+                fetched,
+                self._skip_existing
+            )
+        except SQLAlchemyError as ex:
+            LOGGER.debug(str(ex))
+            status, msg = False, QApplication.translate(
+                'DocumentGenerationJob',
+                'Database error occured, check QGIS logs.'
+            )
+        except Exception as ex:
+            # Reported as a failure of the record so that the job carries
+            # on and, once done, closes the output and removes the layers
+            LOGGER.exception('Documents of record %s could not be generated',
+                             record_id)
+            status, msg = False, QApplication.translate(
+                'DocumentGenerationJob',
+                'Documents could not be generated: {0}'
+            ).format(str(ex))
+
+        self._num_processed += 1
+        self.record_generated.emit(self._num_processed, record_id, status,
+                                   msg)
+
+        self._render_pending = False
+
+        # Generation could have been canceled by the slots
+        if not self._running:
+            return
+
+        if self._num_processed == len(self._record_ids):
+            self._stop(True, "Success")
+        else:
+            self._schedule_render()
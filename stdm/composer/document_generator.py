@@ -18,6 +18,8 @@ email                : gkahiu@gmail.com
 """
 import logging
 import uuid
+from collections import namedtuple
+from contextlib import nullcontext
 from datetime import date, datetime
 from numbers import Number
 from enum import Enum
@@ -43,21 +45,38 @@ from qgis.core import (
     QgsFeature,
     QgsGeometry,
     QgsProject,
+    QgsRectangle,
     QgsVectorLayer,
     QgsWkbTypes,
     QgsReadWriteContext,
     QgsLayoutExporter
 )
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.schema import (
     Table,
     MetaData
 )
-from sqlalchemy.sql.expression import text
+from sqlalchemy.sql.expression import (
+    bindparam,
+    select
+)
 
 from stdm.composer.chart_configuration import ChartConfigurationCollection
 from stdm.composer.composer_data_source import ComposerDataSource
 from stdm.composer.composer_wrapper import load_table_layers
+from stdm.composer.generation_profiler import (
+    CHARTS,
+    EXPORT,
+    FETCH,
+    FIELDS,
+    MAPS,
+    PHOTOS,
+    QR_CODES,
+    TABLES,
+    TEMPLATE
+)
+from stdm.composer.pdf_atlas import PdfAtlasWriter
 from stdm.composer.photo_configuration import PhotoConfigurationCollection
 from stdm.composer.qr_code_configuration import QRCodeConfigurationCollection
 from stdm.composer.spatial_fields_config import SpatialFieldsConfiguration
@@ -81,6 +100,22 @@ from stdm.utils.util import PLUGIN_DIR
 
 LOGGER = logging.getLogger('stdm')
 
+# Number of entity records whose data source records are fetched at a time
+BATCH_SIZE = 500
+
+# Photo items whose document paths are prefetched for each chunk of records
+PhotoQuery = namedtuple(
+    'PhotoQuery',
+    [
+        'linked_table',
+        'linked_field',
+        'source_field',
+        'document_type_id',
+        'document_type',
+        'document_parent_table'
+    ]
+)
+
 class LayoutExportResult(Enum):
     Success = 0
     Canceled = 1
@@ -90,6 +125,227 @@ class LayoutExportResult(Enum):
     SvgLayerError = 5
     IteratorError = 6
 
+
+def spatial_map_layers(map_item, memory_layers):
+    """
+    Layers shown by a map item which renders the memory layers of the
+    spatial fields. The memory layers are drawn above the layers of the
+    template, which are those locked in the map item or, if the item does
+    not keep a fixed layer set, the visible layers of the project.
+    :param map_item: Map item showing the spatial fields.
+    :type map_item: QgsLayoutItemMap
+    :param memory_layers: Memory layers of the spatial fields.
+    :type memory_layers: list
+    :return: Layers of the map item, from top to bottom.
+    :rtype: list
+    """
+    if map_item.keepLayerSet():
+        template_layers = map_item.layers()
+    else:
+        template_layers = QgsProject.instance().layerTreeRoot().checkedLayers()
+
+    return list(memory_layers) + [
+        lyr for lyr in template_layers if lyr not in memory_layers
+    ]
+
+
+class PreparedTemplate:
+    """
+    Document template together with its data source and configuration
+    collections, which are built once and reused for all the records of a
+    batch.
+    """
+
+    def __init__(self, template_doc: QDomDocument):
+        """
+        :param template_doc: Document containing document composition
+        information.
+        :type template_doc: QDomDocument
+        """
+        self.template_doc = template_doc
+
+        self.data_source = ComposerDataSource.create(template_doc)
+        self.spatial_fields_config = SpatialFieldsConfiguration.create(
+            template_doc
+        )
+        self.data_source.setSpatialFieldsConfig(self.spatial_fields_config)
+
+        # TODO: Need to automatically register custom configuration collections
+        # Photo config collection
+        self.photo_config_collection = PhotoConfigurationCollection.create(
+            template_doc
+        )
+
+        # Table configuration collection
+        self.table_config_collection = TableConfigurationCollection.create(
+            template_doc
+        )
+
+        # Create chart configuration collection object
+        self.chart_config_collection = ChartConfigurationCollection.create(
+            template_doc
+        )
+
+        # Create QR code configuration collection object
+        self.qrc_config_collection = QRCodeConfigurationCollection.create(
+            template_doc
+        )
+
+        # Initial text of labels and path of pictures in the layout
+        self._label_texts = []
+        self._picture_paths = []
+
+    def create_layout(self) -> QgsPrintLayout:
+        """
+        Loads the print layout from the template. The values of its labels
+        and pictures are recorded so that reset_layout can restore them
+        before the layout is composed for the next record.
+        :return: Print layout.
+        :rtype: QgsPrintLayout
+        """
+        print_layout = QgsPrintLayout(QgsProject.instance())
+        print_layout.initializeDefaults()
+
+        context = QgsReadWriteContext()
+        print_layout.loadFromTemplate(self.template_doc, context)
+
+        self._label_texts = []
+        self._picture_paths = []
+        for item in print_layout.items():
+            if isinstance(item, QgsLayoutItemLabel):
+                self._label_texts.append((item, item.text()))
+            elif isinstance(item, QgsLayoutItemPicture):
+                self._picture_paths.append((item, item.picturePath()))
+
+        return print_layout
+
+    def reset_layout(self):
+        """
+        Restores the text of labels and path of pictures to the values in
+        the template.
+        """
+        for item, label_text in self._label_texts:
+            item.setText(label_text)
+
+        for item, picture_path in self._picture_paths:
+            item.setPicturePath(picture_path)
+
+
+class BatchContext:
+    """
+    Prepared template, print layout, data source tables and output options
+    shared by the records of a batch.
+    """
+
+    def __init__(self, prepared, output_mode, file_path=None,
+                 data_fields=None, file_extension=''):
+        self.prepared = prepared
+        self.output_mode = output_mode
+        self.file_path = file_path
+        self.data_fields = data_fields or []
+        self.file_extension = file_extension
+        self.output_dir = None
+
+        # Reflected data source and entity tables
+        self.ds_table = None
+        self.naming_table = None
+
+        # Data source column referencing the entity records
+        self.query_field = 'id'
+
+        self.print_layout = None
+
+        # Writer of the multi-page PDF in PDFAtlas output mode
+        self.atlas = None
+
+        # (Linked table, linked field, source field) of items whose linked
+        # records are prefetched for each chunk of records
+        self.linked_queries = []
+
+        # Reflected linked tables
+        self.linked_tables = {}
+
+        # Photo item id -> PhotoQuery
+        self.photo_queries = {}
+
+        # Reflected base table of the supporting documents
+        self.document_table = None
+
+        # Root directory of the supporting documents and profile folder
+        self.document_path = ''
+        self.profile_name = ''
+
+        # Map item id -> (template extent, [(spatial field mapping, memory
+        # layer)]) of the maps showing the spatial fields of the records
+        self.spatial_layers = {}
+
+        # WKB of the spatial fields, selected with the data source records
+        self.wkb_columns = []
+
+        # Table item id -> memory layer holding the linked records shown by
+        # the item
+        self.table_layers = {}
+
+    @property
+    def use_data_fields(self) -> bool:
+        """
+        :return: True if each document is written to the output directory
+        and named using the values of the data fields.
+        :rtype: bool
+        """
+        return self.file_path is None and len(self.data_fields) > 0
+
+
+class BatchRecords:
+    """
+    Records fetched for a chunk of the entity records in a batch.
+    """
+
+    def __init__(self):
+        # Entity record id -> data source records
+        self.ds_records = {}
+
+        # Entity record id -> records used to name the output files
+        self.naming_records = {}
+
+        # (Linked table, linked field) -> {linked field value: records}
+        self.linked_records = {}
+
+        # Photo item id -> {source field value: photo file path}
+        self.photo_paths = {}
+
+    def set_linked_records(self, linked_table, linked_field, values,
+                           records):
+        """
+        Sets the prefetched records of a linked table.
+        :param linked_table: Name of the linked table.
+        :type linked_table: str
+        :param linked_field: Column in the linked table referencing the data
+        source.
+        :type linked_field: str
+        :param values: Values of the linked field which were queried.
+        :type values: list
+        :param records: Collection of linked field values and corresponding
+        records.
+        :type records: dict
+        """
+        linked = dict((v, []) for v in values)
+        linked.update(records)
+        self.linked_records[(linked_table, linked_field)] = linked
+
+    def linked(self, linked_table, linked_field, value):
+        """
+        :return: Prefetched records of the linked table whose linked field
+        matches the value or None if the value was not prefetched.
+        :rtype: list
+        """
+        linked = self.linked_records.get((linked_table, linked_field), None)
+        if linked is None:
+            return None
+
+        return linked.get(value, None)
+
+
 class DocumentGenerator(QObject):
     """
     Generates documents from user-defined templates.
@@ -98,6 +354,8 @@ class DocumentGenerator(QObject):
     # Output type enumerations
     Image = 0
     PDF = 1
+    # All the records in a single, multi-page PDF
+    PDFAtlas = 2
 
     def __init__(self, iface, parent=None):
         QObject.__init__(self, parent)
@@ -114,7 +372,6 @@ class DocumentGenerator(QObject):
         self._map_memory_layers = []
         self.map_registry = QgsProject.instance()
         self._table_mem_layers = []
-        self._feature_ids = []
 
         self._link_field = ""
 
@@ -123,6 +380,41 @@ class DocumentGenerator(QObject):
         # Value formatter for output files
         self._file_name_value_formatter = None
 
+        # Records prefetched for the chunk being generated
+        self._batch_records = None
+
+        # Tables reflected, and statements built, for the current job
+        self._metadata = None
+        self._statements = {}
+        self._compiled_cache = {}
+
+        # Records the time spent in each stage, if set
+        self._profiler = None
+
+    def profiler(self):
+        """
+        :return: Profiler recording the time spent in each stage of
+        document generation, or None if generation is not being profiled.
+        :rtype: GenerationProfiler
+        """
+        return self._profiler
+
+    def set_profiler(self, profiler):
+        """
+        Sets the profiler recording the time spent, and queries executed, in
+        each stage of document generation.
+        :param profiler: Profiler or None to stop profiling.
+        :type profiler: GenerationProfiler
+        """
+        self._profiler = profiler
+
+    def _stage(self, name):
+        # Context manager recording the stage if generation is profiled
+        if self._profiler is None:
+            return nullcontext()
+
+        return self._profiler.stage(name)
+
     def link_field(self) -> str:
         """
         :return: The field name in the data source that should also exist
@@ -229,12 +521,42 @@ class DocumentGenerator(QObject):
 
         return composer_ds, ""
 
+    def prepare_template(self, template_path: str):
+        """
+        Reads the document template and builds its data source and
+        configuration collections so that they can be reused for all the
+        records of a batch.
+        :param template_path: Absolute path to template file.
+        :type template_path: str
+        :return: A tuple containing the prepared template, None if it could
+        not be read, and error message where applicable.
+        :rtype: tuple
+        """
+        template_doc, err_msg = self.template_document(template_path)
+        if template_doc is None:
+            return None, err_msg
+
+        prepared = PreparedTemplate(template_doc)
+
+        # Check if data source exists and return if it doesn't
+        if not self.data_source_exists(prepared.data_source):
+            msg = QApplication.translate("DocumentGenerator",
+                                         "'{0}' data source does not exist in the database."
+                                         "\nPlease contact your database "
+                                         "administrator.".format(prepared.data_source.name()))
+            return None, msg
+
+        return prepared, ""
+
     def run(self, templatePath, entityFieldName, entityFieldValue, outputMode, filePath=None,
             dataFields=None, fileExtension=None, data_source=None):
         """
+        Generates the documents of a single entity record. Use run_batch
+        when generating documents for several records.
         :param templatePath: The file path to the user-defined template.
         :param entityFieldName: The name of the column for the specified entity which
-        must exist in the data source view or table.
+        must exist in the data source view or table. The column is derived
+        from the data source and entity names.
         :param entityFieldValue: The value for filtering the records in the data source
         view or table.
         :param outputMode: Whether the output composition should be an image or PDF.
@@ -247,242 +569,747 @@ class DocumentGenerator(QObject):
         row values will be used to name output files if the options has been
         specified by the user.
         """
-        if dataFields is None:
-            dataFields = []
+        return self.run_batch(
+            templatePath,
+            [entityFieldValue],
+            outputMode,
+            file_path=filePath,
+            data_fields=dataFields,
+            file_extension=fileExtension,
+            data_source=data_source
+        )
+
+    def run_batch(self, template_path, record_ids, output_mode, file_path=None,
+                  data_fields=None, file_extension=None, data_source=None,
+                  chunk_size=BATCH_SIZE, progress_callback=None,
+                  records_per_file=0):
+        """
+        Generates the documents of several entity records. The template is
+        read, its configuration collections built and the print layout
+        loaded once for the whole batch while the matching records are
+        fetched from the data source chunk_size records at a time.
+        :param template_path: The file path to the user-defined template.
+        :type template_path: str
+        :param record_ids: Ids of the entity records whose documents are to
+        be generated.
+        :type record_ids: list
+        :param output_mode: Whether the output composition should be an
+        image, PDF or a single PDF containing the pages of all the records.
+        :type output_mode: int
+        :param file_path: The output file where the composition will be
+        written to. Applies to single mode output generation and is
+        required in PDFAtlas mode.
+        :type file_path: str
+        :param data_fields: List containing the field names whose values will
+        be used to name the files. This is used in multiple mode
+        configuration.
+        :type data_fields: list
+        :param file_extension: The output file format. Used in multiple mode
+        configuration.
+        :type file_extension: str
+        :param data_source: Name of the entity table whose row values will be
+        used to name output files if the option has been specified by the
+        user.
+        :type data_source: str
+        :param chunk_size: Number of entity records whose data source records
+        are fetched in a single query.
+        :type chunk_size: int
+        :param progress_callback: Function called after the documents of each
+        entity record have been generated, with the number of records
+        processed, the record id, status and error message. Generation stops
+        if it returns False. If not specified, generation stops at the first
+        error.
+        :type progress_callback: function
+        :param records_per_file: Number of records whose pages are written
+        to a PDF before a new file is started, in PDFAtlas mode. All the
+        records are written to one file if zero.
+        :type records_per_file: int
+        :return: A tuple containing the status and error message where
+        applicable.
+        :rtype: tuple
+        """
+        context, msg = self.begin_batch(
+            template_path,
+            output_mode,
+            file_path=file_path,
+            data_fields=data_fields,
+            file_extension=file_extension,
+            data_source=data_source,
+            records_per_file=records_per_file
+        )
+        if context is None:
+            return False, msg
+
+        try:
+            return self._run_batch(context, record_ids, chunk_size,
+                                   progress_callback)
+        finally:
+            self.end_batch(context)
+
+    def _run_batch(self, context, record_ids, chunk_size, progress_callback):
+        # Generates the documents of the records in chunks
+        record_ids = list(record_ids)
+        num_processed = 0
+
+        for start in range(0, len(record_ids), chunk_size):
+            chunk_ids = record_ids[start:start + chunk_size]
+
+            # Execute query
+            fetched = self.fetch_records(context, chunk_ids)
+
+            for record_id in chunk_ids:
+                status, msg = self.generate_record(context, record_id,
+                                                   fetched)
+                num_processed += 1
+
+                if progress_callback is None:
+                    if not status:
+                        return False, msg
+
+                elif not progress_callback(num_processed, record_id, status,
+                                           msg):
+                    return (False, QApplication.translate("DocumentGenerator",
+                                                          "Document generation canceled"))
+
+        return True, "Success"
+
+    def begin_batch(self, template_path, output_mode, file_path=None,
+                    data_fields=None, file_extension=None, data_source=None,
+                    records_per_file=0):
+        """
+        Prepares the template, print layout and data source tables used to
+        generate the documents of a batch of records. Refer to run_batch
+        for a description of the arguments.
+        :return: A tuple containing the batch context, None if the
+        documents cannot be generated, and error message where applicable.
+        :rtype: tuple
+        """
+        if data_fields is None:
+            data_fields = []
 
-        if fileExtension is None:
-            fileExtension = ''
+        if file_extension is None:
+            file_extension = ''
 
         if data_source is None:
             data_source = ''
 
+        if output_mode == DocumentGenerator.PDFAtlas and not file_path:
+            return None, QApplication.translate(
+                "DocumentGenerator",
+                "The output file of the PDF has not been specified."
+            )
+
+        # Reflect the tables again in case they have changed since the
+        # last job
+        self.clear_query_cache()
+
+        with self._stage(TEMPLATE):
+            prepared, msg = self.prepare_template(template_path)
+        if prepared is None:
+            return None, msg
+
+        context = BatchContext(
+            prepared,
+            output_mode,
+            file_path=file_path,
+            data_fields=data_fields,
+            file_extension=file_extension
+        )
 
-        templateFile = QFile(templatePath)
+        # Set file name value formatter
+        self._file_name_value_formatter = EntityValueFormatter(
+            name=data_source
+        )
 
-        if not templateFile.open(QIODevice.ReadOnly):
-            return False, QApplication.translate("DocumentGenerator",
-                                                 "Cannot read template file.")
+        # Register field names to be used for file naming
+        self._file_name_value_formatter.register_columns(data_fields)
 
-        templateDoc = QDomDocument()
+        if context.use_data_fields:
+            context.output_dir = self._composer_output_path()
+            if context.output_dir is None:
+                return (None, QApplication.translate("DocumentGenerator",
+                                                     "System could not read the location of the output directory in the registry."))
 
-        if templateDoc.setContent(templateFile):
-            composerDS = ComposerDataSource.create(templateDoc)
-            spatialFieldsConfig = SpatialFieldsConfiguration.create(templateDoc)
-            composerDS.setSpatialFieldsConfig(spatialFieldsConfig)
+            if not QDir().exists(context.output_dir):
+                return (None, QApplication.translate("DocumentGenerator",
+                                                     "Output directory does not exist"))
 
+        # Load the layers required by the table composer items
+        self._table_mem_layers = load_table_layers(
+            prepared.table_config_collection
+        )
 
-            # Check if data source exists and return if it doesn't
-            if not self.data_source_exists(composerDS):
-                msg = QApplication.translate("DocumentGenerator",
-                                             "'{0}' data source does not exist in the database."
-                                             "\nPlease contact your database "
-                                             "administrator.".format(composerDS.name()))
-                return False, msg
+        ds_name = prepared.data_source.name()
+        entity_field_name = self.format_entity_field_name(ds_name, data_source)
+        context.query_field = entity_field_name.rpartition('.')[2]
+        context.ds_table = self._reflect_table(ds_name)
+        if context.use_data_fields:
+            context.naming_table = self._reflect_table(data_source)
 
-            # Set file name value formatter
-            self._file_name_value_formatter = EntityValueFormatter(
-                name=data_source
+        # Linked records of charts are fetched with the data source records
+        for conf in prepared.chart_config_collection.items().values():
+            self._add_linked_query(context, conf)
+
+        # As are the paths of the photos
+        for conf in prepared.photo_config_collection.items().values():
+            self._add_photo_query(context, conf)
+
+        with self._stage(TEMPLATE):
+            context.print_layout = prepared.create_layout()
+            self._prepare_spatial_layers(context)
+            self._prepare_table_layers(context)
+
+        if output_mode == DocumentGenerator.PDFAtlas:
+            context.atlas = PdfAtlasWriter(file_path, records_per_file)
+
+        return context, ""
+
+    def end_batch(self, context):
+        """
+        Completes the output of the batch, such as the multi-page PDF in
+        PDFAtlas mode.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        """
+        if context.atlas is not None:
+            context.atlas.close()
+
+        context.spatial_layers.clear()
+        context.table_layers.clear()
+
+    def _add_linked_query(self, context, config):
+        """
+        Adds the linked table of the item configuration to those whose
+        records are prefetched.
+        """
+        try:
+            linked_table = config.linked_table()
+            linked_field = config.linked_field()
+            source_field = config.source_field()
+        except AttributeError:
+            return
+
+        if not linked_table or not linked_field or not source_field:
+            return
+
+        query = (linked_table, linked_field, source_field)
+        if query in context.linked_queries:
+            return
+
+        if linked_table not in context.linked_tables:
+            context.linked_tables[linked_table] = self._reflect_table(
+                linked_table
             )
+        context.linked_queries.append(query)
 
-            # Register field names to be used for file naming
-            self._file_name_value_formatter.register_columns(dataFields)
+    def _prepare_spatial_layers(self, context):
+        """
+        Creates a memory layer for each spatial field mapping, which is
+        shown by the map item and whose feature is replaced for each
+        record. Maps without spatial fields are zoomed to the extent of the
+        map canvas once for the batch.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        """
+        prepared = context.prepared
+        print_layout = context.print_layout
+        ds_name = prepared.data_source.name()
+        sp_fields_mapping = prepared.spatial_fields_config.spatialFieldsMapping()
+
+        # Refresh non-custom map composer items
+        self._refresh_composer_maps(print_layout,
+                                    list(sp_fields_mapping.keys()))
+
+        wkb_labels = []
+        for map_id, spfm_list in sp_fields_mapping.items():
+            map_item = print_layout.itemById(map_id)
+            if map_item is None:
+                continue
 
-            # TODO: Need to automatically register custom configuration collections
-            # Photo config collection
-            ph_config_collection = PhotoConfigurationCollection.create(templateDoc)
+            layers = []
+            for spfm in spfm_list:
+                spatial_field = spfm.spatialField()
+                if not spatial_field or \
+                        spatial_field not in context.ds_table.c:
+                    continue
+
+                geom_type, srid = geometryType(ds_name, spatial_field)
+                ref_layer = self._build_vector_layer(
+                    self._random_feature_layer_name(spatial_field),
+                    geom_type,
+                    srid
+                )
+                if ref_layer is None or not ref_layer.isValid():
+                    continue
+
+                # Style layer based on the spatial field mapping symbol layer
+                symbol_layer = spfm.symbolLayer()
+                if symbol_layer is not None:
+                    ref_layer.renderer().symbol().changeSymbolLayer(
+                        0,
+                        symbol_layer.clone()
+                    )
 
-            # Table configuration collection
-            table_config_collection = TableConfigurationCollection.create(templateDoc)
+                wkb_label = self._wkb_label(spatial_field)
+                if wkb_label not in wkb_labels:
+                    wkb_labels.append(wkb_label)
+                    context.wkb_columns.append(
+                        func.ST_AsBinary(
+                            context.ds_table.c[spatial_field]
+                        ).label(wkb_label)
+                    )
 
-            # Create chart configuration collection object
-            chart_config_collection = ChartConfigurationCollection.create(templateDoc)
+                layers.append((spfm, ref_layer))
 
-            # Create QR code configuration collection object
-            qrc_config_collection = QRCodeConfigurationCollection.create(templateDoc)
+            if len(layers) == 0:
+                continue
 
-            # Load the layers required by the table composer items
-            self._table_mem_layers = load_table_layers(table_config_collection)
+            map_item.setLayers(spatial_map_layers(
+                map_item,
+                [lyr for _, lyr in reversed(layers)]
+            ))
+            map_item.setKeepLayerSet(True)
 
-            entityFieldName = self.format_entity_field_name(composerDS.name(), data_source)
+            context.spatial_layers[map_id] = (
+                QgsRectangle(map_item.extent()),
+                layers
+            )
 
-            # Execute query
-            dsTable, records = self._exec_query(composerDS.name(), entityFieldName, entityFieldValue)
+    def _prepare_table_layers(self, context):
+        """
+        Sets a memory layer on each table item whose linked records are
+        fetched with the data source records, so that the rows of each
+        document are shown without querying the database again.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        """
+        table_configs = context.prepared.table_config_collection.items()
+        for conf in table_configs.values():
+            if not conf.linked_table() or not conf.linked_field() or \
+                    not conf.source_field():
+                continue
+
+            mem_layer = conf.memory_layer()
+            if mem_layer is None or not mem_layer.isValid():
+                continue
+
+            self._add_linked_query(context, conf)
+
+            table_handler = conf.create_handler(context.print_layout)
+            table_handler.set_memory_layer(mem_layer)
+            context.table_layers[conf.item_id()] = mem_layer
+
+    def _wkb_label(self, spatial_field):
+        # Label of the WKB of the spatial field in the data source records
+        return 'stdm_wkb_{0}'.format(spatial_field)
+
+    def _add_photo_query(self, context, config):
+        """
+        Adds the photo item configuration to those whose document paths are
+        prefetched.
+        """
+        photo_tb = config.linked_table()
+        if not photo_tb or not config.linked_field() or \
+                not config.source_field():
+            return
+
+        # Get parent table of supporting document table
+        s_doc_entities = self._current_profile.supporting_document_entities()
+        photo_doc_entities = [de for de in s_doc_entities
+                              if de.name == photo_tb]
 
-            if records is None or len(records) == 0:
-                return False, QApplication.translate("DocumentGenerator",
-                                                     "No matching records in the database")
+        if len(photo_doc_entities) == 0:
+            return
 
-            """
-            Iterate through records where a single file output will be generated for each matching record.
-            """
-            project = QgsProject().instance()
+        if context.document_table is None:
+            context.document_table = self._reflect_table(
+                self._current_profile.supporting_document.name
+            )
+            context.document_path = network_document_path()
+            context.profile_name = self._current_profile.name.replace(
+                ' ', '_'
+            ).lower()
+
+        if photo_tb not in context.linked_tables:
+            context.linked_tables[photo_tb] = self._reflect_table(photo_tb)
+
+        context.photo_queries[config.item_id()] = PhotoQuery(
+            photo_tb,
+            config.linked_field(),
+            config.source_field(),
+            int(config.document_type_id),
+            config.document_type.replace(' ', '_').lower(),
+            photo_doc_entities[0].parent_entity.name
+        )
 
+    def fetch_records(self, context, record_ids, session=None):
+        """
+        Fetches the data source records, records used to name the output
+        files and records of linked tables, of the given entity records.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        :param record_ids: Ids of the entity records.
+        :type record_ids: list
+        :param session: Session used to query the database. The session of
+        the document generator is used if not specified. Background workers
+        should specify their own session.
+        :type session: Session
+        :return: Records fetched for the entity records.
+        :rtype: BatchRecords
+        """
+        with self._stage(FETCH):
+            return self._fetch_records(context, record_ids, session)
+
+    def _fetch_records(self, context, record_ids, session=None):
+        fetched = BatchRecords()
+        fetched.ds_records = self._query_records(
+            context.ds_table,
+            context.query_field,
+            record_ids,
+            session,
+            context.wkb_columns
+        )
+
+        if context.naming_table is not None:
+            fetched.naming_records = self._query_records(
+                context.naming_table,
+                'id',
+                record_ids,
+                session
+            )
 
+        # One query for each linked table and field
+        for linked_table, linked_field, source_field in \
+                context.linked_queries:
+            values = self._source_values(fetched, source_field)
+            if len(values) == 0:
+                continue
+
+            linked_records = self._query_records(
+                context.linked_tables[linked_table],
+                linked_field,
+                values,
+                session
+            )
+            fetched.set_linked_records(linked_table, linked_field, values,
+                                       linked_records)
+
+        # One query for each distinct photo query
+        query_paths = {}
+        for item_id, query in context.photo_queries.items():
+            if query not in query_paths:
+                query_paths[query] = self._query_photo_paths(
+                    context,
+                    query,
+                    self._source_values(fetched, query.source_field),
+                    session
+                )
+            fetched.photo_paths[item_id] = query_paths[query]
+
+        return fetched
+
+    def _source_values(self, fetched, source_field):
+        # Distinct values of the source field in the data source records
+        values = set()
+        for records in fetched.ds_records.values():
             for rec in records:
-                #composition = QgsPrintLayout(self._map_settings)
-                print_layout = QgsPrintLayout(project)
-                print_layout.initializeDefaults()
-
-                context = QgsReadWriteContext()
-                print_layout.loadFromTemplate(templateDoc, context)
-                ref_layer = None
-                # Set value of composer items based on the corresponding db values
-
-                for composerId in composerDS.dataFieldMappings().reverse:
-                    # Use composer item id since the uuid is stripped off
-                    composerItem = print_layout.itemById(composerId)
-
-                    if composerItem is not None:
-                        fieldName = composerDS.dataFieldName(composerId)
-                        if fieldName == '':
-                            continue
-                        fieldValue = getattr(rec, fieldName)
-                        self._composeritem_value_handler(composerItem, fieldValue)
-
-                # Extract photo information
-                self._extract_photo_info(print_layout, ph_config_collection, rec)
-
-                # Set table item values based on configuration information
-                self._set_table_data(print_layout, table_config_collection, rec)
-
-                # Refresh non-custom map composer items
-                self._refresh_composer_maps(print_layout,
-                                            list(spatialFieldsConfig.spatialFieldsMapping().keys()))
-
-                # Set use fixed scale to false i.e. relative zoom
-                use_fixed_scale = False
-
-                # Create memory layers for spatial features and add them to the map
-                for mapId, spfmList in spatialFieldsConfig.spatialFieldsMapping().items():
-
-                    map_item = print_layout.itemById(mapId)
-
-                    if map_item is not None:
-                        # Clear any previous map memory layer
-                        # self.clear_temporary_map_layers()
-                        for spfm in spfmList:
-                            # Use the value of the label field to name the layer
-                            lbl_field = spfm.labelField()
-                            spatial_field = spfm.spatialField()
-
-                            if not spatial_field:
-                                continue
-
-                            if lbl_field:
-                                if hasattr(rec, spfm.labelField()):
-                                    layerName = getattr(rec, spfm.labelField())
-                                else:
-                                    layerName = self._random_feature_layer_name(spatial_field)
-                            else:
-                                layerName = self._random_feature_layer_name(spatial_field)
-
-                            # Extract the geometry using geoalchemy spatial capabilities
-                            geom_value = getattr(rec, spatial_field)
-                            if geom_value is None:
-                                continue
-
-                            geom_func = geom_value.ST_AsText()
-                            geomWKT = self._dbSession.scalar(geom_func)
-
-                            # Get geometry type
-                            geom_type, srid = geometryType(composerDS.name(),
-                                                           spatial_field)
-
-                            # Create reference layer with feature
-                            ref_layer = self._build_vector_layer(layerName, geom_type, srid)
-
-                            if ref_layer is None or not ref_layer.isValid():
-                                continue
-                            # Add feature
-                            bbox = self._add_feature_to_layer(ref_layer, geomWKT)
-
-                            zoom_type = spfm.zoom_type
-                            # Only scale the extents if zoom type is relative
-                            if zoom_type == 'RELATIVE':
-                                bbox.scale(spfm.zoomLevel())
-
-                            # Workaround for zooming to single point extent
-                            if ref_layer.wkbType() == QgsWkbTypes.Point:
-                                canvas_extent = self._iface.mapCanvas().fullExtent()
-                                cnt_pnt = bbox.center()
-                                canvas_extent.scale(1.0 / 32, cnt_pnt)
-                                bbox = canvas_extent
-
-                            # Style layer based on the spatial field mapping symbol layer
-                            symbol_layer = spfm.symbolLayer()
-                            if symbol_layer is not None:
-                                ref_layer.renderer().symbols()[0].changeSymbolLayer(0, spfm.symbolLayer())
-                            '''
-                            Add layer to map and ensure its always added at the top
-                            '''
-                            self.map_registry.addMapLayer(ref_layer)
-                            self._iface.mapCanvas().setExtent(bbox)
-
-                            # Set scale if type is FIXED
-                            if zoom_type == 'FIXED':
-                                self._iface.mapCanvas().zoomScale(spfm.zoomLevel())
-                                use_fixed_scale = True
-
-                            self._iface.mapCanvas().refresh()
-                            # Add layer to map memory layer list
-                            self._map_memory_layers.append(ref_layer.id())
-                            self._hide_layer(ref_layer)
-                        '''
-                        Use root layer tree to get the correct ordering of layers
-                        in the legend
-                        '''
-                        self._refresh_map_item(map_item, use_fixed_scale)
-
-                # Extract chart information and generate chart
-                self._generate_charts(print_layout, chart_config_collection, rec)
-
-                # Extract QR code information in order to generate QR codes
-                self._generate_qr_codes(print_layout, qrc_config_collection, rec)
-
-                # Build output path and generate print_layout
-                if filePath is not None and len(dataFields) == 0:
-                    self._write_output(print_layout, outputMode, filePath)
-
-                elif filePath is None and len(dataFields) > 0:
-                    entityFieldName = 'id'
-                    docFileName = self._build_file_name(data_source, entityFieldName,
-                                                        entityFieldValue, dataFields, fileExtension)
-
-                    # Replace unsupported characters in Windows file naming
-                    docFileName = docFileName.replace('/', '_').replace('\\', '_').replace(':', '_').strip('*?"<>|')
-
-                    if not docFileName:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                              "File name could not be generated from the data fields."))
-
-                    outputDir = self._composer_output_path()
-                    if outputDir is None:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                              "System could not read the location of the output directory in the registry."))
-
-                    qDir = QDir()
-                    if not qDir.exists(outputDir):
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                              "Output directory does not exist"))
-
-                    absDocPath = "{0}/{1}".format(outputDir, docFileName)
-
-                    write_result = self._write_output(print_layout, outputMode, absDocPath)
-
-                    if write_result == QgsLayoutExporter.Canceled:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                               "Document generation canceled"))
-
-                    if write_result == QgsLayoutExporter.MemoryError:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                              "Unable to allocate memory required to export"))
-
-                    if write_result == QgsLayoutExporter.FileError:
-                        return (False, QApplication.translate("DocumentGenerator",
-                                                              "Could not write to destination file, likely due to a lock held by anther application"))
-            return True, "Success"
-
-        return False, "Document Print Layout could not be generated"
+                value = getattr(rec, source_field, None)
+                if value is not None:
+                    values.add(value)
+
+        return list(values)
+
+    def _query_photo_paths(self, context, query, values, session=None):
+        """
+        Resolves the photos of the given document type, for the values of
+        the source field, in a single query joining the photo table to the
+        base supporting documents table.
+        :return: Collection of source field values and corresponding file
+        paths. Values without a photo are not included while the path is
+        None if it could not be built.
+        :rtype: dict
+        """
+        if len(values) == 0:
+            return {}
+
+        if session is None:
+            session = self._dbSession
+
+        photo_table = context.linked_tables[query.linked_table]
+        doc_table = context.document_table
+        linked_column = photo_table.c[query.linked_field]
+
+        try:
+            results = session.query(
+                linked_column.label('source_value'),
+                doc_table.c.document_identifier,
+                doc_table.c.filename
+            ).join(
+                doc_table,
+                photo_table.c.supporting_doc_id == doc_table.c.id
+            ).filter(
+                photo_table.c.document_type == query.document_type_id,
+                linked_column.in_(values)
+            ).all()
+        except SQLAlchemyError as ex:
+            session.rollback()
+            raise ex
+
+        photo_paths = {}
+        for r in results:
+            # Only one photo is shown per record
+            if r.source_value in photo_paths:
+                continue
+
+            photo_paths[r.source_value] = self._photo_path(
+                context.document_path,
+                context.profile_name,
+                query.document_parent_table,
+                query.document_type,
+                r.document_identifier,
+                r.filename
+            )
+
+        return photo_paths
+
+    def generate_record(self, context, record_id, fetched,
+                        skip_existing=False):
+        """
+        Generates the documents of an entity record using the layout of the
+        batch.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        :param record_id: Id of the entity record.
+        :type record_id: int
+        :param fetched: Records fetched for the chunk containing the entity
+        record.
+        :type fetched: BatchRecords
+        :param skip_existing: True if the document should not be generated
+        if the output file, named using the data fields, already exists.
+        :type skip_existing: bool
+        :return: A tuple containing the status and error message where
+        applicable.
+        :rtype: tuple
+        """
+        records = fetched.ds_records.get(record_id, [])
+        naming_records = fetched.naming_records.get(record_id, [])
+
+        if len(records) == 0:
+            return False, QApplication.translate(
+                "DocumentGenerator",
+                "No matching records in the database"
+            )
+
+        output_path = context.file_path
+
+        # Build output path
+        if context.use_data_fields:
+            output_path, msg = self._named_output_path(context,
+                                                       naming_records)
+            if output_path is None:
+                return False, msg
+
+            if skip_existing and QFile.exists(output_path):
+                return True, "Success"
+
+        # Items with linked tables use the prefetched records
+        self._batch_records = fetched
+        if self._profiler is not None:
+            self._profiler.begin_document(record_id)
+        try:
+            return self._generate_documents(context, records, output_path)
+        finally:
+            self._batch_records = None
+            if self._profiler is not None:
+                self._profiler.end_document()
+
+    def _generate_documents(self, context, records, output_path):
+        # Composes and writes the layout for each data source record
+        status, msg = True, "Success"
+
+        for rec in records:
+            context.prepared.reset_layout()
+            self._compose_record(context, rec)
+
+            with self._stage(EXPORT):
+                if context.atlas is not None:
+                    write_result = context.atlas.add_layout(
+                        context.print_layout
+                    )
+                    status, msg = self._export_status(write_result)
+
+                elif output_path is not None:
+                    write_result = self._write_output(
+                        context.print_layout,
+                        context.output_mode,
+                        output_path
+                    )
+                    status, msg = self._export_status(write_result)
+
+            self.clear_temporary_map_layers()
+
+            if not status:
+                break
+
+        return status, msg
+
+    def _compose_record(self, context, rec):
+        """
+        Sets the values of the layout items using the values of the data
+        source record.
+        :param context: Context of the batch whose layout is being composed.
+        :type context: BatchContext
+        :param rec: Matching record from the data source.
+        :type rec: object
+        """
+        print_layout = context.print_layout
+        prepared = context.prepared
+        composerDS = prepared.data_source
+
+        # Set value of composer items based on the corresponding db values
+        with self._stage(FIELDS):
+            for composerId in composerDS.dataFieldMappings().reverse:
+                # Use composer item id since the uuid is stripped off
+                composerItem = print_layout.itemById(composerId)
+
+                if composerItem is not None:
+                    fieldName = composerDS.dataFieldName(composerId)
+                    if fieldName == '':
+                        continue
+                    fieldValue = getattr(rec, fieldName)
+                    self._composeritem_value_handler(composerItem,
+                                                     fieldValue)
+
+        # Extract photo information
+        with self._stage(PHOTOS):
+            self._extract_photo_info(print_layout,
+                                     prepared.photo_config_collection, rec)
+
+        # Set table item values based on configuration information
+        with self._stage(TABLES):
+            self._set_table_data(print_layout,
+                                 prepared.table_config_collection,
+                                 rec, context.table_layers)
+
+        # Show the spatial features of the record in the map items
+        with self._stage(MAPS):
+            self._set_spatial_features(context, rec)
+
+        # Extract chart information and generate chart
+        with self._stage(CHARTS):
+            self._generate_charts(print_layout,
+                                  prepared.chart_config_collection, rec)
+
+        # Extract QR code information in order to generate QR codes
+        with self._stage(QR_CODES):
+            self._generate_qr_codes(print_layout,
+                                    prepared.qrc_config_collection, rec)
+
+    def _set_spatial_features(self, context, rec):
+        """
+        Replaces the features of the memory layers with the geometries of
+        the record and sets the extents of the map items directly, without
+        using the map canvas.
+        :param context: Context of the batch.
+        :type context: BatchContext
+        :param rec: Matching record from the data source.
+        :type rec: object
+        """
+        for map_id, (template_extent, layers) in \
+                context.spatial_layers.items():
+            map_item = context.print_layout.itemById(map_id)
+            if map_item is None:
+                continue
+
+            extent = None
+            scale = None
+            for spfm, ref_layer in layers:
+                ref_layer.dataProvider().truncate()
+
+                geom_wkb = getattr(
+                    rec,
+                    self._wkb_label(spfm.spatialField()),
+                    None
+                )
+                if geom_wkb is None:
+                    continue
+
+                # Use the value of the label field to name the layer
+                lbl_field = spfm.labelField()
+                if lbl_field and hasattr(rec, lbl_field):
+                    ref_layer.setName(str(getattr(rec, lbl_field)))
+
+                bbox = self._add_feature_to_layer(ref_layer, bytes(geom_wkb))
+                if bbox is None:
+                    continue
+
+                zoom_type = spfm.zoom_type
+                # Only scale the extents if zoom type is relative
+                if zoom_type == 'RELATIVE':
+                    bbox.scale(spfm.zoomLevel())
+
+                # Single points are centered in the extent of the template
+                if ref_layer.wkbType() == QgsWkbTypes.Point:
+                    cnt_pnt = bbox.center()
+                    bbox = QgsRectangle(template_extent)
+                    bbox.scale(1.0, cnt_pnt)
+
+                extent = bbox
+                # Set scale if type is FIXED
+                scale = spfm.zoomLevel() if zoom_type == 'FIXED' else None
+
+            # The layout is reused for all the records hence a record
+            # without geometries is shown at the extent of the template
+            # rather than that of the previous record
+            if extent is None:
+                extent = QgsRectangle(template_extent)
+
+            map_item.zoomToExtent(extent)
+            if scale is not None:
+                map_item.setScale(scale)
+
+    def _named_output_path(self, context, naming_records):
+        """
+        Builds the path of the output file in the output directory, named
+        using the values of the data fields.
+        :return: A tuple containing the path, None if the file name could
+        not be generated, and error message where applicable.
+        :rtype: tuple
+        """
+        docFileName = ""
+        if len(naming_records) > 0:
+            docFileName = self._file_name(naming_records[0],
+                                          context.data_fields,
+                                          context.file_extension)
+
+        # Replace unsupported characters in Windows file naming
+        docFileName = docFileName.replace('/', '_').replace('\\', '_').replace(':', '_').strip('*?"<>|')
+
+        if not docFileName:
+            return (None, QApplication.translate("DocumentGenerator",
+                                                 "File name could not be generated from the data fields."))
+
+        return "{0}/{1}".format(context.output_dir, docFileName), ""
+
+    def _export_status(self, write_result):
+        """
+        :return: A tuple containing the status and error message of the
+        layout export.
+        :rtype: tuple
+        """
+        if write_result == QgsLayoutExporter.Canceled:
+            return (False, QApplication.translate("DocumentGenerator",
+                                                  "Document generation canceled"))
+
+        if write_result == QgsLayoutExporter.MemoryError:
+            return (False, QApplication.translate("DocumentGenerator",
+                                                  "Unable to allocate memory required to export"))
+
+        if write_result == QgsLayoutExporter.FileError:
+            return (False, QApplication.translate("DocumentGenerator",
+                                                  "Could not write to destination file, likely due to a lock held by anther application"))
+
+        return True, "Success"
 
     def format_entity_field_name(self, composer_datasource, entity):
         if '_vw_' in composer_datasource:
@@ -542,7 +1369,7 @@ class DocumentGenerator(QObject):
         if layers is None:
             return
         try:
-            for lyr_id in layers:
+            for lyr_id in list(layers):
                 self.map_registry.removeMapLayer(lyr_id)
                 layers.remove(lyr_id)
 
@@ -551,18 +1378,6 @@ class DocumentGenerator(QObject):
                 'Could not delete temporary designer layer. {}'.format(ex)
             )
 
-    def _hide_layer(self, layer):
-        """
-        Hides a layer from the canvas.
-        :param layer: The layer to be hidden.
-        :type layer: QgsVectorLayer
-        :return: None
-        :rtype: NoneType
-        """
-        self._iface.layerTreeView().setLayerVisible(
-            layer, False
-        )
-
     def _build_vector_layer(self, layer_name, geom_type, srid):
         """
         Builds a memory vector layer based on the spatial field mapping properties.
@@ -606,11 +1421,13 @@ class DocumentGenerator(QObject):
 
         self.map_registry.addMapLayers(v_layers, False)
 
-    def _set_table_data(self, composition, config_collection, record):
+    def _set_table_data(self, composition, config_collection, record,
+                        table_layers=None):
         # TODO: Clean up code to adopt this design.
         """
         Set table data by applying appropriate filter using information
-        from the config item and the record value.
+        from the config item and the record value. Items with a memory layer
+        are filled with the linked records prefetched for the batch instead.
         :param composition: Map composition.
         :type composition: QgsComposition
         :param config_collection: Table configuration collection specified in
@@ -618,12 +1435,32 @@ class DocumentGenerator(QObject):
         :type config_collection: TableConfigurationCollection
         :param record: Matching record from the result set.
         :type record: object
+        :param table_layers: Collection of table item ids and corresponding
+        memory layers.
+        :type table_layers: dict
         """
         table_configs = list(config_collection.items().values())
+        if table_layers is None:
+            table_layers = {}
 
         for conf in table_configs:
             table_handler = conf.create_handler(composition, self._exec_query)
-            table_handler.set_data_source_record(record)
+
+            mem_layer = table_layers.get(conf.item_id(), None)
+            if mem_layer is None:
+                table_handler.set_data_source_record(record)
+
+                continue
+
+            source_value = getattr(record, conf.source_field(), None)
+            linked_records = []
+            if source_value is not None:
+                _, linked_records = self._linked_query(
+                    conf.linked_table(),
+                    conf.linked_field(),
+                    source_value
+                )
+            table_handler.set_linked_records(mem_layer, linked_records)
 
     def _generate_charts(self, composition, config_collection, record):
         """
@@ -641,7 +1478,7 @@ class DocumentGenerator(QObject):
         chart_configs = list(config_collection.items().values())
 
         for cc in chart_configs:
-            chart_handler = cc.create_handler(composition, self._exec_query)
+            chart_handler = cc.create_handler(composition, self._linked_query)
             chart_handler.set_data_source_record(record)
 
     def _generate_qr_codes(self, composition, config_collection, record):
@@ -679,6 +1516,23 @@ class DocumentGenerator(QObject):
         ph_configs = list(config_collection.items().values())
 
         for conf in ph_configs:
+            # Use the paths prefetched for the batch
+            photo_paths = None
+            if self._batch_records is not None:
+                photo_paths = self._batch_records.photo_paths.get(
+                    conf.item_id(),
+                    None
+                )
+
+            if photo_paths is not None:
+                photo_path = photo_paths.get(
+                    getattr(record, conf.source_field(), None),
+                    None
+                )
+                self._set_photo(composition, conf.item_id(), photo_path)
+
+                continue
+
             photo_tb = conf.linked_table()
             referenced_column = conf.source_field()
             referencing_column = conf.linked_field()
@@ -715,15 +1569,9 @@ class DocumentGenerator(QObject):
             photo image
             '''
             if len(results) == 0:
-                pic_item = composition.itemById(conf.item_id())
-
-                if pic_item is not None:
-                    no_photo_path = PLUGIN_DIR + "/images/icons/no_photo.png"
-
-                    if QFile.exists(no_photo_path):
-                        self._composeritem_value_handler(pic_item, no_photo_path)
+                self._set_photo(composition, conf.item_id(), None)
 
-                    continue
+                continue
 
             for r in results:
                 base_ph_table, doc_results = self._exec_query(
@@ -759,17 +1607,38 @@ class DocumentGenerator(QObject):
         if pic_item is None:
             return
 
+        abs_path = self._photo_path(
+            network_document_path(),
+            self._current_profile.name.replace(' ', '_').lower(),
+            document_parent_table,
+            document_type,
+            doc_id,
+            doc_name
+        )
+        if abs_path is None:
+            return
+
+        if QFile.exists(abs_path):
+            self._composeritem_value_handler(pic_item, abs_path)
+
+    def _photo_path(self, network_ph_path, profile_name,
+                    document_parent_table, document_type, doc_id, doc_name):
+        """
+        Builds the absolute path of a supporting document in the network
+        document directory.
+        :return: Path of the document or None if it could not be built.
+        :rtype: str
+        """
         extensions = doc_name.rsplit(".", 1)
         if len(extensions) < 2:
-            return
+            return None
 
-        network_ph_path = network_document_path()
         if not network_ph_path:
-            return
+            return None
 
         img_extension = extensions[1]
-        profile_name = self._current_profile.name.replace(' ', '_').lower()
-        abs_path = '{0}/{1}/{2}/{3}/{4}.{5}'.format(
+
+        return '{0}/{1}/{2}/{3}/{4}.{5}'.format(
             network_ph_path,
             profile_name,
             document_parent_table,
@@ -778,12 +1647,26 @@ class DocumentGenerator(QObject):
             img_extension
         )
 
-        if QFile.exists(abs_path):
-            self._composeritem_value_handler(pic_item, abs_path)
+    def _set_photo(self, composition, composer_id, photo_path):
+        """
+        Shows the photo in the picture item. The no photo image is shown if
+        the path is None while the item is not changed if the photo file
+        does not exist.
+        """
+        pic_item = composition.itemById(composer_id)
+
+        if pic_item is None:
+            return
+
+        if photo_path is None:
+            photo_path = PLUGIN_DIR + "/images/icons/no_photo.png"
+
+        if QFile.exists(photo_path):
+            self._composeritem_value_handler(pic_item, photo_path)
 
     def _add_feature_to_layer(self, vlayer, geom_wkb):
         """
-        Create feature and add it to the vector layer.
+        Create feature from the WKB geometry and add it to the vector layer.
         Return the extents of the geometry.
         """
         if not isinstance(vlayer, QgsVectorLayer):
@@ -791,11 +1674,11 @@ class DocumentGenerator(QObject):
         dp = vlayer.dataProvider()
 
         feat = QgsFeature()
-        g = QgsGeometry.fromWkt(geom_wkb)
+        g = QgsGeometry()
+        g.fromWkb(geom_wkb)
         feat.setGeometry(g)
 
         dp.addFeatures([feat])
-        self._feature_ids.append(feat.id())
         vlayer.updateExtents()
 
         return g.boundingBox()
@@ -809,7 +1692,7 @@ class DocumentGenerator(QObject):
         if output_mode == DocumentGenerator.Image:
             export_result = self._export_composition_as_image(print_layout, file_path)
 
-        elif output_mode == DocumentGenerator.PDF:
+        elif output_mode in (DocumentGenerator.PDF, DocumentGenerator.PDFAtlas):
             export_result = self._export_composition_as_pdf(print_layout, file_path)
 
         return export_result
@@ -840,50 +1723,141 @@ class DocumentGenerator(QObject):
         table, results = self._exec_query(data_source, fieldName, fieldValue)
 
         if len(results) > 0:
-            rec = results[0]
+            return self._file_name(results[0], data_fields, fileExtension)
 
-            ds_values = []
+        return ""
 
-            for dt in data_fields:
-                f_value = getattr(rec, dt, '')
+    def _file_name(self, rec, data_fields, fileExtension):
+        """
+        Build a file name based on the values of the specified data fields
+        in the record.
+        """
+        ds_values = []
 
-                # Get display value
-                display_value = \
-                    self._file_name_value_formatter.column_display_value(
-                        dt,
-                        f_value
-                    )
-                ds_values.append(display_value)
+        for dt in data_fields:
+            f_value = getattr(rec, dt, '')
 
-            return "_".join(ds_values) + "." + fileExtension
+            # Get display value
+            display_value = \
+                self._file_name_value_formatter.column_display_value(
+                    dt,
+                    f_value
+                )
+            ds_values.append(display_value)
 
-        return ""
+        return "_".join(ds_values) + "." + fileExtension
+
+    def clear_query_cache(self):
+        """
+        Discards the reflected tables and the statements built for the
+        sub-queries of the items.
+        """
+        self._metadata = MetaData(bind=STDMDb.instance().engine)
+        self._statements = {}
+        self._compiled_cache = {}
+
+    def _reflect_table(self, dataSourceName):
+        """
+        Reflects the table or view with the given name. Tables are only
+        reflected once per job.
+        """
+        if self._metadata is None:
+            self.clear_query_cache()
+
+        table = self._metadata.tables.get(dataSourceName, None)
+        if table is None:
+            table = Table(dataSourceName, self._metadata, autoload=True)
+
+        return table
+
+    def _query_statement(self, dataSourceName, queryField):
+        """
+        Builds the statement selecting the rows of the data source whose
+        value in the query field matches the 'qvalue' parameter. Statements
+        are built once per job for each data source and query field.
+        Returns a tuple containing the reflected table and statement.
+        """
+        key = (dataSourceName, queryField)
+        statement = self._statements.get(key, None)
+        if statement is not None:
+            return statement
+
+        dsTable = self._reflect_table(dataSourceName)
+        if not queryField:
+            # Rows are not filtered; this is currently limited to 100 rows
+            query = select([dsTable]).limit(100)
+        else:
+            query = select([dsTable]).where(
+                dsTable.c[queryField] == bindparam('qvalue')
+            )
+
+        statement = (dsTable, query)
+        self._statements[key] = statement
+
+        return statement
 
     def _exec_query(self, dataSourceName, queryField, queryValue):
         """
-        Reflects the data source then execute the query using the specified
-        query parameters.
+        Executes the statement of the data source and query field using the
+        query value as a bound parameter. The reflected table and compiled
+        statement are reused for subsequent records of the job.
         Returns a tuple containing the reflected table and results of the query.
         """
-        meta = MetaData(bind=STDMDb.instance().engine)
-        dsTable = Table(dataSourceName, meta, autoload=True)
+        dsTable, query = self._query_statement(dataSourceName, queryField)
         try:
-            if not queryField and not queryValue:
-                # Return all the rows; this is currently limited to 100 rows
-                results = self._dbSession.query(dsTable).limit(100).all()
-
+            conn = self._dbSession.connection().execution_options(
+                compiled_cache=self._compiled_cache
+            )
+            if not queryField:
+                results = conn.execute(query).fetchall()
             else:
-                if isinstance(queryValue, str):
-                    queryValue = "'{0}'".format(queryValue)
-                sql = "{0} = :qvalue".format(queryField)
-
-                results = self._dbSession.query(dsTable).filter(text(sql)).params(qvalue=queryValue).all()
+                results = conn.execute(query, qvalue=queryValue).fetchall()
 
             return dsTable, results
         except SQLAlchemyError as ex:
             self._dbSession.rollback()
             raise ex
 
+    def _query_records(self, dsTable, queryField, queryValues, session=None,
+                       columns=None):
+        """
+        Fetches the records whose value in the query field is in the list of
+        values, in a single query. Additional column expressions, such as
+        the WKB of spatial fields, are selected with the table columns.
+        Returns a dictionary of query values and corresponding records.
+        """
+        if session is None:
+            session = self._dbSession
+
+        column = dsTable.c[queryField]
+        try:
+            results = session.query(dsTable, *(columns or [])).filter(
+                column.in_(queryValues)
+            ).all()
+        except SQLAlchemyError as ex:
+            session.rollback()
+            raise ex
+
+        records = {}
+        for r in results:
+            records.setdefault(getattr(r, queryField), []).append(r)
+
+        return records
+
+    def _linked_query(self, dataSourceName, queryField, queryValue):
+        """
+        Query handler for items with linked tables. Records prefetched for
+        the batch are returned, else the database is queried.
+        Returns a tuple containing the reflected table and matching records.
+        """
+        if self._batch_records is not None:
+            results = self._batch_records.linked(dataSourceName, queryField,
+                                                 queryValue)
+            if results is not None:
+                return None, results
+
+        return self._exec_query(dataSourceName, queryField, queryValue)
+
     def _composer_output_path(self) -> str:
         """
         Returns the directory name of the composer output directory.
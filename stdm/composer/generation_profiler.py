@@ -0,0 +1,256 @@
+"""
+/***************************************************************************
+Name                 : GenerationProfiler
+Description          : Records the time spent, and queries executed, in
+                       each stage of document generation.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer as tm
+
+from sqlalchemy import event
+
+# Stages of document generation, in the order they are reported
+TEMPLATE = 'template'
+FETCH = 'fetch'
+FIELDS = 'fields'
+PHOTOS = 'photos'
+TABLES = 'tables'
+MAPS = 'maps'
+CHARTS = 'charts'
+QR_CODES = 'qr_codes'
+EXPORT = 'export'
+
+STAGES = (TEMPLATE, FETCH, FIELDS, PHOTOS, TABLES, MAPS, CHARTS, QR_CODES,
+          EXPORT)
+
+# Number of the slowest documents listed in the report
+NUM_SLOWEST = 5
+
+
+class StageStats:
+    """
+    Time spent and queries executed in a stage of document generation.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.queries = 0
+
+    def add(self, seconds, queries):
+        """
+        Adds a run of the stage.
+        :param seconds: Time spent in the stage.
+        :type seconds: float
+        :param queries: Number of queries executed in the stage.
+        :type queries: int
+        """
+        self.calls += 1
+        self.seconds += seconds
+        self.queries += queries
+
+
+class DocumentProfile:
+    """
+    Time spent and queries executed in each stage while generating the
+    documents of an entity record.
+    """
+
+    def __init__(self, record_id):
+        self.record_id = record_id
+        # Stage -> StageStats
+        self.stages = OrderedDict()
+
+    @property
+    def seconds(self):
+        """
+        :return: Time spent in all the stages.
+        :rtype: float
+        """
+        return sum(s.seconds for s in self.stages.values())
+
+    @property
+    def queries(self):
+        """
+        :return: Number of queries executed in all the stages.
+        :rtype: int
+        """
+        return sum(s.queries for s in self.stages.values())
+
+
+class GenerationProfiler:
+    """
+    Records the time spent, and number of queries executed, in each stage
+    of document generation, for each entity record and in total. Queries
+    are counted by listening to the statements executed by the engine, in
+    the thread running the stage, hence records fetched by background
+    workers are also accounted for.
+
+        profiler = GenerationProfiler()
+        profiler.attach(STDMDb.instance().engine)
+        doc_generator.set_profiler(profiler)
+        ...
+        profiler.detach()
+        LOGGER.debug(profiler.report())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._engine = None
+
+        # Stage -> StageStats, for all the records
+        self.stages = OrderedDict((s, StageStats()) for s in STAGES)
+
+        # Profiles of the records whose documents have been generated
+        self.documents = []
+
+        self._document = None
+
+    def attach(self, engine):
+        """
+        Starts counting the queries executed by the engine.
+        :param engine: Engine of the STDM database.
+        :type engine: Engine
+        """
+        if self._engine is not None:
+            return
+
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+        self._engine = engine
+
+    def detach(self):
+        """
+        Stops counting the queries executed by the engine.
+        """
+        if self._engine is None:
+            return
+
+        event.remove(self._engine, 'before_cursor_execute', self._on_execute)
+        self._engine = None
+
+    def _on_execute(self, conn, cursor, statement, parameters, context,
+                    executemany):
+        self._local.queries = self._thread_queries() + 1
+
+    def _thread_queries(self):
+        # Number of queries executed in the current thread
+        return getattr(self._local, 'queries', 0)
+
+    def begin_document(self, record_id):
+        """
+        Starts recording the stages of the documents of an entity record.
+        :param record_id: Id of the entity record.
+        :type record_id: object
+        """
+        self._document = DocumentProfile(record_id)
+
+    def end_document(self):
+        """
+        Completes the profile of the current entity record.
+        """
+        if self._document is None:
+            return
+
+        with self._lock:
+            self.documents.append(self._document)
+        self._document = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager recording the time spent and queries executed in
+        a stage. Stages run in the main thread are also added to the profile
+        of the current entity record.
+        :param name: Name of the stage.
+        :type name: str
+        """
+        start_queries = self._thread_queries()
+        start = tm()
+        try:
+            yield
+        finally:
+            seconds = tm() - start
+            queries = self._thread_queries() - start_queries
+
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats())
+                stats.add(seconds, queries)
+
+            document = self._document
+            if document is not None and \
+                    threading.current_thread() is threading.main_thread():
+                document.stages.setdefault(name, StageStats()).add(
+                    seconds,
+                    queries
+                )
+
+    def report(self):
+        """
+        :return: Summary of the time spent and queries executed in each
+        stage, and the slowest entity records.
+        :rtype: str
+        """
+        lines = [
+            'Documents generated for {0} record(s)'.format(
+                len(self.documents)
+            ),
+            '{0:<10}{1:>8}{2:>12}{3:>12}{4:>10}'.format(
+                'Stage', 'Calls', 'Total (s)', 'Mean (ms)', 'Queries'
+            )
+        ]
+
+        total_seconds = 0.0
+        total_queries = 0
+        for name, stats in self.stages.items():
+            if stats.calls == 0:
+                continue
+
+            total_seconds += stats.seconds
+            total_queries += stats.queries
+            lines.append('{0:<10}{1:>8}{2:>12.3f}{3:>12.1f}{4:>10}'.format(
+                name,
+                stats.calls,
+                stats.seconds,
+                stats.seconds * 1000 / stats.calls,
+                stats.queries
+            ))
+
+        lines.append('{0:<10}{1:>8}{2:>12.3f}{3:>12}{4:>10}'.format(
+            'total', '', total_seconds, '', total_queries
+        ))
+
+        if len(self.documents) > 0:
+            per_doc = total_seconds * 1000 / len(self.documents)
+            lines.append('Mean per record: {0:.1f} ms, {1:.1f} queries'.format(
+                per_doc,
+                total_queries / len(self.documents)
+            ))
+
+            slowest = sorted(self.documents, key=lambda d: d.seconds,
+                             reverse=True)[:NUM_SLOWEST]
+            lines.append('Slowest records:')
+            for doc in slowest:
+                lines.append('  {0}: {1:.1f} ms, {2} queries'.format(
+                    doc.record_id,
+                    doc.seconds * 1000,
+                    doc.queries
+                ))
+
+        return '\n'.join(lines)
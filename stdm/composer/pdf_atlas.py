@@ -0,0 +1,193 @@
+"""
+/***************************************************************************
+Name                 : PdfAtlasWriter
+Description          : Writes the pages of print layouts, composed for
+                       successive records, into multi-page PDF files.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import (
+    QFileInfo,
+    QMarginsF
+)
+from qgis.PyQt.QtGui import (
+    QPageLayout,
+    QPageSize,
+    QPainter,
+    QPdfWriter
+)
+from qgis.core import (
+    QgsLayoutExporter,
+    QgsUnitTypes
+)
+
+
+def part_file_path(file_path, part):
+    """
+    :param file_path: Path of the PDF file.
+    :type file_path: str
+    :param part: Number of the file, starting from 1, when the records are
+    split across several files.
+    :type part: int
+    :return: Path of the given part, with the part number appended to the
+    file name e.g. certificates_002.pdf
+    :rtype: str
+    """
+    file_info = QFileInfo(file_path)
+    suffix = file_info.suffix() or 'pdf'
+
+    return '{0}/{1}_{2:03d}.{3}'.format(
+        file_info.path(),
+        file_info.completeBaseName(),
+        part,
+        suffix
+    )
+
+
+class PdfAtlasWriter:
+    """
+    Renders the pages of a print layout into a multi-page PDF each time the
+    layout has been composed for a record, similar to an atlas. The same
+    exporter, PDF writer and painter are used for all the pages instead of
+    exporting a file per record. If records_per_file is specified, a new
+    file is started once the pages of that number of records have been
+    written.
+    """
+
+    def __init__(self, file_path, records_per_file=0):
+        """
+        :param file_path: Path of the PDF file.
+        :type file_path: str
+        :param records_per_file: Number of records whose pages are written
+        to a file before a new one is started. All the records are written
+        to one file if zero.
+        :type records_per_file: int
+        """
+        self.file_path = file_path
+        self.records_per_file = records_per_file
+        self._writer = None
+        self._painter = None
+        self._exporter = None
+        self._layout = None
+        self._num_records = 0
+        self._file_records = 0
+        self._files = []
+
+    @property
+    def files(self):
+        """
+        :return: Paths of the files which have been written.
+        :rtype: list
+        """
+        return list(self._files)
+
+    @property
+    def num_records(self):
+        """
+        :return: Number of records whose pages have been written.
+        :rtype: int
+        """
+        return self._num_records
+
+    def _next_file_path(self):
+        if self.records_per_file <= 0:
+            return self.file_path
+
+        return part_file_path(self.file_path, len(self._files) + 1)
+
+    def _page_layout(self, layout, page):
+        # Size of the PDF page matching the given layout page
+        page_item = layout.pageCollection().page(page)
+        page_size = layout.renderContext().measurementConverter().convert(
+            page_item.pageSize(),
+            QgsUnitTypes.LayoutMillimeters
+        )
+
+        return QPageLayout(
+            QPageSize(page_size.toQSizeF(), QPageSize.Millimeter),
+            QPageLayout.Portrait,
+            QMarginsF(0, 0, 0, 0)
+        )
+
+    def _open(self, layout):
+        file_path = self._next_file_path()
+
+        self._writer = QPdfWriter(file_path)
+        self._writer.setCreator('STDM')
+        self._writer.setResolution(int(layout.renderContext().dpi()))
+        self._writer.setPageLayout(self._page_layout(layout, 0))
+
+        self._painter = QPainter()
+        if not self._painter.begin(self._writer):
+            self._painter = None
+            self._writer = None
+
+            return False
+
+        self._files.append(file_path)
+        self._file_records = 0
+
+        return True
+
+    def add_layout(self, layout):
+        """
+        Writes the pages of the layout, which has been composed for a
+        record, to the PDF.
+        :param layout: Print layout.
+        :type layout: QgsPrintLayout
+        :return: Result of the export.
+        :rtype: QgsLayoutExporter.ExportResult
+        """
+        if self._painter is not None and self.records_per_file > 0 and \
+                self._file_records >= self.records_per_file:
+            self._close_file()
+
+        is_new_file = False
+        if self._painter is None:
+            if not self._open(layout):
+                return QgsLayoutExporter.FileError
+            is_new_file = True
+
+        if self._exporter is None or self._layout is not layout:
+            self._exporter = QgsLayoutExporter(layout)
+            self._layout = layout
+
+        for page in range(layout.pageCollection().pageCount()):
+            if not is_new_file or page > 0:
+                self._writer.setPageLayout(self._page_layout(layout, page))
+                if not self._writer.newPage():
+                    return QgsLayoutExporter.FileError
+
+            self._exporter.renderPage(self._painter, page)
+
+        self._num_records += 1
+        self._file_records += 1
+
+        return QgsLayoutExporter.Success
+
+    def _close_file(self):
+        if self._painter is not None:
+            self._painter.end()
+
+        self._painter = None
+        self._writer = None
+
+    def close(self):
+        """
+        Completes the PDF file being written.
+        """
+        self._close_file()
+        self._exporter = None
+        self._layout = None
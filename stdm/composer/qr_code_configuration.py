@@ -18,7 +18,6 @@ email                : stdm@unhabitat.org
  *                                                                         *
  ***************************************************************************/
 """
-import pyqrcode
 from qgis.PyQt.QtCore import (
     QTemporaryFile
 )
@@ -35,6 +34,9 @@ from stdm.composer.configuration_collection_base import (
     ItemConfigBase,
     ItemConfigValueHandler
 )
+from stdm.composer.qr_code_encoder import (
+    qr_code_svg
+)
 from stdm.utils.util import (
     is_ascii
 )
@@ -109,7 +111,9 @@ class QRCodeConfiguration(ItemConfigBase):
 
 def generate_qr_code(qr_content):
     """
-    Generates a QR code SVG item and saves it as a temporary file.
+    Generates a QR code SVG item and saves it as a temporary file. The SVG
+    document is reused if a QR code with the same content has recently been
+    generated.
     :param qr_content: Content used to generate a QR code.
     :type qr_content: str
     :return: Returns a QTemporaryFile object containing the SVG file with the
@@ -118,9 +122,7 @@ def generate_qr_code(qr_content):
     """
     tmpf = QTemporaryFile()
     if tmpf.open():
-        file_path = tmpf.fileName()
-        qr_code = pyqrcode.create(qr_content)
-        qr_code.svg(file_path, scale=6)
+        tmpf.write(qr_code_svg(qr_content))
         tmpf.close()
 
     return tmpf
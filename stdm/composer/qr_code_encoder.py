@@ -0,0 +1,254 @@
+"""
+/***************************************************************************
+Name                 : QR code encoder
+Description          : Builds QR codes using NumPy arrays for the masks and
+                       caches the rendered codes by content.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from io import BytesIO
+
+import numpy as np
+import pyqrcode
+from pyqrcode import (
+    builder,
+    tables
+)
+
+from stdm.utils.lru_cache import LRUCache
+
+# Size of a module of the QR code, in SVG units
+QR_CODE_SCALE = 6
+
+# Patterns looked for by penalty rule 3, 1011101 preceded or followed by
+# four light modules
+_FINDER_LIKE_PATTERNS = (
+    (0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1),
+    (1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0)
+)
+
+# Version -> (rows, columns) of the data modules, in placement order
+_data_positions = {}
+
+# (content, scale) -> SVG document
+_svg_cache = LRUCache(500)
+
+
+def _zigzag_positions(size):
+    # Rows and columns of all the modules in the order in which data bits
+    # are placed, upwards and downwards in pairs of columns from the right,
+    # skipping the vertical timing pattern.
+    rows, cols = [], []
+    up_rows = np.arange(size - 1, -1, -1)
+    down_rows = np.arange(size)
+
+    for i, column in enumerate(range(size - 1, 0, -2)):
+        if column <= 6:
+            column -= 1
+
+        pair_rows = up_rows if i % 2 == 0 else down_rows
+        rows.append(np.repeat(pair_rows, 2))
+        cols.append(np.tile([column, column - 1], size))
+
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _run_penalty(masks):
+    # Penalty rule 1 along the rows of each mask. A run of five or more
+    # modules of the same color scores 3 plus 1 for each module after the
+    # fifth i.e. (number of windows of five in the run) + 2.
+    same = masks[:, :, 1:] == masks[:, :, :-1]
+    windows = same[:, :, :-3] & same[:, :, 1:-2] & same[:, :, 2:-1] & \
+        same[:, :, 3:]
+
+    # Windows at the start of a run
+    starts = windows.copy()
+    starts[:, :, 1:] &= ~same[:, :, :-4]
+
+    return windows.sum(axis=(1, 2)) + 2 * starts.sum(axis=(1, 2))
+
+
+def _pattern_matches(masks):
+    # Number of occurrences of the rule 3 patterns along the rows of each
+    # mask
+    size = masks.shape[2]
+    num_matches = 0
+    for pattern in _FINDER_LIKE_PATTERNS:
+        end = size - len(pattern) + 1
+        if end <= 0:
+            continue
+
+        match = np.ones(masks.shape[:2] + (end,), dtype=bool)
+        for k, bit in enumerate(pattern):
+            match &= masks[:, :, k:k + end] == bit
+
+        num_matches = num_matches + match.sum(axis=(1, 2))
+
+    return num_matches
+
+
+class ArrayQRCodeBuilder(builder.QRCodeBuilder):
+    """
+    QR code builder which places the data bits and scores the masks using
+    NumPy array operations, instead of visiting each module of each of the
+    eight masks in Python. The code is identical to the one built by
+    pyqrcode.
+    """
+
+    def make_code(self):
+        builder.QRCodeBuilder.make_code(self)
+
+        # The output functions expect lists of rows
+        self.code = self.code.tolist()
+
+    def _data_positions(self, template):
+        # Rows and columns of the modules which are not used by the function
+        # patterns, in placement order. These only depend on the version.
+        positions = _data_positions.get(self.version, None)
+        if positions is not None:
+            return positions
+
+        size = len(template)
+        free = np.array(
+            [[cell == ' ' for cell in row] for row in template],
+            dtype=bool
+        )
+        # The format information is added to each mask before the data
+        format_area = np.zeros((size, size), dtype=np.uint8)
+        self.add_type_pattern(format_area, '1' * 15)
+        free &= format_area == 0
+
+        rows, cols = _zigzag_positions(size)
+        is_free = free[rows, cols]
+        positions = (rows[is_free], cols[is_free])
+        _data_positions[self.version] = positions
+
+        return positions
+
+    def make_masks(self, template):
+        """
+        Generates the eight masks of the template, as a single array of
+        shape (8, size, size).
+        """
+        rows, cols = self._data_positions(template)
+
+        base = np.array(
+            [[0 if cell == ' ' else cell for cell in row] for row in template],
+            dtype=np.uint8
+        )
+
+        # Data bits, followed by remainder bits set to 0
+        bits = np.frombuffer(
+            self.buffer.getvalue().encode('ascii'),
+            dtype=np.uint8
+        ) - ord('0')
+        data = np.zeros(len(rows), dtype=np.uint8)
+        num_bits = min(len(bits), len(data))
+        data[:num_bits] = bits[:num_bits]
+
+        nmasks = len(tables.mask_patterns)
+        masks = np.repeat(base[np.newaxis], nmasks, axis=0)
+        for n, pattern in enumerate(tables.mask_patterns):
+            self.add_type_pattern(masks[n], tables.type_bits[self.error][n])
+            masks[n, rows, cols] = data ^ pattern(rows, cols)
+
+        return masks
+
+    def choose_best_mask(self):
+        """
+        Scores the masks using the same penalty rules as pyqrcode and returns
+        the index of the mask with the lowest total.
+        """
+        masks = self.masks
+        columns = masks.transpose(0, 2, 1)
+        size = masks.shape[1]
+
+        # Rule 1, runs of the same color in rows and columns
+        rule1 = _run_penalty(masks) + _run_penalty(columns)
+
+        # Rule 2, 2x2 blocks of the same color
+        top_left = masks[:, :-1, :-1]
+        blocks = (top_left == masks[:, 1:, :-1]) & \
+            (top_left == masks[:, :-1, 1:]) & \
+            (top_left == masks[:, 1:, 1:])
+        rule2 = 3 * blocks.sum(axis=(1, 2))
+
+        # Rule 3, patterns similar to the finder patterns
+        rule3 = 40 * (_pattern_matches(masks) + _pattern_matches(columns))
+
+        # Rule 4, deviation from an equal number of dark and light modules
+        nblack = masks.sum(axis=(1, 2), dtype=np.int64)
+        total_pixels = size ** 2
+
+        self.scores = []
+        for n in range(len(masks)):
+            percent = (int(nblack[n]) / total_pixels * 100) - 50
+            rule4 = int((abs(int(percent)) / 5) * 10)
+            self.scores.append(
+                [int(rule1[n]), int(rule2[n]), int(rule3[n]), rule4]
+            )
+
+        totals = [sum(s) for s in self.scores]
+
+        return totals.index(min(totals))
+
+
+class QRCode(pyqrcode.QRCode):
+    """
+    pyqrcode.QRCode built using ArrayQRCodeBuilder.
+    """
+    builder_class = ArrayQRCodeBuilder
+
+
+def create(content, error='H', version=None, mode=None, encoding=None):
+    """
+    Creates a QR code in the same way as pyqrcode.create but with the masks
+    generated and scored using NumPy.
+    :param content: Content to be encoded.
+    :type content: str
+    :return: QR code.
+    :rtype: QRCode
+    """
+    return QRCode(content, error, version, mode, encoding)
+
+
+def qr_code_svg(content, scale=QR_CODE_SCALE):
+    """
+    Renders the QR code of the given content as an SVG document. Documents
+    are cached by content so that codes repeated across records, e.g. of
+    the same party or spatial unit, are only encoded once.
+    :param content: Content to be encoded.
+    :type content: str
+    :param scale: Size of a module of the QR code.
+    :type scale: float
+    :return: SVG document.
+    :rtype: bytes
+    """
+    key = (content, scale)
+    svg = _svg_cache.get(key, None)
+    if svg is None:
+        buffer = BytesIO()
+        create(content).svg(buffer, scale=scale)
+        svg = buffer.getvalue()
+        _svg_cache[key] = svg
+
+    return svg
+
+
+def clear_cache():
+    """
+    Discards the cached QR codes.
+    """
+    _svg_cache.clear()
@@ -19,12 +19,14 @@ email                : stdm@unhabitat.org
  ***************************************************************************/
 """
 
+from decimal import Decimal
 from typing import Optional
 
 from qgis.PyQt.QtXml import (
     QDomElement
 )
 from qgis.core import (
+    QgsFeature,
     QgsProject,
     QgsVectorLayer,
     QgsLayoutFrame
@@ -53,6 +55,24 @@ class TableConfiguration(PhotoConfiguration):
 
         return None
 
+    def memory_layer(self) -> Optional[QgsVectorLayer]:
+        """
+        :return: Memory layer, without geometries, having the same fields as
+        the vector layer of the linked table. It is used to show rows of the
+        linked table which have already been fetched. None if the vector
+        layer has not been loaded.
+        :rtype: QgsVectorLayer
+        """
+        vl = self.vector_layer()
+        if vl is None:
+            return None
+
+        mem_layer = QgsVectorLayer('None', self.linked_table(), 'memory')
+        mem_layer.dataProvider().addAttributes(vl.fields().toList())
+        mem_layer.updateFields()
+
+        return mem_layer
+
     @staticmethod
     def create(dom_element: QDomElement):
         """
@@ -104,6 +124,61 @@ class TableItemValueHandler(ItemConfigValueHandler):
     to fetch the corresponding rows from the linked table in the database.
     """
 
+    def _table_item(self):
+        table_item = self.composer_item()
+        if isinstance(table_item, QgsLayoutFrame):
+            table_item = table_item.multiFrame()
+
+        return table_item
+
+    def set_memory_layer(self, mem_layer):
+        """
+        Shows the rows of the memory layer in the table item instead of
+        filtering the vector layer of the linked table for each record.
+        :param mem_layer: Memory layer created by the configuration item.
+        :type mem_layer: QgsVectorLayer
+        """
+        table_item = self._table_item()
+        if table_item is None:
+            return
+
+        # Capture saved column settings before resetting the vector layer
+        display_attrs_cols = [col.clone() for col in table_item.columns()]
+
+        table_item.setVectorLayer(mem_layer)
+        table_item.setColumns(display_attrs_cols)
+        table_item.setFilterFeatures(False)
+
+    def set_linked_records(self, mem_layer, records):
+        """
+        Replaces the rows of the memory layer with the linked table records
+        of a data source record, which have already been fetched.
+        :param mem_layer: Memory layer shown by the table item.
+        :type mem_layer: QgsVectorLayer
+        :param records: Records of the linked table.
+        :type records: list
+        """
+        table_item = self._table_item()
+        if table_item is None:
+            return
+
+        dp = mem_layer.dataProvider()
+        dp.truncate()
+
+        fields = mem_layer.fields()
+        features = []
+        for r in records:
+            feat = QgsFeature(fields)
+            for i, field in enumerate(fields):
+                value = getattr(r, field.name(), None)
+                if isinstance(value, Decimal):
+                    value = float(value)
+                feat.setAttribute(i, value)
+            features.append(feat)
+
+        dp.addFeatures(features)
+        table_item.refreshAttributes()
+
     def set_data_source_record(self, record):
 
         table_item = self.composer_item()
@@ -0,0 +1,340 @@
+"""
+/***************************************************************************
+Name                 : CatalogSnapshot
+Description          : In-memory copy of the tables, views, columns,
+                       geometry columns and foreign key references in a
+                       database schema.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import text
+
+from stdm.data.database import STDMDb
+
+LOGGER = logging.getLogger('stdm')
+
+# Number of seconds after which a snapshot is reloaded
+SNAPSHOT_TTL = 600
+
+# Statements which change the structure of the database
+_DDL_RX = re.compile(
+    r'^\s*(CREATE|DROP|ALTER|COMMENT|TRUNCATE)\s',
+    re.IGNORECASE
+)
+
+_TABLES_SQL = "SELECT table_name, table_type FROM information_schema.tables " \
+              "WHERE table_schema = :tschema ORDER BY table_name ASC"
+
+_COLUMNS_SQL = "SELECT table_name, column_name, data_type, udt_name " \
+               "FROM information_schema.columns " \
+               "WHERE table_schema = :tschema " \
+               "ORDER BY table_name, ordinal_position"
+
+_GEOMETRY_COLUMNS_SQL = "SELECT f_table_name, f_geometry_column, type, srid " \
+                        "FROM geometry_columns " \
+                        "WHERE f_table_schema = :tschema " \
+                        "ORDER BY f_table_name, f_geometry_column ASC"
+
+_FOREIGN_KEYS_SQL = "SELECT tc.constraint_name, tc.table_name, " \
+                    "kcu.column_name, ccu.table_name AS foreign_table_name, " \
+                    "ccu.column_name AS foreign_column_name " \
+                    "FROM information_schema.table_constraints AS tc " \
+                    "JOIN information_schema.key_column_usage AS kcu " \
+                    "ON tc.constraint_name = kcu.constraint_name " \
+                    "AND tc.table_schema = kcu.table_schema " \
+                    "JOIN information_schema.constraint_column_usage AS ccu " \
+                    "ON ccu.constraint_name = tc.constraint_name " \
+                    "AND ccu.constraint_schema = tc.constraint_schema " \
+                    "WHERE tc.constraint_type = 'FOREIGN KEY' " \
+                    "AND tc.table_schema = :tschema"
+
+
+class CatalogSnapshot:
+    """
+    Holds the tables, views, columns, geometry columns and foreign key
+    references of a schema, which are loaded in four queries, so that
+    introspection functions such as those in stdm.data.pg_utils do not have
+    to query the information schema for every table or column.
+    Use catalog_snapshot() to get the shared snapshot of the current
+    database connection.
+    """
+
+    def __init__(self, schema='public'):
+        """
+        :param schema: Name of the database schema.
+        :type schema: str
+        """
+        self.schema = schema
+        self.tables = []
+        self.views = []
+        # Table or view name -> table type
+        self._table_types = {}
+        # Table name -> {column name: (data_type, udt_name)}
+        self._columns = {}
+        # Table name -> {geometry column name: (type, srid)}
+        self._geometry_columns = {}
+        # (table, column, foreign table, foreign column, constraint name)
+        self._foreign_keys = []
+        self.loaded_at = None
+
+    def load(self, connection):
+        """
+        Reads the catalog of the schema using the given connection.
+        :param connection: Database connection.
+        :type connection: Connection
+        """
+        self.tables = []
+        self.views = []
+        self._table_types = {}
+        self._columns = {}
+        self._geometry_columns = {}
+        self._foreign_keys = []
+
+        result = connection.execute(text(_TABLES_SQL), tschema=self.schema)
+        for r in result:
+            self._table_types[r['table_name']] = r['table_type']
+            if r['table_type'] == 'VIEW':
+                self.views.append(r['table_name'])
+            elif r['table_type'] == 'BASE TABLE':
+                self.tables.append(r['table_name'])
+
+        result = connection.execute(text(_COLUMNS_SQL), tschema=self.schema)
+        for r in result:
+            cols = self._columns.setdefault(r['table_name'], OrderedDict())
+            cols[r['column_name']] = (r['data_type'], r['udt_name'])
+
+        result = connection.execute(
+            text(_FOREIGN_KEYS_SQL),
+            tschema=self.schema
+        )
+        self._foreign_keys = [
+            (r['table_name'], r['column_name'], r['foreign_table_name'],
+             r['foreign_column_name'], r['constraint_name'])
+            for r in result
+        ]
+
+        # geometry_columns only exists if PostGIS has been installed
+        try:
+            result = connection.execute(
+                text(_GEOMETRY_COLUMNS_SQL),
+                tschema=self.schema
+            )
+            for r in result:
+                geom_cols = self._geometry_columns.setdefault(
+                    r['f_table_name'],
+                    OrderedDict()
+                )
+                geom_cols[r['f_geometry_column']] = (r['type'], r['srid'])
+        except SQLAlchemyError as db_error:
+            LOGGER.debug('Geometry columns could not be read: %s',
+                         str(db_error))
+
+        self.loaded_at = time.monotonic()
+
+    def is_expired(self, ttl=SNAPSHOT_TTL):
+        """
+        :param ttl: Number of seconds for which the snapshot is valid. None
+        if it does not expire.
+        :type ttl: int
+        :return: True if the snapshot has not been loaded or is older than
+        the given number of seconds.
+        :rtype: bool
+        """
+        if self.loaded_at is None:
+            return True
+
+        if ttl is None:
+            return False
+
+        return time.monotonic() - self.loaded_at > ttl
+
+    def table_exists(self, table_name, include_views=True):
+        """
+        :return: True if the table, or view if include_views is True,
+        exists in the schema.
+        :rtype: bool
+        """
+        table_type = self._table_types.get(table_name, None)
+        if table_type == 'BASE TABLE':
+            return True
+
+        return include_views and table_type == 'VIEW'
+
+    def column_names(self, table_name, creation_order=False):
+        """
+        :param table_name: Name of the table or view.
+        :type table_name: str
+        :param creation_order: True to return the names in the order in
+        which the columns were created, else they are sorted by name.
+        :type creation_order: bool
+        :return: Names of the columns in the table or view.
+        :rtype: list
+        """
+        names = list(self._columns.get(table_name, {}).keys())
+        if not creation_order:
+            names.sort()
+
+        return names
+
+    def column_types(self, table_name):
+        """
+        :return: Collection of column names and corresponding data types. For
+        views, the name of user-defined types such as 'geometry' is returned
+        in place of 'USER-DEFINED'.
+        :rtype: dict
+        """
+        is_view = self._table_types.get(table_name, None) == 'VIEW'
+        col_types = OrderedDict()
+        for col, (data_type, udt_name) in \
+                self._columns.get(table_name, {}).items():
+            if is_view and data_type == 'USER-DEFINED':
+                data_type = udt_name
+            col_types[col] = data_type
+
+        return col_types
+
+    def column_type(self, table_name, column_name):
+        """
+        :return: Data type of the column or an empty string if the column
+        does not exist.
+        :rtype: str
+        """
+        return self.column_types(table_name).get(
+            column_name.strip('"'),
+            ''
+        )
+
+    def geometry_columns(self, table_name):
+        """
+        :return: Names of the geometry columns in the table or view, sorted
+        by name.
+        :rtype: list
+        """
+        return list(self._geometry_columns.get(table_name, {}).keys())
+
+    def geometry_type(self, table_name, column_name):
+        """
+        :return: Tuple of geometry type and SRID of the geometry column.
+        The tuple is ('', -1) if the column does not exist.
+        :rtype: tuple
+        """
+        return self._geometry_columns.get(table_name, {}).get(
+            column_name,
+            ('', -1)
+        )
+
+    def spatial_tables(self):
+        """
+        :return: Names of the tables and views with geometry columns.
+        :rtype: list
+        """
+        return list(self._geometry_columns.keys())
+
+    def foreign_keys(self, table_name, search_parent=True):
+        """
+        :param table_name: Name of the table.
+        :type table_name: str
+        :param search_parent: True if table_name is the child and the
+        references to parent tables are to be returned, else references from
+        child tables are returned.
+        :type search_parent: bool
+        :return: A list of tuples containing the local column name, related
+        table name, corresponding related column name and constraint name.
+        :rtype: list
+        """
+        if search_parent:
+            return [(col, fk_table, fk_col, name)
+                    for table, col, fk_table, fk_col, name
+                    in self._foreign_keys if table == table_name]
+
+        return [(col, table, fk_col, name)
+                for table, col, fk_table, fk_col, name
+                in self._foreign_keys if fk_table == table_name]
+
+
+def is_ddl(statement):
+    """
+    :param statement: SQL statement.
+    :type statement: str
+    :return: True if the statement changes the structure of the database.
+    :rtype: bool
+    """
+    return _DDL_RX.match(statement) is not None
+
+
+# Schema name -> snapshot of the current database connection
+_snapshots = {}
+_snapshot_engine = None
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    # Discard the snapshots when the schema has been changed
+    if is_ddl(statement):
+        invalidate_catalog_snapshot()
+
+
+def catalog_snapshot(schema='public', ttl=SNAPSHOT_TTL):
+    """
+    Returns the catalog snapshot of the given schema in the current database
+    connection. The snapshot is loaded on first use and reloaded once it
+    expires or after DDL statements are executed using the STDM engine,
+    such as those issued by the configuration updater.
+    :param schema: Name of the database schema.
+    :type schema: str
+    :param ttl: Number of seconds after which the snapshot is reloaded.
+    None if it should not expire.
+    :type ttl: int
+    :return: Catalog snapshot or None if there is no database connection.
+    :rtype: CatalogSnapshot
+    """
+    global _snapshot_engine
+
+    try:
+        engine = STDMDb.instance().engine
+    except AttributeError:
+        return None
+
+    if engine is None:
+        return None
+
+    if engine is not _snapshot_engine:
+        # Connected to a different database
+        _snapshots.clear()
+        if not event.contains(engine, 'after_cursor_execute', _on_execute):
+            event.listen(engine, 'after_cursor_execute', _on_execute)
+        _snapshot_engine = engine
+
+    snapshot = _snapshots.get(schema, None)
+    if snapshot is None or snapshot.is_expired(ttl):
+        snapshot = CatalogSnapshot(schema)
+        with engine.connect() as conn:
+            snapshot.load(conn)
+        _snapshots[schema] = snapshot
+
+    return snapshot
+
+
+def invalidate_catalog_snapshot():
+    """
+    Discards the catalog snapshots so that they are reloaded on next use.
+    """
+    _snapshots.clear()
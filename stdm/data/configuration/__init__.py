@@ -16,6 +16,9 @@ from stdm.data.database import (
     STDMDb
 )
 
+# Mapped classes keyed by entity name and the entity_model flags
+_entity_model_registry = {}
+
 
 def _bind_metadata(metadata):
     # Ensures there is a connectable set in the metadata
@@ -44,18 +47,43 @@ def _gen_relationship(base, direction, return_fn,
                                  attrname, local_cls, referred_cls, **kw)
 
 
+def clear_entity_model_cache(entity_name=None):
+    """
+    Removes mapped classes from the entity model registry so that they are
+    reflected afresh in the next call to entity_model. This should be called
+    whenever the configuration or the database schema changes.
+    :param entity_name: Name of the entity whose mapped classes are to be
+    removed. If None, then the entire registry is cleared.
+    :type entity_name: str
+    """
+    if entity_name is None:
+        _entity_model_registry.clear()
+
+        return
+
+    for key in list(_entity_model_registry.keys()):
+        if key[0] == entity_name:
+            del _entity_model_registry[key]
+
+
 def entity_model(entity, entity_only=False, with_supporting_document=False):
     """
     Creates a mapped class and corresponding relationships from an entity
     object. Entities of 'EntitySupportingDocument' type are not supported
     since they are already mapped from their parent classes, a TypeError will
     be raised.
+    Mapped classes are cached in a registry and the same classes are
+    returned in subsequent calls until the registry is cleared using
+    clear_entity_model_cache.
     :param entity: Entity
     :type entity: Entity
     :param entity_only: True to only reflect the table corresponding to the
     specified entity. Remote entities and corresponding relationships will
     not be reflected.
     :type entity_only: bool
+    :param with_supporting_document: True to also return the supporting
+    document model of the entity.
+    :type with_supporting_document: bool
     :return: An SQLAlchemy model reflected from the table in the database
     corresponding to the specified entity object.
     """
@@ -64,6 +92,27 @@ def entity_model(entity, entity_only=False, with_supporting_document=False):
         raise TypeError('<EntitySupportingDocument> type not supported. '
                         'Please use the parent entity.')
 
+    key = (entity.name, entity_only, with_supporting_document)
+    if key in _entity_model_registry:
+        return _entity_model_registry[key]
+
+    model = _reflect_entity_model(
+        entity,
+        entity_only,
+        with_supporting_document
+    )
+
+    # Do not cache tables that have not yet been created
+    mapped_cls = model[0] if isinstance(model, tuple) else model
+    if mapped_cls is not None:
+        _entity_model_registry[key] = model
+
+    return model
+
+
+def _reflect_entity_model(entity, entity_only, with_supporting_document):
+    # Reflects the tables and maps the classes for entity_model
+
     rf_entities = [entity.name]
 
     if not entity_only:
@@ -26,7 +26,11 @@ from qgis.PyQt.QtCore import (
 from qgis.core import QgsApplication
 from sqlalchemy.exc import SQLAlchemyError
 
-from stdm.data.configuration import profile_foreign_keys
+from stdm.data.catalog import invalidate_catalog_snapshot
+from stdm.data.configuration import (
+    clear_entity_model_cache,
+    profile_foreign_keys
+)
 from stdm.data.configuration.db_items import DbItem
 from stdm.data.configuration.exception import ConfigurationException
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
@@ -34,6 +38,7 @@ from stdm.data.database import (
     metadata,
     STDMDb
 )
+from stdm.data.table_model_cache import entity_table_models
 
 LOGGER = logging.getLogger('stdm')
 
@@ -100,6 +105,11 @@ class ConfigurationSchemaUpdater(QObject):
             # Delete removed profile objects
             self._clean_removed_profiles()
 
+            # Mapped classes and catalog no longer reflect the updated schema
+            clear_entity_model_cache()
+            invalidate_catalog_snapshot()
+            entity_table_models.clear()
+
             self.update_completed.emit(True)
 
         except SQLAlchemyError as sae:
@@ -109,6 +119,11 @@ class ConfigurationSchemaUpdater(QObject):
 
             LOGGER.debug(msg)
 
+            # Some of the tables might have been updated
+            clear_entity_model_cache()
+            invalidate_catalog_snapshot()
+            entity_table_models.clear()
+
             self.update_completed.emit(False)
 
     def _clean_removed_profiles(self):
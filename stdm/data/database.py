@@ -19,6 +19,7 @@ email                : gkahiu@gmail.com
  ***************************************************************************/
 """
 import logging
+from contextlib import contextmanager
 from collections import (
     defaultdict,
     OrderedDict
@@ -47,10 +48,14 @@ from sqlalchemy.orm import (
     backref,
     mapper as _mapper
 )
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import (
+    scoped_session,
+    sessionmaker
+)
 from sqlalchemy.sql.expression import text
 
 from stdm.data import globals
+from stdm.data.table_model_cache import entity_table_models
 
 metadata = MetaData()
 
@@ -58,6 +63,13 @@ metadata = MetaData()
 table_registry = defaultdict(set)
 LOGGER = logging.getLogger('stdm')
 
+# Default settings of the connection pool
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 10
+POOL_PRE_PING = True
+# Number of seconds after which pooled connections are replaced
+POOL_RECYCLE = 1800
+
 
 def mapper(cls, table=None, *args, **kwargs):
     tb_mapper = _mapper(cls, table, *args, **kwargs)
@@ -105,6 +117,44 @@ class NoPostGISError(Exception):
     pass
 
 
+def engine_pool_options():
+    """
+    Reads the connection pool settings from the registry. The defaults are
+    used for settings which have not been specified.
+    :return: Keyword arguments for configuring the pool of the database
+    engine.
+    :rtype: dict
+    """
+    # Avoid circular import through the settings package
+    from stdm.settings.registryconfig import (
+        RegistryConfig,
+        DB_POOL_SIZE,
+        DB_POOL_MAX_OVERFLOW,
+        DB_POOL_PRE_PING,
+        DB_POOL_RECYCLE
+    )
+
+    pool_info = RegistryConfig().read([
+        DB_POOL_SIZE,
+        DB_POOL_MAX_OVERFLOW,
+        DB_POOL_PRE_PING,
+        DB_POOL_RECYCLE
+    ])
+
+    pre_ping = pool_info.get(DB_POOL_PRE_PING, POOL_PRE_PING)
+    if isinstance(pre_ping, str):
+        pre_ping = pre_ping.lower() in ('true', '1')
+
+    return {
+        'pool_size': int(pool_info.get(DB_POOL_SIZE, POOL_SIZE)),
+        'max_overflow': int(
+            pool_info.get(DB_POOL_MAX_OVERFLOW, POOL_MAX_OVERFLOW)
+        ),
+        'pool_pre_ping': bool(pre_ping),
+        'pool_recycle': int(pool_info.get(DB_POOL_RECYCLE, POOL_RECYCLE))
+    }
+
+
 @Singleton
 class STDMDb:
     """
@@ -113,19 +163,28 @@ class STDMDb:
     """
     engine = None
     session = None
+    worker_session = None
 
     def __init__(self):
         # Initialize database engine
         if globals.APP_DBCONN is None:
             return
 
-        self.engine = create_engine(globals.APP_DBCONN.toAlchemyConnection(), echo=False)
+        self.engine = create_engine(
+            globals.APP_DBCONN.toAlchemyConnection(),
+            echo=False,
+            **engine_pool_options()
+        )
 
         # Check for PostGIS extension
         self.postgis_state = self._check_spatial_extension()
 
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+
+        # Thread-local sessions for use by background workers
+        self.worker_session = scoped_session(Session)
+
         self.createMetadata()
 
     def createMetadata(self):
@@ -134,6 +193,65 @@ class STDMDb:
         """
         Base.metadata.create_all(self.engine)
 
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Context manager for executing several statements on one connection
+        and in one transaction. The transaction is committed when the block
+        exits or rolled back if an exception is raised.
+
+            with STDMDb.instance().unit_of_work() as conn:
+                conn.execute(sql1)
+                conn.execute(sql2)
+
+        :return: Database connection.
+        :rtype: Connection
+        """
+        conn = self.engine.connect()
+        trans = conn.begin()
+        try:
+            yield conn
+            trans.commit()
+        except Exception:
+            trans.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def session_scope(self):
+        """
+        Context manager which provides a short-lived session for the current
+        thread, for use by background workers in place of the session shared
+        by the UI components. Changes are committed when the block exits or
+        rolled back if an exception is raised, after which the session is
+        discarded.
+        :return: Session for the current thread.
+        :rtype: Session
+        """
+        session = self.worker_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.worker_session.remove()
+
+    def dispose(self):
+        """
+        Closes the shared session and the pooled connections.
+        """
+        if self.session is not None:
+            self.session.close()
+
+        if self.worker_session is not None:
+            self.worker_session.remove()
+
+        if self.engine is not None:
+            self.engine.dispose()
+
     def _check_spatial_extension(self):
         """Check if the PostGIS exists and if so, check if the extension
         has been installed in the specified database and raise an error if
@@ -223,10 +341,28 @@ class Model:
     """
     attrTranslations = OrderedDict()
 
+    @staticmethod
+    def _records_changing(session, objects):
+        """
+        Discards the cached table models of the given objects and notifies
+        other sessions of the change, which is sent when the transaction is
+        committed.
+        """
+        table_names = set()
+        for obj in objects:
+            table = getattr(obj, '__table__', None)
+            if table is not None:
+                table_names.add(table.name)
+
+        for name in table_names:
+            entity_table_models.invalidate(name)
+            entity_table_models.notify(session, name)
+
     def save(self):
         db = STDMDb.instance()
         db.session.add(self)
         try:
+            self._records_changing(db.session, [self])
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
             db.session.rollback()
@@ -240,6 +376,7 @@ class Model:
         db = STDMDb.instance()
         db.session.add_all(objects or [])
         try:
+            self._records_changing(db.session, objects or [])
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
             db.session.rollback()
@@ -249,6 +386,7 @@ class Model:
     def update(self):
         db = STDMDb.instance()
         try:
+            self._records_changing(db.session, [self])
             db.session.commit()
         except exc.SQLAlchemyError as db_error:
             db.session.rollback()
@@ -261,6 +399,7 @@ class Model:
         db = STDMDb.instance()
         try:
             db.session.delete(self)
+            self._records_changing(db.session, [self])
             db.session.commit()
 
             return True
@@ -0,0 +1,434 @@
+"""
+/***************************************************************************
+Name                 : EntityTableModel
+Description          : Table model which pages the records of an entity
+                       from the database as they are required by the view.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from qgis.PyQt.QtCore import (
+    Qt,
+    QModelIndex
+)
+from sqlalchemy import (
+    and_,
+    cast,
+    or_,
+    String
+)
+
+from stdm.data.configuration import entity_model
+from stdm.data.qtmodels import BaseSTDMTableModel
+
+# Number of records fetched from the database at a time
+PAGE_SIZE = 200
+
+# Number of matching records beyond which filtered records are not counted
+COUNT_LIMIT = 10000
+
+# Placeholder for display values which have not been formatted
+_NOT_FORMATTED = object()
+
+
+def _like_pattern(value):
+    # Case-insensitive 'contains' pattern with wildcards escaped
+    value = str(value).replace('\\', '\\\\')
+    value = value.replace('%', '\\%').replace('_', '\\_')
+
+    return '%{0}%'.format(value)
+
+
+class EntityTableModel(BaseSTDMTableModel):
+    """
+    Table model for browsing the records of an entity. Rather than loading
+    all the records upfront, they are fetched one page at a time as the view
+    is scrolled (through canFetchMore/fetchMore) using keyset pagination on
+    the id column. Sorting, the quick filter and the advanced search filters
+    are applied in the query while cell values are only formatted when they
+    are first displayed.
+    Rows can still be inserted, updated and removed in the same way as
+    BaseSTDMTableModel.
+    """
+
+    def __init__(self, entity, model, headers, attribute_names,
+                 cell_formatters=None, parent=None, criteria=None,
+                 sort_order=None, max_rows=None, page_size=PAGE_SIZE):
+        """
+        :param entity: Entity whose records are to be browsed.
+        :type entity: Entity
+        :param model: Mapped class of the entity.
+        :type model: object
+        :param headers: Column headers.
+        :type headers: list
+        :param attribute_names: Names of the model attributes corresponding
+        to each column.
+        :type attribute_names: list
+        :param cell_formatters: Collection of attribute names and
+        corresponding objects for formatting the display values.
+        :type cell_formatters: dict
+        :param criteria: SQLAlchemy expressions which restrict the records
+        that can be browsed, such as those of a parent record.
+        :type criteria: list
+        :param sort_order: Default ORDER BY clause. Records are ordered by
+        id if not specified.
+        :type sort_order: TextClause
+        :param max_rows: Maximum number of records to fetch. All records are
+        available if None.
+        :type max_rows: int
+        :param page_size: Number of records fetched at a time.
+        :type page_size: int
+        """
+        BaseSTDMTableModel.__init__(
+            self,
+            [],
+            headers,
+            parent,
+            attribute_names=attribute_names,
+            raw_values=[],
+            row_ids=[]
+        )
+        self._entity = entity
+        self._model = model
+        self._cell_formatters = cell_formatters or {}
+        self._criteria = list(criteria or [])
+        self._default_sort = sort_order
+        if self._default_sort is not None and not str(self._default_sort):
+            self._default_sort = None
+        self._max_rows = max_rows
+        self._page_size = page_size
+
+        # Attribute name -> entity column
+        self._attr_columns = {}
+        for c in entity.columns.values():
+            attr = getattr(c, 'model_attribute_name', c.name)
+            self._attr_columns[attr] = c
+
+        self._sort_attr = None
+        self._sort_desc = False
+        self._quick_filter = None
+        self.filter_params = {}
+
+        self._last_id = None
+        self._offset = 0
+        self._exhausted = False
+        self._total = None
+        self._count_capped = False
+
+    @property
+    def entity(self):
+        """
+        :return: Entity whose records are being browsed.
+        :rtype: Entity
+        """
+        return self._entity
+
+    @property
+    def attribute_names(self):
+        """
+        :return: Names of the model attributes corresponding to each column.
+        :rtype: list
+        """
+        return self._attribute_names
+
+    @property
+    def max_rows(self):
+        """
+        :return: Maximum number of records to fetch or None if all records
+        are available.
+        :rtype: int
+        """
+        return self._max_rows
+
+    def is_default_view(self):
+        """
+        :return: True if the records have neither been restricted nor
+        sorted by a column other than the default.
+        :rtype: bool
+        """
+        return len(self._criteria) == 0 and self._quick_filter is None \
+            and not self.filter_params and self._sort_attr is None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            row, col = index.row(), index.column()
+            if 0 <= row < len(self._initData) and \
+                    0 <= col < self.columnCount():
+                display_row = self._initData[row]
+                if display_row[col] is _NOT_FORMATTED:
+                    display_row[col] = self._format(
+                        col,
+                        self._raw_values[row][col]
+                    )
+
+        return BaseSTDMTableModel.data(self, index, role)
+
+    def _format(self, col, value):
+        # Applies the display formatter of the column, if any
+        if value is None:
+            return None
+
+        formatter = self._cell_formatters.get(
+            self._attribute_names[col],
+            None
+        )
+        if formatter is None:
+            return value
+
+        return formatter.format_column_value(value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        records = self._fetch_page()
+        if len(records) == 0:
+            return
+
+        position = len(self._initData)
+        self.beginInsertRows(
+            QModelIndex(),
+            position,
+            position + len(records) - 1
+        )
+
+        num_cols = self.columnCount()
+        for r in records:
+            self._row_ids.append(r.id)
+            self._raw_values.append(
+                [getattr(r, attr, None) for attr in self._attribute_names]
+            )
+            self._initData.append([_NOT_FORMATTED] * num_cols)
+
+        self.endInsertRows()
+
+    def _fetch_page(self):
+        # Fetches the next page of records
+        limit = self._page_size
+        if self._max_rows is not None:
+            limit = min(limit, self._max_rows - self._offset)
+            if limit <= 0:
+                self._exhausted = True
+
+                return []
+
+        id_col = self._model.id
+        query = self._query()
+        order_by = self._order_by()
+
+        if order_by is None:
+            # Keyset pagination on the id
+            if self._last_id is not None:
+                query = query.filter(id_col > self._last_id)
+            query = query.order_by(id_col)
+        else:
+            query = query.order_by(order_by, id_col).offset(self._offset)
+
+        records = query.limit(limit).all()
+
+        self._offset += len(records)
+        if len(records) < limit:
+            self._exhausted = True
+        if len(records) > 0:
+            self._last_id = records[-1].id
+
+        # Exclude records added to the model since the last page
+        loaded_ids = set(self._row_ids)
+
+        return [r for r in records if r.id not in loaded_ids]
+
+    def _order_by(self):
+        # ORDER BY clause or None if the records are sorted by id
+        if self._sort_attr is not None:
+            if self._sort_attr == 'id' and not self._sort_desc:
+                return None
+
+            col = getattr(self._model, self._sort_attr)
+            return col.desc() if self._sort_desc else col.asc()
+
+        return self._default_sort
+
+    def _query(self):
+        query = self._model().queryObject()
+        criteria = self._filter_criteria()
+        if len(criteria) > 0:
+            query = query.filter(and_(*criteria))
+
+        return query
+
+    def _filter_criteria(self):
+        criteria = list(self._criteria)
+
+        if self._quick_filter is not None:
+            attr, filter_text = self._quick_filter
+            criteria.append(self._text_criterion(attr, filter_text))
+
+        for attr, value in self.filter_params.items():
+            model_col = getattr(self._model, attr, None)
+            if model_col is None:
+                continue
+
+            if isinstance(value, str):
+                criteria.append(
+                    cast(model_col, String).ilike(_like_pattern(value))
+                )
+            else:
+                criteria.append(model_col == value)
+
+        return criteria
+
+    def _text_criterion(self, attr, filter_text):
+        # Matches the display value of the column with the filter text
+        pattern = _like_pattern(filter_text)
+        model_attr = getattr(self._model, attr)
+        column = self._attr_columns.get(attr, None)
+        type_info = getattr(column, 'TYPE_INFO', '')
+
+        if type_info == 'MULTIPLE_SELECT':
+            lookup_cls = model_attr.property.mapper.class_
+            return model_attr.any(lookup_cls.value.ilike(pattern))
+
+        if type_info in ('LOOKUP', 'ADMIN_SPATIAL_UNIT', 'FOREIGN_KEY'):
+            if type_info == 'LOOKUP':
+                display_cols = ['value']
+            elif type_info == 'ADMIN_SPATIAL_UNIT':
+                display_cols = ['name']
+            else:
+                display_cols = column.entity_relation.display_cols
+
+            parent_model = entity_model(column.parent, entity_only=True)
+            if parent_model is not None and len(display_cols) > 0:
+                matches = parent_model().queryObject([parent_model.id]).filter(
+                    or_(*[cast(getattr(parent_model, c), String).ilike(pattern)
+                          for c in display_cols])
+                )
+
+                return model_attr.in_(matches.subquery())
+
+        return cast(model_attr, String).ilike(pattern)
+
+    def reload(self):
+        """
+        Discards the loaded records and fetches the first page using the
+        current sort order and filters.
+        """
+        self.beginResetModel()
+        self._initData[:] = []
+        self._raw_values[:] = []
+        self._row_ids[:] = []
+        self._last_id = None
+        self._offset = 0
+        self._exhausted = False
+        self._total = None
+        self.endResetModel()
+
+        self.fetchMore()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sorts the records by the given column in the database.
+        """
+        if column < 0 or column >= len(self._attribute_names):
+            return
+
+        attr = self._attribute_names[column]
+        column_obj = self._attr_columns.get(attr, None)
+        if getattr(column_obj, 'TYPE_INFO', '') == 'MULTIPLE_SELECT':
+            return
+
+        self._sort_attr = attr
+        self._sort_desc = order == Qt.DescendingOrder
+        self.reload()
+
+    def set_quick_filter(self, attribute_name, filter_text):
+        """
+        Restricts the records to those whose display value, in the given
+        attribute, contains the filter text. The match is case-insensitive.
+        :param attribute_name: Name of the attribute to filter.
+        :type attribute_name: str
+        :param filter_text: Text to search for. An empty string removes the
+        filter.
+        :type filter_text: str
+        """
+        if not filter_text or not attribute_name:
+            quick_filter = None
+        else:
+            quick_filter = (attribute_name, filter_text)
+
+        if quick_filter == self._quick_filter:
+            return
+
+        self._quick_filter = quick_filter
+        self.reload()
+
+    def set_filter_params(self, parameters):
+        """
+        Restricts the records to those matching the attribute values in the
+        advanced search parameters. String values match records containing
+        the value, ignoring case, while other values should be equal.
+        :param parameters: Collection of attribute names and corresponding
+        values.
+        :type parameters: dict
+        """
+        self.filter_params = dict(parameters)
+        self.reload()
+
+    def invalidate_count(self):
+        """
+        Discards the number of matching records so that it is recomputed,
+        for instance after records have been added or deleted.
+        """
+        self._total = None
+
+    def total_count(self):
+        """
+        :return: Number of records matching the current filters. Records
+        matching the quick filter or filter parameters are only counted up
+        to COUNT_LIMIT, refer to is_count_capped.
+        :rtype: int
+        """
+        if self._total is None:
+            query = self._query()
+            self._count_capped = False
+            if self._quick_filter is not None or len(self.filter_params) > 0:
+                # Stop counting once the limit has been exceeded rather
+                # than matching the text against all the records
+                self._total = query.limit(COUNT_LIMIT + 1).count()
+                if self._total > COUNT_LIMIT:
+                    self._total = COUNT_LIMIT
+                    self._count_capped = True
+            else:
+                self._total = query.count()
+
+            if self._max_rows is not None and self._total >= self._max_rows:
+                self._total = self._max_rows
+                self._count_capped = False
+
+        return self._total
+
+    def is_count_capped(self):
+        """
+        :return: True if more records than those returned by total_count
+        match the current filters.
+        :rtype: bool
+        """
+        self.total_count()
+
+        return self._count_capped
@@ -0,0 +1,218 @@
+"""
+/***************************************************************************
+Name                 : CoercionPlan
+Description          : Converts imported values to conform to the type of
+                       the destination columns.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+
+LOGGER = logging.getLogger('stdm')
+
+
+def _is_null_text(value):
+    # True if the value is an empty or 'null' string
+    if not isinstance(value, str):
+        return False
+
+    text = value.strip()
+
+    return not bool(text) or text.lower() == 'null'
+
+
+def identity(value):
+    """
+    Returns the value as is.
+    """
+    return value
+
+
+def to_float(value):
+    """
+    Converts the value to a float. Empty strings and values which cannot
+    be converted return None; the latter are logged.
+    """
+    if value is None or _is_null_text(value):
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        LOGGER.warning('%r cannot be converted to a number', value)
+        return None
+
+
+def to_int(value):
+    """
+    Converts the value to an integer. Numbers with a zero fractional part,
+    such as '3.0', are accepted. Empty strings and values which cannot be
+    converted return None; the latter are logged.
+    """
+    if value is None or _is_null_text(value):
+        return None
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+
+    if number is not None and number.is_integer():
+        return int(number)
+
+    LOGGER.warning('%r cannot be converted to an integer', value)
+
+    return None
+
+
+def to_key(value):
+    """
+    Converts the value to an integer id referencing another table. Zero is
+    not a valid id hence it returns None.
+    """
+    value = to_int(value)
+    if value == 0:
+        return None
+
+    return value
+
+
+def to_percent(value):
+    """
+    Converts a value such as '45%' to a float.
+    """
+    if isinstance(value, str):
+        if _is_null_text(value):
+            return None
+        value = value.replace('%', '')
+
+    return to_float(value)
+
+
+def to_date(value):
+    """
+    Returns None for empty date strings, otherwise the value is returned
+    as is.
+    """
+    if not bool(value) or _is_null_text(value):
+        return None
+
+    return value
+
+
+def to_bool(value):
+    """
+    Converts yes/no and true/false strings to a boolean. Other values are
+    returned as is.
+    """
+    if not isinstance(value, str):
+        return value
+
+    if _is_null_text(value):
+        return None
+
+    text = value.strip().lower()
+    if text in ('yes', 'true'):
+        return True
+    if text in ('no', 'false'):
+        return False
+
+    return value
+
+
+# Converters for each column type
+TYPE_CONVERTERS = {
+    'INT': to_int,
+    'DOUBLE': to_float,
+    'LOOKUP': to_key,
+    'ADMIN_SPATIAL_UNIT': to_key,
+    'FOREIGN_KEY': to_key,
+    'PERCENT': to_percent,
+    'DATE': to_date,
+    'DATETIME': to_date,
+    'BOOL': to_bool
+}
+
+
+class CoercionPlan:
+    """
+    Maps each column of an entity to a single converter, chosen from the
+    column type, so that values can be converted without looking up the
+    column in the profile for every value.
+    """
+
+    def __init__(self, entity, converters=None):
+        """
+        :param entity: Destination entity.
+        :type entity: Entity
+        :param converters: Converters to use for each column type in place
+        of the defaults.
+        :type converters: dict
+        """
+        self._entity = entity
+        type_converters = dict(TYPE_CONVERTERS)
+        if converters is not None:
+            type_converters.update(converters)
+
+        self._converters = {}
+        for name, col in entity.columns.items():
+            self._converters[name] = type_converters.get(
+                col.TYPE_INFO,
+                identity
+            )
+
+    @property
+    def entity(self):
+        """
+        :return: Destination entity.
+        :rtype: Entity
+        """
+        return self._entity
+
+    def converter(self, column):
+        """
+        :param column: Column name.
+        :type column: str
+        :return: Converter for the given column. Columns which do not belong
+        to the entity are not converted.
+        :rtype: function
+        """
+        return self._converters.get(column, identity)
+
+    def coerce(self, column, value):
+        """
+        Converts the value to conform to the type of the given column.
+        """
+        return self._converters.get(column, identity)(value)
+
+    def coerce_row(self, row):
+        """
+        Converts the values of a row.
+        :param row: Collection of column names and corresponding values.
+        :type row: dict
+        :return: Column names and converted values.
+        :rtype: dict
+        """
+        converters = self._converters
+
+        return {
+            col: converters.get(col, identity)(value)
+            for col, value in row.items()
+        }
@@ -18,7 +18,12 @@ email                : stdm@unhabitat.org
  *                                                                         *
  ***************************************************************************/
 """
-
+import csv
+import io
+from collections import (
+    namedtuple,
+    OrderedDict
+)
 from datetime import datetime
 
 from qgis.PyQt.QtCore import (Qt, QDate, QLocale)
@@ -47,8 +52,16 @@ from stdm.settings import (
 from sqlalchemy.exc import DataError, IntegrityError
 from stdm.data.database import STDMDb
 
+from stdm.data.importexport.coercion import (
+    CoercionPlan,
+    TYPE_CONVERTERS,
+    to_bool,
+    to_date,
+    to_percent
+)
 from stdm.data.importexport.value_translators import (
     IgnoreType,
+    PRELOAD_ROW_LIMIT,
     ValueTranslatorManager
 )
 
@@ -58,6 +71,19 @@ from stdm.data.configuration.exception import ConfigurationException
 from stdm.ui.sourcedocument import SourceDocumentManager
 
 
+# Number of features written to the database in one transaction in bulk mode
+BULK_CHUNK_SIZE = 5000
+
+"""
+Progress of a bulk import. 'feature_count' is the number of source features
+which have been committed to the 'table' in the database.
+"""
+ImportCheckpoint = namedtuple(
+    'ImportCheckpoint',
+    ['source_file', 'table', 'feature_count']
+)
+
+
 class ImportFeatureException(Exception):
     """
     Raised when an error occurs during feature import
@@ -66,6 +92,7 @@ class ImportFeatureException(Exception):
 
 class OGRReader:
     def __init__(self, source_file: str):
+        self._source_file = source_file
         self._ds = ogr.Open(source_file)
         self._targetGeomColSRID = -1
         self._geomType = ''
@@ -75,6 +102,12 @@ class OGRReader:
         self._current_profile = current_profile()
         self._source_doc_manager = None
 
+        # Features committed so far in bulk mode
+        self.checkpoint = None
+
+        # Converters for the destination columns
+        self._coercion_plan = None
+
         self.date_formatter = DateFormatter()
 
     def getLayer(self):
@@ -166,17 +199,7 @@ class OGRReader:
         entity = self._data_source_entity(target_table)
 
         if entity.columns[col_name].TYPE_INFO == 'PERCENT':
-            if isinstance(value, str):
-                if not bool(value.strip()) or value.strip().lower() == 'null':
-                    value = None
-            if '%' in value:
-                value = value.replace('%', '')
-            try:
-                if value is not None:
-                    value = float(value)
-
-            except ValueError:
-                value = None
+            value = to_percent(value)
 
         return value
 
@@ -195,38 +218,11 @@ class OGRReader:
         entity = self._data_source_entity(target_table)
         integer_types = ['INT', 'LOOKUP', 'ADMIN_SPATIAL_UNIT',
                          'FOREIGN_KEY', 'DOUBLE']
-        float_type = ['DOUBLE']
-        int_type = ['INT', 'LOOKUP', 'ADMIN_SPATIAL_UNIT',
-                    'FOREIGN_KEY']
 
         if col_name in entity.columns.keys():
-            if entity.columns[col_name].TYPE_INFO in integer_types:
-                if isinstance(value, str):
-                    if not bool(value.strip()) or value.strip().lower() == 'null':
-                        value = None
-                if entity.columns[col_name].TYPE_INFO in float_type:
-                    try:
-                        if value is not None:
-                            value = float(value)
-
-                    except ValueError:
-                        value = None
-
-                elif entity.columns[col_name].TYPE_INFO in int_type:
-
-                    try:
-                        if value is not None:
-                            value = int(value)
-                            if isinstance(value, int):
-                                if value == 0:
-                                    if entity.columns[col_name].TYPE_INFO in \
-                                            ['LOOKUP', 'ADMIN_SPATIAL_UNIT',
-                                             'FOREIGN_KEY']:
-                                        value = None
-                    except ValueError:
-                        # TODO show warning to the user that
-                        #  some values cannot be converted to integer.
-                        value = None
+            type_info = entity.columns[col_name].TYPE_INFO
+            if type_info in integer_types:
+                value = TYPE_CONVERTERS[type_info](value)
 
         return value
 
@@ -247,8 +243,7 @@ class OGRReader:
         date_types = ['DATE', 'DATETIME']
 
         if entity.columns[col_name].TYPE_INFO in date_types:
-            if not bool(value) or value.lower() == 'null':
-                value = None
+            value = to_date(value)
 
         return value
 
@@ -268,16 +263,8 @@ class OGRReader:
         yes_no_types = ['BOOL']
 
         if entity.columns[col_name].TYPE_INFO in yes_no_types:
-            if not bool(value.strip()) or value.strip().lower() == 'null':
-                value = None
-            elif value.strip().lower() == 'yes':
-                value = True
-            elif value.strip().lower() == 'no':
-                value = False
-            elif value.strip().lower() == 'true':
-                value = True
-            elif value.strip().lower() == 'false':
-                value = False
+            value = to_bool(value)
+
         return value
 
     def _insertRow(self, target_table, columnValueMapping):
@@ -290,17 +277,113 @@ class OGRReader:
             if hasattr(model_instance, col):
                 # 'documents' is not a column so exclude it.
                 if col != 'documents' and 'collection' not in col:
-                    value = self.auto_fix_float_integer(target_table, col,
-                                                        value)
-                    value = self.auto_fix_percent(target_table, col, value)
-                    value = self.auto_fix_date(target_table, col, value)
-                    value = self.auto_fix_yes_no(target_table, col, value)
+                    value = self._fix_value(target_table, col, value)
 
                 if not isinstance(value, IgnoreType):
                     setattr(model_instance, col, value)
 
         self._dbSession.add(model_instance)
 
+    def _fix_value(self, target_table, col, value):
+        # Converts the value to conform to the destination column type
+        if self._coercion_plan is None or \
+                self._coercion_plan.entity.name != target_table:
+            self._coercion_plan = CoercionPlan(
+                self._data_source_entity(target_table)
+            )
+
+        return self._coercion_plan.coerce(col, value)
+
+    @staticmethod
+    def _requires_orm_insert(column_value_mapping):
+        """
+        :return: True if the row has supporting documents or multiple select
+        values which can only be saved through the mapped class.
+        :rtype: bool
+        """
+        for col, value in column_value_mapping.items():
+            if col == 'documents' or 'collection' in col:
+                if value and not isinstance(value, IgnoreType):
+                    return True
+
+        return False
+
+    def _bulk_row(self, target_table, column_value_mapping):
+        """
+        Converts the column values of a feature to a tuple of column names
+        and a tuple of the corresponding values which can be written
+        directly to the destination table.
+        """
+        table_cols = self._mapped_cls.__table__.columns
+        row = OrderedDict()
+        for col, value in column_value_mapping.items():
+            if col not in table_cols:
+                continue
+
+            value = self._fix_value(target_table, col, value)
+            if not isinstance(value, IgnoreType):
+                row[col] = value
+
+        return tuple(row.keys()), tuple(row.values())
+
+    def _write_bulk_rows(self, rows):
+        """
+        Writes the rows to the destination table within the current session
+        transaction, using PostgreSQL COPY if it is supported by the
+        database driver else an executemany insert. Rows are grouped by
+        their columns so that omitted columns still get their default
+        values.
+        :param rows: List containing tuples of column names and values.
+        :type rows: list
+        """
+        if len(rows) == 0:
+            return
+
+        grouped_rows = OrderedDict()
+        for cols, values in rows:
+            grouped_rows.setdefault(cols, []).append(values)
+
+        conn = self._dbSession.connection()
+        cursor = conn.connection.cursor()
+        try:
+            for cols, values in grouped_rows.items():
+                if hasattr(cursor, 'copy_expert'):
+                    self._copy_rows(conn.engine, cursor, cols, values)
+                else:
+                    self._insert_rows(conn.engine, cursor, cols, values)
+        finally:
+            cursor.close()
+
+    def _copy_rows(self, engine, cursor, columns, rows):
+        # Streams the rows through COPY ... FROM STDIN in CSV format
+        preparer = engine.dialect.identifier_preparer
+        sql = 'COPY {0} ({1}) FROM STDIN WITH (FORMAT csv)'.format(
+            preparer.format_table(self._mapped_cls.__table__),
+            ', '.join([preparer.quote(c) for c in columns])
+        )
+
+        # Strings are quoted so that empty strings are not read as NULL
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for values in rows:
+            writer.writerow(
+                ['' if v is None else v for v in values]
+            )
+        buffer.seek(0)
+
+        cursor.copy_expert(sql, buffer)
+
+    def _insert_rows(self, engine, cursor, columns, rows):
+        # Fallback for drivers that do not support COPY
+        preparer = engine.dialect.identifier_preparer
+        sql = 'INSERT INTO {0} ({1}) VALUES ({2})'.format(
+            preparer.format_table(self._mapped_cls.__table__),
+            ', '.join([preparer.quote(c) for c in columns]),
+            ', '.join(['%s'] * len(columns))
+        )
+
+        cursor.executemany(sql, rows)
+
     def auto_fix_geom_type(self, geom, source_geom_type, destination_geom_type):
         """
         Converts single geometry type to multi type if the destination is multi type.
@@ -350,7 +433,9 @@ class OGRReader:
         return geom_wkb, geom_type
 
     def featToDb(self, targettable, columnmatch, append, parentdialog,
-                 geomColumn=None, geomCode=-1, translator_manager=None):
+                 geomColumn=None, geomCode=-1, translator_manager=None,
+                 bulk_insert=False, chunk_size=BULK_CHUNK_SIZE,
+                 resume_from=None, translator_row_limit=PRELOAD_ROW_LIMIT):
         """
         Performs the data import from the source layer to the STDM database.
         :param targettable: Destination table name
@@ -360,6 +445,23 @@ class OGRReader:
         :param translator_manager: Instance of 'stdm.data.importexport.ValueTranslatorManager'
         containing value translators defined for the destination table columns.
         :type translator_manager: ValueTranslatorManager
+        :param bulk_insert: True to write the features in chunks directly to
+        the destination table using COPY. Only features with supporting
+        documents or multiple select values are saved through the mapped
+        class. Each chunk is committed separately and the progress is
+        recorded in the 'checkpoint' attribute.
+        :type bulk_insert: bool
+        :param chunk_size: Number of features committed in one transaction
+        in bulk mode.
+        :type chunk_size: int
+        :param resume_from: Checkpoint of a previous bulk import that
+        failed. Features which had already been committed are skipped and
+        existing records are not deleted.
+        :type resume_from: ImportCheckpoint
+        :param translator_row_limit: Maximum number of rows of a table
+        referenced by the value translators to load into memory. Only the
+        records matching the source values are fetched from larger tables.
+        :type translator_row_limit: int
         """
         # Check current profile
         if self._current_profile is None:
@@ -373,10 +475,24 @@ class OGRReader:
         if translator_manager is None:
             translator_manager = ValueTranslatorManager()
 
+        start_index = 0
+        if resume_from is not None and \
+                resume_from.source_file == self._source_file and \
+                resume_from.table == targettable:
+            start_index = resume_from.feature_count
+            append = True
+
         # Delete existing rows in the target table if user has chosen to overwrite
         if not append:
             delete_table_data(targettable)
 
+        self.checkpoint = ImportCheckpoint(
+            self._source_file,
+            targettable,
+            start_index
+        )
+        bulk_rows = []
+
         # Container for mapping column names to their corresponding values
 
         lyr = self.getLayer()
@@ -394,7 +510,22 @@ class OGRReader:
         # Set entity for use in translators
         destination_entity = self._data_source_entity(targettable)
 
+        # Converters are selected once for all the features
+        self._coercion_plan = CoercionPlan(destination_entity)
+
+        # Load the values referenced by the translators into memory
+        translator_manager.preload(
+            destination_entity,
+            self._source_values,
+            translator_row_limit
+        )
+        lyr.ResetReading()
+
         for feat in lyr:
+            if init_val < start_index:
+                init_val += 1
+                continue
+
             column_value_mapping = {}
             column_count = 0
             progress.setValue(init_val)
@@ -521,24 +652,81 @@ class OGRReader:
                                 self._geomType))
 
             # Insert the record
-            self._insertRow(targettable, column_value_mapping)
+            if bulk_insert and self._mapped_cls is not None and \
+                    not self._requires_orm_insert(column_value_mapping):
+                bulk_rows.append(
+                    self._bulk_row(targettable, column_value_mapping)
+                )
+            else:
+                self._insertRow(targettable, column_value_mapping)
 
             init_val += 1
 
+            if bulk_insert and (init_val - start_index) % chunk_size == 0:
+                try:
+                    self._commit_chunk(bulk_rows, init_val)
+                except ImportFeatureException:
+                    progress.close()
+                    progress.deleteLater()
+                    del progress
+                    raise
+                bulk_rows = []
+
         try:
-            self._dbSession.commit()
-        except (DataError, IntegrityError) as e:
-            self._dbSession.rollback()
+            self._commit_chunk(bulk_rows, init_val)
+        except ImportFeatureException:
             progress.close()
             progress.deleteLater()
             del progress
-            raise ImportFeatureException(str(e))
+            raise
+
+        translator_manager.clear_preload()
 
         progress.setValue(numFeat)
 
         progress.deleteLater()
         del progress
 
+    def _source_values(self, columns):
+        """
+        Reads the values of the given source columns from all the features.
+        :param columns: Source column names.
+        :type columns: list
+        :return: Dictionaries of column names and values, one for each
+        feature.
+        :rtype: generator
+        """
+        lyr = self.getLayer()
+        lyr.ResetReading()
+        feat_defn = lyr.GetLayerDefn()
+
+        for feat in lyr:
+            yield self._map_column_values(feat, feat_defn, columns)
+
+        lyr.ResetReading()
+
+    def _commit_chunk(self, bulk_rows, feature_count):
+        """
+        Writes the bulk rows and commits them together with the rows added
+        through the mapped class then updates the checkpoint.
+        :param bulk_rows: Rows to be written directly to the table.
+        :type bulk_rows: list
+        :param feature_count: Number of source features read so far.
+        :type feature_count: int
+        """
+        dbapi_error = self._dbSession.get_bind().dialect.dbapi.Error
+        try:
+            self._dbSession.flush()
+            self._write_bulk_rows(bulk_rows)
+            self._dbSession.commit()
+        except (DataError, IntegrityError, dbapi_error) as e:
+            self._dbSession.rollback()
+            raise ImportFeatureException(str(e))
+
+        self.checkpoint = self.checkpoint._replace(
+            feature_count=feature_count
+        )
+
     def _enumeration_column_type(self, column_name, value):
         """
         Checks if the given column is of DeclEnumType.
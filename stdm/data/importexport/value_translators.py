@@ -49,6 +49,33 @@ from .exceptions import TranslatorException
 __all__ = ["SourceValueTranslator", "ValueTranslatorManager",
            "RelatedTableTranslator", "IgnoreType"]
 
+# Referenced tables with more rows are not loaded into memory in full
+PRELOAD_ROW_LIMIT = 100000
+
+# Maximum number of values in a single IN (...) clause
+IN_CLAUSE_SIZE = 500
+
+
+def _text_key(value):
+    # Normalizes values so that they can be matched in memory
+    if value is None:
+        return None
+
+    return str(value)
+
+
+def _lower_key(value):
+    if value is None:
+        return None
+
+    return str(value).strip().lower()
+
+
+def _chunks(values, size=IN_CLAUSE_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
 
 class IgnoreType:
     """
@@ -220,6 +247,37 @@ class SourceValueTranslator:
         """
         return False
 
+    def preload(self, source_values, row_limit=PRELOAD_ROW_LIMIT):
+        """
+        Loads the values in the referenced table, required for translating
+        the source values, into memory so that the database is not queried
+        for each source row. If the referenced table has more than
+        'row_limit' rows then only the records matching the source values
+        are fetched, using batched IN queries. Default implementation does
+        nothing, to be implemented by subclasses.
+        :param source_values: Callable that returns an iterable of
+        dictionaries containing the values of the source columns of the
+        translator, one dictionary for each source row.
+        :type source_values: function
+        :param row_limit: Maximum number of rows of the referenced table to
+        load into memory.
+        :type row_limit: int
+        """
+        pass
+
+    def clear_preload(self):
+        """
+        Removes the values loaded in memory by 'preload'. To be implemented
+        by subclasses.
+        """
+        pass
+
+    def _row_count(self, table):
+        # Number of rows in the given SQLAlchemy table object
+        return self._db_session.query(func.count()).select_from(
+            table
+        ).scalar()
+
     def referencing_column_value(self, field_values):
         """
         Abstract method to be implemented by subclasses.
@@ -338,6 +396,42 @@ class ValueTranslatorManager:
         """
         return self._translators.get(name, None)
 
+    def translators(self):
+        """
+        :return: Translators in the collection.
+        :rtype: list
+        """
+        return list(self._translators.values())
+
+    def preload(self, entity, source_values, row_limit=PRELOAD_ROW_LIMIT):
+        """
+        Loads the values of the referenced tables of all translators into
+        memory.
+        :param entity: Destination entity.
+        :type entity: Entity
+        :param source_values: Callable which accepts a list of source column
+        names and returns an iterable of dictionaries containing the values
+        of these columns for each source row.
+        :type source_values: function
+        :param row_limit: Maximum number of rows of a referenced table to
+        load into memory.
+        :type row_limit: int
+        """
+        for translator in self._translators.values():
+            translator.entity = entity
+            source_cols = translator.source_column_names()
+            translator.preload(
+                lambda cols=source_cols: source_values(cols),
+                row_limit
+            )
+
+    def clear_preload(self):
+        """
+        Removes the values loaded in memory by the translators.
+        """
+        for translator in self._translators.values():
+            translator.clear_preload()
+
     def clear(self):
         """
         Removes all translators from the collection.
@@ -372,6 +466,94 @@ class RelatedTableTranslator(SourceValueTranslator):
     def __init__(self):
         SourceValueTranslator.__init__(self)
 
+        self._link_table = None
+        self._link_table_columns = None
+
+        # Values of the referenced columns mapped to the output value
+        self._preloaded_values = None
+
+    def _referenced_table_obj(self):
+        # Reflect the referenced table only once
+        if self._link_table is None or \
+                self._link_table.name != self._referenced_table:
+            self._link_table = self._table(self._referenced_table)
+            self._link_table_columns = self._table_columns(
+                self._referenced_table
+            )
+
+        return self._link_table
+
+    def _query_columns(self):
+        """
+        :return: Pairs of source column and referenced table column names
+        for the referenced columns that exist.
+        :rtype: list
+        """
+        self._referenced_table_obj()
+
+        return [
+            (source_col, ref_col)
+            for source_col, ref_col in self._input_referenced_columns.items()
+            if getIndex(self._link_table_columns, ref_col) != -1
+        ]
+
+    def _source_key(self, field_values):
+        """
+        :return: Tuple of the source values, for the referenced columns
+        that exist, used to match the records in memory.
+        :rtype: tuple
+        """
+        return tuple(
+            _text_key(field_values.get(source_col, None))
+            for source_col, _ in self._query_columns()
+        )
+
+    def _index_records(self, records, ref_cols):
+        # Map the referenced column values to the output value
+        for rec in records:
+            key = tuple(_text_key(getattr(rec, c)) for c in ref_cols)
+            self._preloaded_values.setdefault(
+                key,
+                getattr(rec, self._output_referenced_column, IgnoreType())
+            )
+
+    def preload(self, source_values, row_limit=PRELOAD_ROW_LIMIT):
+        self.clear_preload()
+
+        link_table = self._referenced_table_obj()
+        query_cols = self._query_columns()
+        if len(query_cols) == 0:
+            return
+
+        ref_cols = [c for _, c in query_cols]
+        self._preloaded_values = {}
+
+        if self._row_count(link_table) <= row_limit:
+            self._index_records(
+                self._db_session.query(link_table).all(),
+                ref_cols
+            )
+
+            return
+
+        # Only fetch the records matching the source values
+        keys = set()
+        for field_values in source_values():
+            keys.add(self._source_key(field_values))
+
+        # Use the first referenced column to narrow down the records
+        first_col = getattr(link_table.c, ref_cols[0])
+        first_values = set([k[0] for k in keys if k[0] is not None])
+
+        for chunk in _chunks(first_values):
+            records = self._db_session.query(link_table).filter(
+                cast(first_col, String).in_(chunk)
+            ).all()
+            self._index_records(records, ref_cols)
+
+    def clear_preload(self):
+        self._preloaded_values = None
+
     def referencing_column_value(self, field_values):
         """
         Searches a corresponding record from the linked table using one or more
@@ -382,23 +564,24 @@ class RelatedTableTranslator(SourceValueTranslator):
         :return: Value of the referenced column in the linked table.
         :rtype: object
         """
-        link_table_columns = self._table_columns(self._referenced_table)
+        if self._preloaded_values is not None:
+            return self._preloaded_values.get(
+                self._source_key(field_values),
+                IgnoreType()
+            )
 
         query_attrs = {}
 
-        for source_col, val in field_values.items():
-            ref_table_col = self._input_referenced_columns.get(source_col, None)
-
-            if ref_table_col is not None:
-                col_idx = getIndex(link_table_columns, ref_table_col)
-
-                # If column is found, add it to the query fields collection
-                if col_idx != -1:
-                    # TODO use the column object to cast based on column data type
-                    query_attrs[ref_table_col] = cast(val, String)
+        for source_col, ref_table_col in self._query_columns():
+            if source_col in field_values:
+                # TODO use the column object to cast based on column data type
+                query_attrs[ref_table_col] = cast(
+                    field_values[source_col],
+                    String
+                )
 
         # Create link table object
-        link_table = self._table(self._referenced_table)
+        link_table = self._referenced_table_obj()
 
         # Use AND operator
         link_table_rec = self._db_session.query(link_table).filter_by(**query_attrs).first()
@@ -421,6 +604,60 @@ class LookupValueTranslator(RelatedTableTranslator):
         self.default_value = kwargs.get('default', '')
         self._lk_value_column = 'value'
 
+        # Lower case lookup values mapped to the lookup ids
+        self._preloaded_ids = None
+        self._default_id = None
+
+    def _lookup_value_column(self):
+        lookup_table = self._referenced_table_obj()
+
+        return getattr(lookup_table.c, self._lk_value_column)
+
+    def preload(self, source_values, row_limit=PRELOAD_ROW_LIMIT):
+        self.clear_preload()
+
+        if not self._referenced_table:
+            return
+
+        lookup_table = self._referenced_table_obj()
+        lk_value_column_obj = self._lookup_value_column()
+        self._preloaded_ids = {}
+
+        if self._row_count(lookup_table) <= row_limit:
+            lookup_recs = self._db_session.query(lookup_table).all()
+        else:
+            source_vals = set()
+            for field_values in source_values():
+                if len(field_values) > 0:
+                    val = _lower_key(list(field_values.values())[0])
+                    if val is not None:
+                        source_vals.add(val)
+
+            lookup_recs = []
+            for chunk in _chunks(source_vals):
+                lookup_recs.extend(
+                    self._db_session.query(lookup_table).filter(
+                        func.lower(lk_value_column_obj).in_(chunk)
+                    ).all()
+                )
+
+        for rec in lookup_recs:
+            self._preloaded_ids.setdefault(
+                _lower_key(getattr(rec, self._lk_value_column)),
+                getattr(rec, 'id', IgnoreType())
+            )
+
+        if self.default_value:
+            default_rec = self._db_session.query(lookup_table).filter(
+                lk_value_column_obj == self.default_value
+            ).first()
+            if default_rec is not None:
+                self._default_id = getattr(default_rec, 'id', IgnoreType())
+
+    def clear_preload(self):
+        self._preloaded_ids = None
+        self._default_id = None
+
     def referencing_column_value(self, field_values):
         """
         Searches a corresponding record from the linked table using one or more
@@ -451,8 +688,18 @@ class LookupValueTranslator(RelatedTableTranslator):
         source_column = list(field_values.keys())[0]
         lookup_value = field_values.get(source_column)
 
+        if self._preloaded_ids is not None:
+            lookup_id = self._preloaded_ids.get(
+                _lower_key(lookup_value),
+                self._default_id
+            )
+            if lookup_id is None:
+                return IgnoreType()
+
+            return lookup_id
+
         # Create lookup table object
-        lookup_table = self._table(self._referenced_table)
+        lookup_table = self._referenced_table_obj()
 
         lk_value_column_obj = getattr(lookup_table.c, self._lk_value_column)
 
@@ -486,6 +733,9 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         # Container for lookup id and corresponding values
         self._lk_up_id_vals = {}
 
+        # Lower case lookup values mapped to the lookup objects
+        self._preloaded_objs = None
+
     def separator(self):
         """
         :return: The enum separator in the source table's column.
@@ -505,6 +755,73 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         else:
             self._separator = " "
 
+    def _enum_columns(self):
+        """
+        :return: Names of the primary source column and the corresponding
+        multiple select column in the destination table.
+        :rtype: tuple
+        """
+        num_cols = len(self._input_referenced_columns)
+        cols_iter = itertools.islice(
+            list(self._input_referenced_columns.items()),
+            num_cols
+        )
+
+        # Tuple of one or two items.The format is -
+        # (source primary enum column, enum table primary column)
+        enum_cols_pairs = list(cols_iter)
+
+        return enum_cols_pairs[0]
+
+    def _tokens(self, delimited_source_value):
+        # Values in the source string
+        return [kv.strip() for kv in
+                delimited_source_value.split(self._separator)
+                if kv.strip()]
+
+    def preload(self, source_values, row_limit=PRELOAD_ROW_LIMIT):
+        self.clear_preload()
+
+        if len(self._input_referenced_columns) == 0 or self.entity is None:
+            return
+
+        source_primary_col, enum_primary_col = self._enum_columns()
+        dest_col_obj = self.entity.column(enum_primary_col)
+        if not dest_col_obj:
+            return
+
+        lookup_mapped_cls = entity_model(dest_col_obj.value_list)
+        self._preloaded_objs = {}
+
+        lk_count = self._db_session.query(
+            func.count(lookup_mapped_cls.id)
+        ).scalar()
+        if lk_count <= row_limit:
+            lookup_objs = self._db_session.query(lookup_mapped_cls).all()
+        else:
+            tokens = set()
+            for field_values in source_values():
+                value = field_values.get(source_primary_col, None)
+                if value and isinstance(value, str):
+                    tokens.update([t.lower() for t in self._tokens(value)])
+
+            lookup_objs = []
+            for chunk in _chunks(tokens):
+                lookup_objs.extend(
+                    self._db_session.query(lookup_mapped_cls).filter(
+                        func.lower(lookup_mapped_cls.value).in_(chunk)
+                    ).all()
+                )
+
+        for lookup_obj in lookup_objs:
+            self._preloaded_objs.setdefault(
+                _lower_key(lookup_obj.value),
+                lookup_obj
+            )
+
+    def clear_preload(self):
+        self._preloaded_objs = None
+
     def referencing_column_value(self, field_values):
         """
         Gets a list of lookup objects corresponding to the values extracted
@@ -518,16 +835,7 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         if len(self._input_referenced_columns) == 0:
             return None
 
-        num_cols = len(self._input_referenced_columns)
-        cols_iter = itertools.islice(
-            list(self._input_referenced_columns.items()),
-            num_cols
-        )
-
-        # Tuple of one or two items.The format is -
-        # (source primary enum column, enum table primary column)
-        enum_cols_pairs = list(cols_iter)
-        source_primary_col, enum_primary_col = enum_cols_pairs[0]
+        source_primary_col, enum_primary_col = self._enum_columns()
 
         delimited_source_value = field_values.get(source_primary_col, None)
         if not delimited_source_value:
@@ -536,6 +844,11 @@ class MultipleEnumerationTranslator(SourceValueTranslator):
         if not isinstance(delimited_source_value, str):
             return IgnoreType()
 
+        if self._preloaded_objs is not None:
+            return [self._preloaded_objs[kv.lower()]
+                    for kv in self._tokens(delimited_source_value)
+                    if kv.lower() in self._preloaded_objs]
+
         # Get the lookup values used in the multiple select
         dest_col_obj = self.entity.column(enum_primary_col)
         if not dest_col_obj:
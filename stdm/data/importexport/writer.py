@@ -20,9 +20,15 @@ from osgeo import gdal
 from osgeo import ogr
 from osgeo import osr
 
+from sqlalchemy.sql.expression import text
+
 from stdm.exceptions import DummyException
 from stdm.data.pg_utils import (
     columnType,
+    column_types,
+    fetch_in_batches,
+    fetch_with_filter,
+    FETCH_SIZE,
     geometryType
 )
 from stdm.settings import (
@@ -39,6 +45,9 @@ class OGRWriter():
     OGR_STRING_TYPE = 4
     OGR_DATE_TYPE = 9
 
+    # Number of features written in one OGR transaction
+    TRANSACTION_SIZE = 10000
+
     def __init__(self, targetFile):
         self._ds = None
         self._targetFile = targetFile
@@ -60,10 +69,11 @@ class OGRWriter():
 
         return str(fi.baseName())
 
-    def createField(self, table, field):
+    def createField(self, table, field, colType=None):
         # Creates an OGR field
 
-        colType = columnType(table, field)
+        if colType is None:
+            colType = columnType(table, field)
         # Get OGR type
         ogrType = ogrTypes[colType]
 
@@ -75,9 +85,8 @@ class OGRWriter():
 
         return field_defn
 
-    def db2Feat(self, parent, table, results, columns, geom=""):
-        # Execute the export process
-        # Create driver
+    def _create_layer(self, table, geom):
+        # Creates the data source and the output layer
         drv = ogr.GetDriverByName(self.getDriverName())
         if drv is None:
             raise Exception("{0} driver not available.".format(self.getDriverName()))
@@ -106,6 +115,12 @@ class OGRWriter():
         if lyr is None:
             raise Exception("Layer creation failed")
 
+        return lyr
+
+    def db2Feat(self, parent, table, results, columns, geom=""):
+        # Execute the export process
+        lyr = self._create_layer(table, geom)
+
         # Create fields
         for c in columns:
 
@@ -176,6 +191,136 @@ class OGRWriter():
         progress.deleteLater()
         del progress
 
+    def db2FeatStream(self, parent, table, columns, geom="", where="",
+                      numFeat=None, fetch_size=FETCH_SIZE):
+        """
+        Exports the records of the table to the target file. Records are
+        read through a server-side cursor 'fetch_size' rows at a time and
+        written in batches within OGR transactions, if supported by the
+        driver, so that memory use does not grow with the number of records.
+        Geometries are transferred as WKB.
+        :param parent: Parent widget of the progress dialog.
+        :param table: Name of the source table or view.
+        :type table: str
+        :param columns: Names of the non-spatial columns to export.
+        :type columns: list
+        :param geom: Name of the geometry column to export, if any.
+        :type geom: str
+        :param where: Filter expression for the records to export.
+        :type where: str
+        :param numFeat: Number of records to be exported, used for
+        reporting progress. It is computed if not specified.
+        :type numFeat: int
+        :param fetch_size: Number of rows fetched at a time.
+        :type fetch_size: int
+        """
+        lyr = self._create_layer(table, geom)
+
+        # Get the types of all columns in one go
+        col_types = column_types(table)
+
+        for c in columns:
+            col_name = c.strip('"')
+            field_defn = self.createField(
+                table, col_name, col_types.get(col_name, None)
+            )
+
+            if lyr.CreateField(field_defn) != 0:
+                raise Exception("Creating %s field failed" % (c))
+
+        query_cols = list(columns)
+        if geom != "":
+            query_cols.append("ST_AsBinary({0})".format(geom))
+
+        sql = "SELECT {0} FROM {1}".format(",".join(query_cols), table)
+        if where:
+            sql += " WHERE {0}".format(where)
+
+        if numFeat is None:
+            count_sql = "SELECT COUNT(*) FROM {0}".format(table)
+            if where:
+                count_sql += " WHERE {0}".format(where)
+            numFeat = fetch_with_filter(count_sql).scalar()
+
+        # Configure progress dialog
+        initVal = 0
+        progress = QProgressDialog("", "&Cancel", initVal, numFeat, parent)
+        progress.setWindowModality(Qt.WindowModal)
+        lblMsgTemp = QApplication.translate(
+            'OGRWriter', 'Writing {0} of {1} to file...')
+
+        use_transactions = lyr.TestCapability(ogr.OLCTransactions)
+        layer_defn = lyr.GetLayerDefn()
+        num_cols = len(columns)
+        canceled = False
+
+        if use_transactions:
+            lyr.StartTransaction()
+
+        try:
+            for rows in fetch_in_batches(text(sql), fetch_size):
+                progress.setValue(initVal)
+                progress.setLabelText(
+                    lblMsgTemp.format(str(initVal + 1), str(numFeat))
+                )
+                if progress.wasCanceled():
+                    canceled = True
+                    break
+
+                for r in rows:
+                    feat = ogr.Feature(layer_defn)
+                    for i in range(num_cols):
+                        self._set_field(feat, i, r[i])
+
+                    if geom != "" and r[num_cols] is not None:
+                        feat.SetGeometry(
+                            ogr.CreateGeometryFromWkb(bytes(r[num_cols]))
+                        )
+
+                    if lyr.CreateFeature(feat) != 0:
+                        raise Exception(
+                            "Failed to create feature in %s" % (self._targetFile)
+                        )
+
+                    feat = None
+                    initVal += 1
+
+                    if use_transactions and \
+                            initVal % self.TRANSACTION_SIZE == 0:
+                        lyr.CommitTransaction()
+                        lyr.StartTransaction()
+
+            if use_transactions:
+                lyr.CommitTransaction()
+
+        except Exception:
+            if use_transactions:
+                lyr.RollbackTransaction()
+            progress.close()
+            progress.deleteLater()
+            del progress
+            raise
+
+        # Flush features to the file
+        self._ds.FlushCache()
+
+        if not canceled:
+            progress.setValue(numFeat)
+        progress.deleteLater()
+        del progress
+
+    @staticmethod
+    def _set_field(feat, idx, value):
+        # Sets the field value without converting it to text where possible
+        if value is None:
+            feat.SetFieldNull(idx)
+        elif isinstance(value, (bool, datetime.date, datetime.time)):
+            feat.SetField(idx, str(value))
+        elif isinstance(value, (int, float, str)):
+            feat.SetField(idx, value)
+        else:
+            feat.SetField(idx, str(value))
+
     @staticmethod
     def is_date(string):
         return True if isinstance(string, datetime.date) else False
@@ -0,0 +1,360 @@
+"""
+/***************************************************************************
+Name                 : LookupResolver
+Description          : Resolves lookup values, administrative units and
+                       related entity attributes to ids, and vice versa,
+                       from in-memory indexes.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from sqlalchemy import (
+    func
+)
+
+from stdm.data.configuration import entity_model
+from stdm.utils.lru_cache import LRUCache
+
+# Maximum number of values in a single IN (...) clause
+IN_CLAUSE_SIZE = 500
+
+
+class _TableIndex:
+    """
+    In-memory copy of a table indexed by id and, on demand, by any of its
+    columns.
+    """
+
+    def __init__(self, rows):
+        self.rows = {r['id']: r for r in rows}
+        self._col_indexes = {}
+
+    def index(self, column, lower=False):
+        """
+        :return: Mapping of column value to id. The first record wins for
+        non-unique values.
+        :rtype: dict
+        """
+        key = (column, lower)
+        if key not in self._col_indexes:
+            idx = {}
+            for row_id, row in self.rows.items():
+                val = row.get(column, None)
+                if val is None:
+                    continue
+                if lower:
+                    val = str(val).lower()
+                idx.setdefault(val, row_id)
+
+            self._col_indexes[key] = idx
+
+        return self._col_indexes[key]
+
+
+class LookupResolver:
+    """
+    Resolves column values to record ids and record ids to column values for
+    lookup (value list), administrative unit and related entity tables.
+    Value lists and administrative unit tables are loaded once into memory
+    and indexed both ways while the values of other entities are fetched in
+    batches using a single IN (...) query and retained in a bounded LRU
+    cache.
+    An instance should be shared by the objects participating in the same
+    session, e.g. all records of an import, and discarded (or cleared)
+    thereafter so that subsequent changes to the data are picked up.
+    """
+    # Entity types whose tables are loaded into memory in full
+    PRELOAD_TYPES = ('VALUE_LIST', 'ADMINISTRATIVE_SPATIAL_UNIT')
+
+    def __init__(self, cache_size=10000):
+        """
+        :param cache_size: Maximum number of records of related entities,
+        which are not loaded in full, to keep in memory.
+        :type cache_size: int
+        """
+        self._tables = {}
+        # (entity name, id) -> record
+        self._records = LRUCache(cache_size)
+        # (entity name, column, value, lower) -> id
+        self._ids = LRUCache(cache_size)
+        # Profile name -> {lookup column name: value list entity}
+        self._lookup_parents = {}
+
+    def clear(self, entity=None):
+        """
+        Discards the cached records.
+        :param entity: Entity whose records are to be discarded. If None,
+        then records of all entities are discarded.
+        :type entity: Entity
+        """
+        if entity is None:
+            self._tables.clear()
+            self._lookup_parents.clear()
+            self._records.clear()
+            self._ids.clear()
+
+            return
+
+        self._tables.pop(entity.name, None)
+        for cache in (self._records, self._ids):
+            for key in [k for k in cache if k[0] == entity.name]:
+                del cache[key]
+
+    @staticmethod
+    def _model(entity):
+        model = entity_model(entity, entity_only=True)
+        if model is None:
+            raise AttributeError(
+                '{0} table does not exist.'.format(entity.name)
+            )
+
+        return model
+
+    @staticmethod
+    def _row_to_dict(model, row):
+        return {c.name: getattr(row, c.name, None)
+                for c in model.__table__.columns}
+
+    def _query(self, model):
+        # Query returning the table columns instead of model objects
+        return model().queryObject(list(model.__table__.columns))
+
+    def _table_index(self, entity):
+        # Loads a value list or administrative unit table into memory
+        if entity.name not in self._tables:
+            model = self._model(entity)
+            rows = [self._row_to_dict(model, r)
+                    for r in self._query(model).all()]
+            self._tables[entity.name] = _TableIndex(rows)
+
+        return self._tables[entity.name]
+
+    def is_preloaded(self, entity):
+        """
+        :return: True if all the records of the entity are kept in memory.
+        :rtype: bool
+        """
+        return entity.TYPE_INFO in self.PRELOAD_TYPES
+
+    def load(self, *entities):
+        """
+        Loads the records of the given value list or administrative unit
+        entities into memory ahead of resolving values.
+        """
+        for e in entities:
+            if self.is_preloaded(e):
+                self._table_index(e)
+
+    def attrs_to_ids(self, entity, column, values, lower=False):
+        """
+        Resolves several values of a column to the ids of the corresponding
+        records. Values not in the cache are fetched in a single query.
+        :param entity: Entity whose table contains the column.
+        :type entity: Entity
+        :param column: Column name.
+        :type column: str
+        :param values: Values to be resolved.
+        :type values: list
+        :param lower: True to perform a case-insensitive match.
+        :type lower: bool
+        :return: Mapping of value to id. Values without a matching record
+        are not included.
+        :rtype: dict
+        """
+        values = [v for v in values if v is not None]
+
+        if self.is_preloaded(entity):
+            idx = self._table_index(entity).index(column, lower)
+            matches = {}
+            for v in values:
+                id_ = idx.get(str(v).lower() if lower else v, None)
+                if id_ is not None:
+                    matches[v] = id_
+
+            return matches
+
+        matches = {}
+        pending = []
+        for v in values:
+            key = (entity.name, column, v, lower)
+            if key in self._ids:
+                id_ = self._ids[key]
+                if id_ is not None:
+                    matches[v] = id_
+            elif v not in pending:
+                pending.append(v)
+
+        if len(pending) == 0:
+            return matches
+
+        model = self._model(entity)
+        model_col = getattr(model, column, None)
+        if model_col is None:
+            raise AttributeError('Specified column does not exist')
+
+        for i in range(0, len(pending), IN_CLAUSE_SIZE):
+            chunk = pending[i:i + IN_CLAUSE_SIZE]
+            if lower:
+                criterion = func.lower(model_col).in_(
+                    [str(v).lower() for v in chunk]
+                )
+            else:
+                criterion = model_col.in_(chunk)
+
+            found = {}
+            for r in self._query(model).filter(criterion).all():
+                rec = self._row_to_dict(model, r)
+                self._records[(entity.name, rec['id'])] = rec
+                val = rec[column]
+                if lower and val is not None:
+                    val = str(val).lower()
+                found.setdefault(val, rec['id'])
+
+            for v in chunk:
+                id_ = found.get(str(v).lower() if lower else v, None)
+                # Also cache misses to avoid querying for them again
+                self._ids[(entity.name, column, v, lower)] = id_
+                if id_ is not None:
+                    matches[v] = id_
+
+        return matches
+
+    def attr_to_id(self, entity, column, value, lower=False):
+        """
+        Resolves a column value to the id of the corresponding record. This
+        mirrors stdm.utils.util.entity_attr_to_id.
+        :return: The id of the record or the value if there is no matching
+        record.
+        """
+        return self.attrs_to_ids(
+            entity, column, [value], lower
+        ).get(value, value)
+
+    def records(self, entity, ids):
+        """
+        Fetches the records with the given ids. Records not in the cache
+        are fetched in a single query.
+        :param entity: Entity whose records are to be fetched.
+        :type entity: Entity
+        :param ids: Record ids.
+        :type ids: list
+        :return: Mapping of id to a dictionary of column name and value.
+        Ids without a corresponding record are not included.
+        :rtype: dict
+        """
+        ids = [i for i in ids if i is not None]
+
+        if self.is_preloaded(entity):
+            rows = self._table_index(entity).rows
+            return {i: rows[i] for i in ids if i in rows}
+
+        recs = {}
+        pending = []
+        for i in ids:
+            rec = self._records.get((entity.name, i), None)
+            if rec is not None:
+                recs[i] = rec
+            elif i not in pending:
+                pending.append(i)
+
+        if len(pending) == 0:
+            return recs
+
+        model = self._model(entity)
+        for j in range(0, len(pending), IN_CLAUSE_SIZE):
+            chunk = pending[j:j + IN_CLAUSE_SIZE]
+            res = self._query(model).filter(model.id.in_(chunk)).all()
+            for r in res:
+                rec = self._row_to_dict(model, r)
+                self._records[(entity.name, rec['id'])] = rec
+                recs[rec['id']] = rec
+
+        return recs
+
+    def ids_to_attrs(self, entity, column, ids):
+        """
+        Resolves several record ids to the values of the given column.
+        :return: Mapping of id to column value.
+        :rtype: dict
+        """
+        return {i: r.get(column, None)
+                for i, r in self.records(entity, ids).items()}
+
+    def id_to_attr(self, entity, column, id):
+        """
+        Resolves a record id to the value of the given column. This mirrors
+        stdm.utils.util.entity_id_to_attr.
+        :return: Column value or the id if there is no matching record.
+        """
+        rec = self.records(entity, [id]).get(id, None)
+        if rec is None:
+            return id
+
+        return rec.get(column, None)
+
+    def id_to_display_col(self, entity, column, id):
+        """
+        Converts the id in a foreign key column to the comma-separated
+        values of the display columns of the parent record. This mirrors
+        stdm.utils.util.entity_id_to_display_col.
+        :param entity: Entity containing the foreign key column.
+        :type entity: Entity
+        :param column: Foreign key column name.
+        :type column: str
+        :param id: Id of the parent record.
+        :type id: int
+        :rtype: str
+        """
+        relation = entity.columns[column].entity_relation
+        rec = self.records(relation.parent, [id]).get(id, None)
+        if rec is None:
+            return str(id)
+
+        return ', '.join(
+            [str(rec[c]) for c in relation.display_cols
+             if rec.get(c, None) is not None]
+        )
+
+    def lookup_id_to_value(self, profile, column, id):
+        """
+        Converts the id in a lookup column to the corresponding lookup
+        value. This mirrors stdm.utils.util.lookup_id_to_value.
+        :param profile: Profile containing the lookup column.
+        :type profile: Profile
+        :param column: Lookup column name.
+        :type column: str
+        :param id: Id of the lookup value.
+        :type id: int
+        :return: Lookup value or the id if no match is found.
+        """
+        parent_entity = self._lookup_parent_entity(profile, column)
+        if parent_entity is None:
+            return id
+
+        rec = self.records(parent_entity, [id]).get(id, None)
+        if rec is None:
+            return id
+
+        return rec.get('value', None)
+
+    def _lookup_parent_entity(self, profile, column):
+        parents = self._lookup_parents.get(profile.name, None)
+        if parents is None:
+            parents = {}
+            for r in profile.relations.values():
+                if 'check_' in r.parent.name:
+                    parents.setdefault(r.child_column, r.parent)
+            self._lookup_parents[profile.name] = parents
+
+        return parents.get(column, None)
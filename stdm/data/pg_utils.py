@@ -38,6 +38,11 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql.expression import text
 
 from stdm.data import globals
+from stdm.data.catalog import (
+    catalog_snapshot,
+    invalidate_catalog_snapshot,
+    is_ddl
+)
 from stdm.data.database import (
     STDMDb,
     Base
@@ -61,19 +66,22 @@ _text_col_types = ["character varying", "text"]
 VIEWS = 2500
 TABLES = 2501
 
+# Number of rows fetched at a time from a server-side cursor
+FETCH_SIZE = 2000
+
 
 def spatial_tables(exclude_views=False):
     """
     Returns a list of spatial table names in the STDM database.
     """
-    t = text("select DISTINCT f_table_name from geometry_columns")
-    result = _execute(t)
+    snapshot = catalog_snapshot()
+    if snapshot is None:
+        return []
 
     spTables = []
-    views = pg_views()
+    views = snapshot.views
 
-    for r in result:
-        spTable = r["f_table_name"]
+    for spTable in snapshot.spatial_tables():
         if exclude_views:
             tableIndex = getIndex(views, spTable)
             if tableIndex == -1:
@@ -90,15 +98,13 @@ def pg_tables(schema="public", exclude_lookups=False):
     Views are also excluded. See separate function for retrieving views.
     :rtype: list
     """
-    t = text("SELECT table_name FROM information_schema.tables WHERE table_schema = :tschema and table_type = :tbtype "
-             "ORDER BY table_name ASC")
-    result = _execute(t, tschema=schema, tbtype="BASE TABLE")
+    snapshot = catalog_snapshot(schema)
+    if snapshot is None:
+        return []
 
     pgTables = []
 
-    for r in result:
-        tableName = r["table_name"]
-
+    for tableName in snapshot.tables:
         # Remove default PostGIS tables
         tableIndex = getIndex(_postGISTables, tableName)
         if tableIndex != -1:
@@ -121,16 +127,13 @@ def pg_views(schema="public"):
     """
     Returns the views in the given schema minus the default PostGIS views.
     """
-    t = text("SELECT table_name FROM information_schema.tables WHERE table_schema = :tschema and table_type = :tbtype "
-             "ORDER BY table_name ASC")
-    result = _execute(t, tschema=schema, tbtype="VIEW")
+    snapshot = catalog_snapshot(schema)
+    if snapshot is None:
+        return []
 
     pgViews = []
 
-    for r in result:
-
-        viewName = r["table_name"]
-
+    for viewName in snapshot.views:
         # Remove default PostGIS tables
         viewIndex = getIndex(_postGISViews, viewName)
         if viewIndex == -1:
@@ -209,15 +212,14 @@ def pg_table_exists(table_name, include_views=True, schema="public"):
     currently connected database.
     :rtype: bool
     """
-    tables = pg_tables(schema=schema)
-    if include_views:
-        tables.extend(pg_views(schema=schema))
+    snapshot = catalog_snapshot(schema)
+    if snapshot is None:
+        return False
 
-    if getIndex(tables, table_name) == -1:
+    if table_name in _postGISTables or table_name in _postGISViews:
         return False
 
-    else:
-        return True
+    return snapshot.table_exists(table_name, include_views)
 
 
 def pg_table_record_count(table_name):
@@ -352,27 +354,14 @@ def table_column_names(tableName, spatialColumns=False, creation_order=False) ->
     If 'spatialColumns' then the function will lookup for spatial columns in the given
     table or view.
     """
-    if spatialColumns:
-        sql = "select f_geometry_column from geometry_columns where f_table_name = :tbname ORDER BY f_geometry_column ASC"
-        columnName = "f_geometry_column"
-    else:
-        if not creation_order:
-            sql = "select column_name from information_schema.columns where table_name = :tbname ORDER BY column_name ASC"
-            columnName = "column_name"
-        else:
-            sql = "select column_name from information_schema.columns where table_name = :tbname"
-            columnName = "column_name"
+    snapshot = catalog_snapshot()
+    if snapshot is None:
+        return []
 
-    t = text(sql)
-    result = _execute(t, tbname=tableName)
-
-    columnNames = []
-
-    for r in result:
-        colName = r[columnName]
-        columnNames.append(colName)
+    if spatialColumns:
+        return snapshot.geometry_columns(tableName)
 
-    return columnNames
+    return snapshot.column_names(tableName, creation_order)
 
 
 def non_spatial_table_columns(table):
@@ -410,21 +399,11 @@ def geometryType(tableName, spatialColumnName, schemaName="public"):
     Returns a tuple of geometry type and EPSG code of the given column name in
     the table within the given schema.
     """
-    sql = "select type,srid from geometry_columns where f_table_name = :tbname " \
-          "and f_geometry_column = :spcolumn and f_table_schema = :tbschema"
-    t = text(sql)
-
-    result = _execute(t, tbname=tableName, spcolumn=spatialColumnName, tbschema=schemaName)
-
-    geomType, epsg_code = "", -1
-
-    for r in result:
-        geomType = r["type"]
-        epsg_code = r["srid"]
+    snapshot = catalog_snapshot(schemaName)
+    if snapshot is None:
+        return "", -1
 
-        break
-
-    return geomType, epsg_code
+    return snapshot.geometry_type(tableName, spatialColumnName)
 
 
 def unique_column_values(tableName, columnName, quoteDataTypes=["character varying"]):
@@ -468,36 +447,29 @@ def columnType(tableName, columnName):
     """
     Returns the PostgreSQL data type of the specified column.
     """
-    view = tableName in pg_views()
-    if not view:
-        sql = "SELECT data_type FROM information_schema.columns where table_name='{}' AND column_name='{}'". \
-            format(tableName, columnName)
-    else:
-        # if ' ' in columnName:
-        #     columnName = u'"{}"'.format(columnName)
-        if '"' in columnName:
-            sql = 'SELECT pg_typeof({}) from {} limit 1;'.format(
-                columnName, tableName
-            )
-        else:
-            sql = 'SELECT pg_typeof("{}") from {} limit 1;'.format(
-                columnName, tableName
-            )
+    snapshot = catalog_snapshot()
+    if snapshot is None:
+        return ""
 
-    t = text(sql)
+    return snapshot.column_type(tableName, columnName)
 
-    result = _execute(t)
 
-    dataType = ""
-    for r in result:
-        if view:
-            if len(r) > 0:
-                dataType = r[0]
-        else:
-            dataType = r["data_type"]
+def column_types(table_name, schema="public"):
+    """
+    Returns the PostgreSQL data types of all the columns in the specified
+    table or view.
+    :param table_name: Name of the table or view.
+    :type table_name: str
+    :param schema: Schema containing the table.
+    :type schema: str
+    :return: Collection of column names and corresponding data types.
+    :rtype: dict
+    """
+    snapshot = catalog_snapshot(schema)
+    if snapshot is None:
+        return {}
 
-        break
-    return dataType
+    return snapshot.column_types(table_name)
 
 
 def columns_by_type(table, data_types):
@@ -514,8 +486,9 @@ def columns_by_type(table, data_types):
     cols = []
 
     table_cols = table_column_names(table)
+    col_types = column_types(table)
     for tc in table_cols:
-        col_type = columnType(table, tc)
+        col_type = col_types.get(tc, "")
         type_idx = getIndex(data_types, col_type)
 
         if type_idx != -1:
@@ -591,12 +564,73 @@ def _execute(sql, **kwargs):
         result = conn.execute(sql, **kwargs)
         trans.commit()
         conn.close()
+
+        if is_ddl(str(sql)):
+            # Refresh on next use even if the engine listener was removed
+            invalidate_catalog_snapshot()
+
         return result
     except SQLAlchemyError as db_error:
         trans.rollback()
         raise db_error
 
 
+def execute_batch(statements):
+    """
+    Executes the statements in order on one connection and in a single
+    transaction, which is rolled back if any of the statements fails.
+    :param statements: SQL statements, either as text or as tuples of the
+    statement and a dictionary of the corresponding bind parameters.
+    :type statements: list
+    """
+    if len(statements) == 0:
+        return
+
+    ddl = False
+    with STDMDb.instance().unit_of_work() as conn:
+        for stmt in statements:
+            params = {}
+            if isinstance(stmt, tuple):
+                stmt, params = stmt
+
+            if isinstance(stmt, str):
+                stmt = text(stmt)
+
+            conn.execute(stmt, **params)
+            ddl = ddl or is_ddl(str(stmt))
+
+    if ddl:
+        invalidate_catalog_snapshot()
+
+
+def fetch_in_batches(sql, batch_size=FETCH_SIZE, **kwargs):
+    """
+    Executes the query through a server-side cursor so that only
+    'batch_size' rows are held in memory at any given time.
+    :param sql: Query to execute.
+    :type sql: TextClause
+    :param batch_size: Number of rows fetched at a time.
+    :type batch_size: int
+    :return: Generator yielding lists of at most 'batch_size' rows.
+    :rtype: generator
+    """
+    conn = STDMDb.instance().engine.connect()
+    try:
+        result = conn.execution_options(stream_results=True).execute(
+            sql, **kwargs
+        )
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+
+            yield rows
+
+        result.close()
+    finally:
+        conn.close()
+
+
 def reset_content_roles():
     rolesSet = "truncate table content_base cascade;"
     _execute(text(rolesSet))
@@ -607,25 +641,28 @@ def reset_content_roles():
 def delete_table_keys(table):
     # clean_delete_table(table)
     capabilities = ["Create", "Select", "Update", "Delete"]
+    statements = []
     for action in capabilities:
         init_key = action + " " + str(table).title()
         sql = "DELETE FROM content_roles WHERE content_base_id IN" \
-              " (SELECT id FROM content_base WHERE name = '{0}');".format(init_key)
+              " (SELECT id FROM content_base WHERE name = :init_key);"
         sql2 = "DELETE FROM content_base WHERE content_base.id IN" \
-               " (SELECT id FROM content_base WHERE name = '{0}');".format(init_key)
-        r = text(sql)
-        r2 = text(sql2)
-        _execute(r)
-        _execute(r2)
-        Base.metadata._remove_table(table, 'public')
+               " (SELECT id FROM content_base WHERE name = :init_key);"
+        statements.append((sql, {'init_key': init_key}))
+        statements.append((sql2, {'init_key': init_key}))
+
+    execute_batch(statements)
+    Base.metadata._remove_table(table, 'public')
 
 
 def safely_delete_tables(tables):
+    execute_batch(
+        ["DROP TABLE  if exists {0} CASCADE".format(t) for t in tables]
+    )
+
     for table in tables:
-        sql = "DROP TABLE  if exists {0} CASCADE".format(table)
-        _execute(text(sql))
         Base.metadata._remove_table(table, 'public')
-        flush_session_activity()
+    flush_session_activity()
 
 
 def flush_session_activity():
@@ -684,49 +721,14 @@ def foreign_key_parent_tables(table_name, search_parent=True, filter_exp=None):
     name, corresponding foreign column name and constraint name.
     :rtype: list
     """
-    # Check if the view for listing foreign key references exists
-    fk_ref_view = pg_table_exists("foreign_key_references")
-
-    # Create if it does not exist
-    if not fk_ref_view:
-        script_path = PLUGIN_DIR + "/scripts/foreign_key_references.sql"
-
-        script_file = QFile(script_path)
-        if script_file.exists():
-            if not script_file.open(QIODevice.ReadOnly):
-                return None
-
-            reader = QTextStream(script_file)
-            sql = reader.readAll()
-            if sql:
-                t = text(sql)
-                _execute(t)
-
-        else:
-            return None
-
-    if search_parent:
-        ref_table = "foreign_table_name"
-        search_table = "table_name"
-    else:
-        ref_table = "table_name"
-        search_table = "foreign_table_name"
-
-    # Fetch foreign key references
-    sql = "SELECT column_name,{0},foreign_column_name, constraint_name FROM " \
-          "foreign_key_references where {1} =:tb_name".format(ref_table,
-                                                              search_table)
-
-    t = text(sql)
-    result = _execute(t, tb_name=table_name)
+    snapshot = catalog_snapshot()
+    if snapshot is None:
+        return None
 
     fk_refs = []
 
-    for r in result:
-        rel_table = r[ref_table]
-
-        fk_ref = r["column_name"], rel_table, \
-                 r["foreign_column_name"], r["constraint_name"]
+    for fk_ref in snapshot.foreign_keys(table_name, search_parent):
+        rel_table = fk_ref[1]
 
         if filter_exp is not None:
             if filter_exp.indexIn(rel_table) >= 0:
@@ -997,6 +999,7 @@ def set_child_dependencies_null_on_delete(table):
     if deps is None or len(deps) == 0:
         return False
 
+    statements = []
     for d in deps:
         local_col, fk_table, fk_col, fk_name = d[0], d[1], d[2], d[3]
 
@@ -1004,7 +1007,7 @@ def set_child_dependencies_null_on_delete(table):
         sql = 'ALTER TABLE {0} DROP CONSTRAINT IF EXISTS {1};'.format(
             fk_table, fk_name
         )
-        _execute(sql)
+        statements.append(sql)
 
         # Recreate constraint
         sql = 'ALTER TABLE {0} ADD CONSTRAINT {1} FOREIGN KEY ({2}) ' \
@@ -1015,7 +1018,10 @@ def set_child_dependencies_null_on_delete(table):
             table,
             local_col
         )
-        _execute(sql)
+        statements.append(sql)
+
+    # Constraints are only replaced if all of them can be recreated
+    execute_batch(statements)
 
     return True
 
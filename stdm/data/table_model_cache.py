@@ -0,0 +1,298 @@
+"""
+/***************************************************************************
+Name                 : TableModelCache
+Description          : Bounded cache of the table models used by the entity
+                       browser, which are discarded when the records of the
+                       corresponding tables change.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import select
+import sys
+import uuid
+from collections import OrderedDict
+
+from qgis.PyQt.QtCore import (
+    pyqtSignal,
+    QObject,
+    QTimer
+)
+from sqlalchemy.sql.expression import text
+
+LOGGER = logging.getLogger('stdm')
+
+# Default memory budget of the cache, in bytes
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Channel used to notify other STDM sessions of changes to a table
+NOTIFY_CHANNEL = 'stdm_table_changes'
+
+# Number of milliseconds between checks for notifications
+NOTIFY_POLL_INTERVAL = 2000
+
+# Number of rows sampled when estimating the size of a model
+_SIZE_SAMPLE_ROWS = 50
+
+# Identifies notifications sent by this QGIS session
+_SESSION_TOKEN = uuid.uuid4().hex
+
+
+def _list_size(rows):
+    # Approximate number of bytes held by the sampled rows
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for val in row:
+            size += sys.getsizeof(val)
+
+    return size
+
+
+def model_size(model):
+    """
+    Estimates the memory used by the rows of a BaseSTDMTableModel from a
+    sample of its rows.
+    :param model: Table model.
+    :type model: BaseSTDMTableModel
+    :return: Approximate size of the model, in bytes.
+    :rtype: int
+    """
+    num_rows = model.rowCount()
+    if num_rows == 0:
+        return sys.getsizeof(model)
+
+    sample = min(num_rows, _SIZE_SAMPLE_ROWS)
+    row_size = _list_size(model._initData[:sample])
+    if model._raw_values is not None:
+        row_size += _list_size(model._raw_values[:sample])
+
+    return sys.getsizeof(model) + int(row_size * num_rows / sample)
+
+
+class TableModelCache(QObject):
+    """
+    Holds the table models of entity browsers, keyed by table name, so that
+    records already fetched need not be fetched again when the browser is
+    reopened. The least recently used models are discarded once the
+    estimated size of the cached models exceeds the memory budget.
+    Models of a table are discarded when its records are saved, updated or
+    deleted through stdm.data.database.Model and, if enabled, when other
+    STDM sessions report changes to the table through PostgreSQL
+    LISTEN/NOTIFY.
+    """
+    # Raised with the table name when another session changes the table
+    table_changed = pyqtSignal(str)
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, parent=None):
+        """
+        :param max_bytes: Memory budget of the cache, in bytes.
+        :type max_bytes: int
+        """
+        QObject.__init__(self, parent)
+        self.max_bytes = max_bytes
+        # Table name -> (model, size)
+        self._models = OrderedDict()
+        self._size = 0
+        # Table name -> number of times its records have changed
+        self._versions = {}
+
+        self._listen_conn = None
+        self._timer = None
+
+    @property
+    def size(self):
+        """
+        :return: Estimated size of the cached models, in bytes.
+        :rtype: int
+        """
+        return self._size
+
+    def __contains__(self, table_name):
+        return table_name in self._models
+
+    def __len__(self):
+        return len(self._models)
+
+    def version(self, table_name):
+        """
+        :param table_name: Table name.
+        :type table_name: str
+        :return: Number which changes whenever the records of the table
+        change.
+        :rtype: int
+        """
+        return self._versions.get(table_name, 0)
+
+    def put(self, table_name, model, version=None):
+        """
+        Adds the table model to the cache, replacing any model of the same
+        table. Models larger than the memory budget are not cached.
+        :param table_name: Name of the table whose records are in the model.
+        :type table_name: str
+        :param model: Table model.
+        :type model: BaseSTDMTableModel
+        :param version: Version of the table when the records in the model
+        were fetched. The model is not cached if the records have since
+        changed.
+        :type version: int
+        """
+        self.take(table_name)
+
+        if version is not None and version != self.version(table_name):
+            return
+
+        size = model_size(model)
+        if size > self.max_bytes:
+            return
+
+        self._models[table_name] = (model, size)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            name, (_, evicted_size) = self._models.popitem(last=False)
+            self._size -= evicted_size
+            LOGGER.debug('Evicted table model of %s from the cache.', name)
+
+    def take(self, table_name):
+        """
+        Removes the model of the given table from the cache.
+        :param table_name: Table name.
+        :type table_name: str
+        :return: Table model or None if there is no model for the table.
+        :rtype: BaseSTDMTableModel
+        """
+        item = self._models.pop(table_name, None)
+        if item is None:
+            return None
+
+        model, size = item
+        self._size -= size
+
+        return model
+
+    def invalidate(self, table_name):
+        """
+        Discards the model of the given table since its records have
+        changed.
+        :param table_name: Table name.
+        :type table_name: str
+        """
+        self._versions[table_name] = self.version(table_name) + 1
+        self.take(table_name)
+
+    def clear(self):
+        """
+        Discards all the cached models.
+        """
+        self._models.clear()
+        self._size = 0
+
+    def notify(self, connection, table_name):
+        """
+        Notifies the other STDM sessions listening for changes that the
+        records of the given table have changed.
+        :param connection: Connection or session used to make the change.
+        :type connection: Connection
+        :param table_name: Table name.
+        :type table_name: str
+        """
+        if self._listen_conn is None:
+            return
+
+        connection.execute(
+            text('SELECT pg_notify(:channel, :payload)'),
+            {
+                'channel': NOTIFY_CHANNEL,
+                'payload': '{0}:{1}'.format(table_name, _SESSION_TOKEN)
+            }
+        )
+
+    def start_listening(self, engine, interval=NOTIFY_POLL_INTERVAL):
+        """
+        Listens for changes to tables reported by other STDM sessions. The
+        corresponding models are discarded and table_changed is raised so
+        that open browsers can reload their records.
+        :param engine: Engine of the STDM database.
+        :type engine: Engine
+        :param interval: Number of milliseconds between checks for
+        notifications.
+        :type interval: int
+        """
+        if self._listen_conn is not None:
+            return
+
+        # Dedicated connection, detached from the pool, in autocommit mode
+        raw_conn = engine.raw_connection()
+        raw_conn.detach()
+        conn = raw_conn.connection
+        conn.rollback()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute('LISTEN {0};'.format(NOTIFY_CHANNEL))
+        cursor.close()
+        self._listen_conn = conn
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._poll)
+        self._timer.start(interval)
+
+    def stop_listening(self):
+        """
+        Stops listening for changes reported by other STDM sessions.
+        """
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer.deleteLater()
+            self._timer = None
+
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception as ex:
+                LOGGER.debug(str(ex))
+            self._listen_conn = None
+
+    def _poll(self):
+        # Reads the pending notifications without blocking
+        conn = self._listen_conn
+        if conn is None:
+            return
+
+        try:
+            if select.select([conn], [], [], 0) == ([], [], []):
+                return
+            conn.poll()
+        except Exception as ex:
+            LOGGER.debug('Listening for table changes failed: %s', str(ex))
+            self.stop_listening()
+
+            return
+
+        changed = []
+        while conn.notifies:
+            n = conn.notifies.pop(0)
+            table_name, _, token = n.payload.rpartition(':')
+            if token == _SESSION_TOKEN or table_name in changed:
+                continue
+            changed.append(table_name)
+
+        for table_name in changed:
+            self.invalidate(table_name)
+            self.table_changed.emit(table_name)
+
+
+# Cache of the entity browser table models
+entity_table_models = TableModelCache()
@@ -0,0 +1,485 @@
+"""
+/***************************************************************************
+Name                 : BulkInstanceImporter
+Description          : Imports mobile instances into the database in chunks,
+                       each written in a single transaction, in a background
+                       task.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import os
+from collections import (
+    Counter,
+    namedtuple,
+    OrderedDict
+)
+
+from qgis.PyQt.QtCore import pyqtSignal
+from qgis.core import QgsTask
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from stdm.data.database import STDMDb
+from stdm.data.lookup_resolver import LookupResolver
+from stdm.data.table_model_cache import entity_table_models
+from stdm.geoodk.importer.entity_importer import Save2DB
+from stdm.geoodk.importer.geometry_builder import (
+    GeometryBuilder,
+    PendingGeometry
+)
+from stdm.geoodk.importer.import_journal import ImportJournal
+from stdm.geoodk.importer.import_log import ImportLogger
+from stdm.geoodk.importer.instance_parser import (
+    InstanceParser,
+    SOCIAL_TENURE
+)
+from stdm.settings import current_profile
+from stdm.settings.registryconfig import geoodk_parser_processes
+
+LOGGER = logging.getLogger('stdm')
+
+# Number of instances written to the database in one transaction
+IMPORT_CHUNK_SIZE = 100
+
+# Number of instance files read at a time
+PARSE_BATCH_SIZE = 1000
+
+"""
+Record, inserted by the bulk import, whose supporting documents are yet to
+be saved.
+"""
+PendingDocuments = namedtuple(
+    'PendingDocuments',
+    ['entity_name', 'record_id', 'entity_data', 'instance_file']
+)
+
+
+def repeated_entity_name(repeated_entity):
+    """
+    :param repeated_entity: Key of a repeated entity, which is the entity
+    name prefixed with the index of the repeat e.g. 0ha_household.
+    :type repeated_entity: str
+    :return: Name of the entity.
+    :rtype: str
+    """
+    # We are assuming that the number of repeat table cannot exceed 99
+    if repeated_entity[:2].isdigit():
+        return repeated_entity[2:]
+
+    return repeated_entity[1:]
+
+
+class BulkInstanceImporter:
+    """
+    Imports the attribute data of mobile instances in chunks. The records
+    of each chunk are grouped by entity and inserted with a single
+    executemany statement per entity, within one transaction, hence an
+    instance is either imported in full or not at all.
+    Ids are drawn from the sequences of the tables ahead of inserting the
+    records so that foreign keys referencing the parent records of an
+    instance are resolved in memory. Records are formatted by one Save2DB
+    instance per entity, which is created in the GUI thread by prepare().
+    Supporting documents can only be uploaded in the GUI thread hence the
+    records with documents are returned so that the documents are saved
+    once the chunk has been committed. Geometries of the chunk are built in
+    one batch, with the coordinate transforms created by prepare().
+    """
+
+    def __init__(self, profile_name, entities, lookup_resolver=None):
+        """
+        :param profile_name: Name of the profile element in the instance
+        files.
+        :type profile_name: str
+        :param entities: Names of the entities to be imported.
+        :type entities: list
+        :param lookup_resolver: Resolves lookup and admin unit values to
+        ids.
+        :type lookup_resolver: LookupResolver
+        """
+        self.profile_name = profile_name
+        self.entities = list(entities)
+        self.lookup_resolver = lookup_resolver
+        if self.lookup_resolver is None:
+            self.lookup_resolver = LookupResolver()
+        self.geometry_builder = GeometryBuilder()
+
+        self._profile = current_profile()
+        self._entity_names = [e.name for e in self._profile.user_entities()]
+
+        # Entity name -> Save2DB formatting the records of the entity
+        self._formatters = OrderedDict()
+
+        # Names of the tables into which records have been inserted
+        self.imported_tables = set()
+
+    def prepare(self):
+        """
+        Creates the record formatters of the entities, loads the lookup
+        tables referenced by their columns and creates the coordinate
+        transforms of their geometry columns. Must be called in the GUI
+        thread before importing.
+        """
+        for entity_name in self._entity_names + [SOCIAL_TENURE]:
+            if entity_name in self._formatters:
+                continue
+
+            formatter = Save2DB(
+                entity_name,
+                OrderedDict(),
+                {},
+                self.lookup_resolver,
+                with_documents=False,
+                geometry_builder=self.geometry_builder,
+                defer_geometries=True
+            )
+            if formatter.entity is None or formatter.model is None:
+                continue
+
+            for col in formatter.entity.columns.values():
+                if col.TYPE_INFO in ('LOOKUP', 'ADMIN_SPATIAL_UNIT'):
+                    self.lookup_resolver.load(col.parent)
+                elif col.TYPE_INFO == 'GEOMETRY':
+                    self.geometry_builder.transform(
+                        self.geometry_builder.target_srid(col.srid)
+                    )
+
+            self._formatters[entity_name] = formatter
+
+    def instance_records(self, instance):
+        """
+        :param instance: Attribute data of the instance.
+        :type instance: ParsedInstance
+        :return: Entity names and attribute data of the records of the
+        instance, in the order in which parent ids are resolved i.e. single
+        entities, repeated entities then social tenure relationships.
+        :rtype: list
+        """
+        records = []
+        for entity_name, entity_data in instance.entities.items():
+            if entity_name in self._formatters:
+                records.append((entity_name, entity_data))
+
+        for repeated_entity, entity_data in \
+                instance.repeated_entities.items():
+            entity_name = repeated_entity_name(repeated_entity)
+            if entity_name in self._formatters:
+                records.append((entity_name, entity_data))
+
+        # Social tenure relationships reference the records of the instance
+        if SOCIAL_TENURE in self._formatters and len(records) > 0:
+            if len(instance.str_entities) > 0:
+                records.append((SOCIAL_TENURE, instance.str_entities))
+            else:
+                for entity_data in instance.repeated_str_entities.values():
+                    records.append((
+                        SOCIAL_TENURE,
+                        OrderedDict([(SOCIAL_TENURE, entity_data)])
+                    ))
+
+        return records
+
+    def _table(self, entity_name):
+        return self._formatters[entity_name].model.__table__
+
+    def _allocate_ids(self, conn, entity_name, count):
+        # Draws ids for the records to be inserted from the table sequence
+        result = conn.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table_name, 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            table_name=self._table(entity_name).name,
+            count=count
+        )
+
+        return [r[0] for r in result]
+
+    def _insert_order(self, entity_names):
+        # Entity names sorted so that parents are inserted before the
+        # records referencing them
+        order = []
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+
+            entity = self._formatters[name].entity
+            for col in entity.columns.values():
+                if col.TYPE_INFO != 'FOREIGN_KEY' or col.parent is None:
+                    continue
+                if col.parent.name in entity_names:
+                    visit(col.parent.name)
+
+            order.append(name)
+
+        for name in entity_names:
+            if name != SOCIAL_TENURE:
+                visit(name)
+
+        if SOCIAL_TENURE in entity_names:
+            order.append(SOCIAL_TENURE)
+
+        return order
+
+    def import_instances(self, instances):
+        """
+        Inserts the records of the instances in a single transaction.
+        :param instances: Attribute data of the instances.
+        :type instances: list
+        :return: Records whose supporting documents are yet to be saved.
+        :rtype: list
+        """
+        instance_records = [
+            (instance, self.instance_records(instance))
+            for instance in instances
+        ]
+        counts = Counter(
+            name for _, records in instance_records for name, _ in records
+        )
+        if len(counts) == 0:
+            return []
+
+        # Entity name -> {columns: [values]}
+        table_rows = OrderedDict()
+        # Insert statement -> [values]
+        ms_rows = OrderedDict()
+        pending_docs = []
+
+        with STDMDb.instance().unit_of_work() as conn:
+            ids = {
+                name: iter(self._allocate_ids(conn, name, count))
+                for name, count in counts.items()
+            }
+
+            for instance, records in instance_records:
+                parent_ids = {}
+                for entity_name, entity_data in records:
+                    formatter = self._formatters[entity_name]
+                    record_id = next(ids[entity_name])
+                    formatter.set_record(entity_data, parent_ids)
+
+                    table = self._table(entity_name)
+                    values = OrderedDict(
+                        (k, v) for k, v in formatter.column_values().items()
+                        if k in table.c
+                    )
+                    values['id'] = record_id
+                    table_rows.setdefault(entity_name, OrderedDict()) \
+                        .setdefault(tuple(values.keys()), []).append(values)
+
+                    self._add_multiple_selection(formatter, record_id,
+                                                 ms_rows)
+
+                    if formatter.entity_has_supporting_docs() and \
+                            len(formatter.supporting_document_paths(
+                                instance.full_filename)) > 0:
+                        pending_docs.append(PendingDocuments(
+                            entity_name,
+                            record_id,
+                            entity_data,
+                            instance.full_filename
+                        ))
+
+                    if entity_name != SOCIAL_TENURE:
+                        parent_ids[entity_name] = [record_id, entity_name]
+
+            self._build_geometries(table_rows)
+
+            for entity_name in self._insert_order(list(table_rows.keys())):
+                table = self._table(entity_name)
+                for rows in table_rows[entity_name].values():
+                    conn.execute(table.insert(), rows)
+
+            for insert_stmt, rows in ms_rows.items():
+                conn.execute(text(insert_stmt), rows)
+
+            table_names = [self._table(n).name for n in table_rows]
+            for table_name in table_names:
+                entity_table_models.notify(conn, table_name)
+
+        self.imported_tables.update(table_names)
+
+        return pending_docs
+
+    def _build_geometries(self, table_rows):
+        # Replaces the pending geometries of the rows with their EWKB
+        geom_values = [
+            (row, k)
+            for rows_by_cols in table_rows.values()
+            for rows in rows_by_cols.values()
+            for row in rows
+            for k, v in row.items() if isinstance(v, PendingGeometry)
+        ]
+        if len(geom_values) == 0:
+            return
+
+        ewkbs = self.geometry_builder.build_all(
+            [row[k] for row, k in geom_values]
+        )
+        for (row, k), ewkb in zip(geom_values, ewkbs):
+            row[k] = ewkb
+
+    @staticmethod
+    def _add_multiple_selection(formatter, record_id, ms_rows):
+        # Rows of the association tables of the multiple select columns
+        for details in formatter.multiple_select_columns.values():
+            selection = details.get('selection', None)
+            if not selection:
+                continue
+
+            insert_stmt = 'INSERT INTO {0} ({1}, {2}) ' \
+                          'VALUES (:lookup_id, :parent_id)'.format(
+                              details['multiple_select_table_name'],
+                              details['lookup_table_name'] + '_id',
+                              details['entity_name'] + '_id'
+                          )
+            rows = ms_rows.setdefault(insert_stmt, [])
+            for lookup_id, _ in selection:
+                rows.append({'lookup_id': lookup_id, 'parent_id': record_id})
+
+    def save_documents(self, pending):
+        """
+        Uploads the supporting documents of a record which has been
+        imported. Must be called in the GUI thread.
+        :param pending: Record whose documents are to be saved.
+        :type pending: PendingDocuments
+        """
+        entity_add = Save2DB(
+            pending.entity_name,
+            pending.entity_data,
+            {},
+            self.lookup_resolver
+        )
+        entity_add.objects_from_supporting_doc(pending.instance_file)
+        entity_add.save_documents(pending.record_id)
+        entity_add.cleanup()
+
+    def invalidate_table_models(self):
+        """
+        Discards the cached table models of the tables into which records
+        have been imported. Must be called in the GUI thread.
+        """
+        for table_name in self.imported_tables:
+            entity_table_models.invalidate(table_name)
+
+
+class InstanceImportTask(QgsTask):
+    """
+    Reads and imports mobile instances, IMPORT_CHUNK_SIZE instances at a
+    time, in a background thread. Each chunk is committed in its own
+    transaction and its instances logged as imported hence, if the import
+    is canceled or fails, the committed chunks are skipped when the import
+    is run again.
+    """
+    # Raised with the number of instances imported once a chunk has been
+    # committed
+    chunk_imported = pyqtSignal(int)
+
+    def __init__(self, importer, instance_files,
+                 chunk_size=IMPORT_CHUNK_SIZE, processes=None):
+        """
+        :param importer: Prepared importer.
+        :type importer: BulkInstanceImporter
+        :param instance_files: Paths of the instance files.
+        :type instance_files: list
+        :param chunk_size: Number of instances imported in one transaction.
+        :type chunk_size: int
+        :param processes: Number of processes reading the instance files.
+        Read from the registry if not specified.
+        :type processes: int
+        """
+        QgsTask.__init__(self, 'Import mobile data', QgsTask.CanCancel)
+        self._importer = importer
+        self._instance_files = list(instance_files)
+        self._chunk_size = max(1, chunk_size)
+        if processes is None:
+            processes = geoodk_parser_processes()
+        self._processes = processes
+        self.num_imported = 0
+        self.pending_documents = []
+        self.error = ''
+
+    def run(self):
+        ImportLogger.log_action("Import started ...\n")
+
+        with ImportJournal() as journal, \
+                InstanceParser(self._importer.profile_name,
+                               self._importer.entities,
+                               self._processes) as parser:
+            # Instances imported since the files were listed are skipped
+            instance_files = [
+                f for f in self._instance_files
+                if os.path.isfile(f) and not journal.is_imported(f)
+            ]
+            num_files = len(instance_files)
+
+            for i in range(0, num_files, PARSE_BATCH_SIZE):
+                if self.isCanceled():
+                    return False
+
+                instances = parser.parse(
+                    instance_files[i:i + PARSE_BATCH_SIZE]
+                )
+                for j in range(0, len(instances), self._chunk_size):
+                    if self.isCanceled():
+                        return False
+
+                    chunk = instances[j:j + self._chunk_size]
+                    if not self._import_chunk(chunk, journal):
+                        return False
+
+                    self.num_imported += len(chunk)
+                    self.chunk_imported.emit(self.num_imported)
+                    self.setProgress(self.num_imported * 100.0 / num_files)
+
+        return True
+
+    def _import_chunk(self, chunk, journal):
+        # Imports the chunk then logs its instances as imported
+        try:
+            self.pending_documents.extend(
+                self._importer.import_instances(chunk)
+            )
+        except SQLAlchemyError as ae:
+            self.error = str(ae)
+            LOGGER.debug(self.error)
+            ImportLogger.log_action(self.error)
+
+            return False
+        except (AttributeError, KeyError, TypeError, ValueError) as fe:
+            # Values of an instance could not be formatted; the transaction
+            # of the chunk has been rolled back
+            self.error = 'Instances {0} to {1} could not be formatted: ' \
+                         '{2}: {3}'.format(
+                             chunk[0].filename,
+                             chunk[-1].filename,
+                             type(fe).__name__,
+                             str(fe)
+                         )
+            LOGGER.exception(self.error)
+            ImportLogger.log_action(self.error)
+
+            return False
+
+        for instance in chunk:
+            ImportLogger.log_action("File {} ...\n".format(
+                instance.filename
+            ))
+        journal.add_instances([instance.filename for instance in chunk])
+
+        return True
@@ -20,6 +20,7 @@ email                : stdm@unhabitat.org
 """
 import os
 import time
+from collections import OrderedDict
 
 from qgis.PyQt import QtCore 
 
@@ -32,16 +33,16 @@ from qgis.PyQt.QtXml import QDomDocument
 
 from stdm.data.configuration import entity_model
 from stdm.data.configuration.columns import GeometryColumn
+from stdm.data.importexport.coercion import CoercionPlan
+from stdm.data.lookup_resolver import LookupResolver
 from stdm.exceptions import DummyException
-from stdm.geoodk.importer.geometry_provider import STDMGeometry
+from stdm.geoodk.importer.geometry_builder import (
+    GeometryBuilder,
+    PendingGeometry
+)
 from stdm.settings import current_profile
 from stdm.ui.sourcedocument import SourceDocumentManager
 
-from stdm.utils.util import (
-    entity_attr_to_id, 
-    entity_attr_to_model
-)
-
 from stdm.data.pg_utils import (
     export_data,
     run_query
@@ -74,11 +75,12 @@ class EntityImporter():
     class constructor
     """
 
-    def __init__(self, instance):
+    def __init__(self, instance, lookup_resolver=None):
         """
         Initialize variables
         """
         self.instance = instance
+        self.lookup_resolver = lookup_resolver
         self.instance_doc = QDomDocument()
         self.set_instance_document(self.instance)
         self.key_watch = 0
@@ -133,7 +135,8 @@ class EntityImporter():
         :return:
         """
         if attributes and ids:
-            entity_add = Save2DB('social_tenure', attributes, ids)
+            entity_add = Save2DB('social_tenure', attributes, ids,
+                                 self.lookup_resolver)
             entity_add.objects_from_supporting_doc(self.instance)
             entity_add.save_to_db()
 
@@ -142,15 +145,40 @@ class Save2DB():
     """
     Class to insert entity data into db
     """
-    def __init__(self, entity_name:str, entity_data:DictWithOrder[FieldName, FieldValue], parent_data:ParentEntityData):
+    def __init__(self, entity_name:str, entity_data:DictWithOrder[FieldName, FieldValue], parent_data:ParentEntityData,
+                 lookup_resolver:LookupResolver=None, with_documents:bool=True,
+                 geometry_builder:GeometryBuilder=None, defer_geometries:bool=False):
         """
         Initialize class and class variable
-        """
+        :param lookup_resolver: Resolves lookup and admin unit values to
+        ids. It should be shared by all the records of an import so that
+        the lookup tables are only read once.
+        :param with_documents: False if the supporting documents of the
+        records will not be saved, in which case the document manager,
+        which requires the GUI thread, is not created.
+        :param geometry_builder: Builds the EWKB of geometry values. It
+        should be shared by all the records of an import so that the
+        coordinate transforms are only created once.
+        :param defer_geometries: True if geometry values are formatted as
+        PendingGeometry, to be built in a batch by the geometry builder,
+        instead of EWKB.
+        """
+        self.lookup_resolver = lookup_resolver
+        if self.lookup_resolver is None:
+            self.lookup_resolver = LookupResolver()
+        self.geometry_builder = geometry_builder
+        if self.geometry_builder is None:
+            self.geometry_builder = GeometryBuilder()
+        self._defer_geometries = defer_geometries
         self.entity_data = entity_data
         self.form_entity = entity_name
         self.doc_model = None
         self._doc_manager = None
+        self._with_documents = with_documents
+        # Lookup table name -> lookup records of multiple select columns
+        self._ms_lookup_values = {}
         self.entity = self.object_from_entity_name(entity_name)
+        self.coercion_plan = CoercionPlan(self.entity)
         self.model = self.dbmodel_from_entity()
         self.key = 0
         self.parent_data = parent_data
@@ -194,7 +222,7 @@ class Save2DB():
         Format model attributes from passed entity attributes
         :return:
         """
-        if self.entity_has_supporting_docs():
+        if self.entity_has_supporting_docs() and self._with_documents:
             entity_object, self.doc_model = entity_model(self.entity, with_supporting_document=True)
             if entity_object is None:
                 return
@@ -220,15 +248,47 @@ class Save2DB():
         :rtype: document object instance
         """
         if instance_file:
-            f_dir, file_name = os.path.split(instance_file)
-            for document, val in self.entity_data.items():
-                if str(document).endswith('supporting_document'):
-                    if val != '':
-                        doc = self.format_document_name_from_attribute(document)
-                        doc_path = os.path.normpath(f_dir + '/' + val)
-                        abs_path = doc_path.replace('\\', '/').strip()
-                        if QFile.exists(abs_path):
-                            self.supporting_document_model(abs_path, doc)
+            for document, abs_path in self.supporting_document_paths(instance_file):
+                doc = self.format_document_name_from_attribute(document)
+                self.supporting_document_model(abs_path, doc)
+
+    def supporting_document_paths(self, instance_file):
+        """
+        Get the supporting documents collected for the record which exist
+        in the instance folder
+        :param instance_file: Path of the instance file
+        :type instance_file: str
+        :return: Attribute names and absolute paths of the documents
+        :rtype: list
+        """
+        paths = []
+        f_dir, file_name = os.path.split(instance_file)
+        for document, val in self.entity_data.items():
+            if str(document).endswith('supporting_document'):
+                if val != '':
+                    doc_path = os.path.normpath(f_dir + '/' + val)
+                    abs_path = doc_path.replace('\\', '/').strip()
+                    if QFile.exists(abs_path):
+                        paths.append((document, abs_path))
+        return paths
+
+    def save_documents(self, record_id):
+        """
+        Save the supporting documents, added by objects_from_supporting_doc,
+        of a record that has already been inserted into the database
+        :param record_id: Id of the record
+        :type record_id: int
+        """
+        if self._doc_manager is None:
+            return
+        documents = self._doc_manager.model_objects()
+        if len(documents) == 0:
+            return
+        record = self.model.queryObject().get(record_id)
+        if record is None:
+            return
+        record.documents = documents
+        record.update()
 
     def supporting_document_model(self, doc_path, doc):
         """
@@ -241,7 +301,7 @@ class Save2DB():
         # Create document container
         doc_container = QVBoxLayout()
         supporting_doc_entity = self.entity.supporting_doc.document_type_entity
-        document_type_id = entity_attr_to_id(supporting_doc_entity, 'value', doc, lower=False)
+        document_type_id = self.lookup_resolver.attr_to_id(supporting_doc_entity, 'value', doc, lower=False)
         # Register container
         self._doc_manager.registerContainer(
             doc_container,
@@ -278,46 +338,67 @@ class Save2DB():
         else:
             return formatted_doc_list[0]
 
-    def save_to_db(self):
+    def set_record(self, entity_data:DictWithOrder[FieldName, FieldValue], parent_data:ParentEntityData):
         """
-        Format object attribute data from entity and save them into database
-        :return:
+        Set the attribute data of the next record so that the same instance,
+        with its entity model and coercion plan, formats several records
+        :param entity_data: Attribute data of the record
+        :param parent_data: Ids of the parent records
         """
-        self.column_info()
+        self.entity_data = entity_data
+        self.parent_data = parent_data
+        self.key = 0
+        for details in self.multiple_select_columns.values():
+            details.pop('selection', None)
 
-        attributes = self.entity_data
+    def social_tenure_references(self):
+        """
+        Get the party and spatial unit columns of the social tenure
+        relationship and the ids of the referenced records
+        :return: Column names and ids
+        :rtype: OrderedDict
+        """
+        references = OrderedDict()
+        list_val = list(self.entity_data.values())[0]
+        prefix  = current_profile().prefix + '_'
+        if 'party' in list_val.keys():
+            full_party_ref_column = list_val.get('party')
+            party_ref_column = full_party_ref_column + '_id'
 
-        try:
-            if self.entity.short_name == 'social_tenure_relationship':
-                # try
-                list_val = list(self.entity_data.values())[0]
-                prefix  = current_profile().prefix + '_'
-                full_party_ref_column = ''
-                full_spatial_ref_ = ''
-                if 'party' in list_val.keys():
-                    full_party_ref_column = list_val.get('party')
-                    party_ref_column = full_party_ref_column + '_id'
+        else:
+            full_party_ref_column = current_profile().social_tenure.parties[0].name
+            party_ref_column = full_party_ref_column.replace(prefix, '') + '_id'
 
-                else:
-                    full_party_ref_column = current_profile().social_tenure.parties[0].name
-                    party_ref_column = full_party_ref_column.replace(prefix, '') + '_id'
+        references[party_ref_column] = self.parent_data.get(full_party_ref_column)[0]
 
-                setattr(self.model, party_ref_column, self.parent_data.get(full_party_ref_column)[0])
+        if 'spatial_unit' in list_val.keys():
+            full_spatial_ref_column = list_val.get('spatial_unit')
+            spatial_ref_column = full_spatial_ref_column + '_id'
 
-                if 'spatial_unit' in list_val.keys():
-                    full_spatial_ref_ = list_val.get('spatial_unit')
-                    spatial_ref_column = full_spatial_ref_ + '_id'
+        else:
+            full_spatial_ref_column = current_profile().social_tenure.spatial_units[0].name
+            spatial_ref_column = full_spatial_ref_column.replace(prefix, '') + '_id'
 
-                else:
-                    full_spatial_ref_column = current_profile().social_tenure.spatial_units[0].name
-                    spatial_ref_column = full_spatial_ref_column.replace(prefix, '') + '_id'
+        references[spatial_ref_column] = self.parent_data.get(full_spatial_ref_column)[0]
+
+        return references
 
-                setattr(self.model, spatial_ref_column, self.parent_data.get(full_spatial_ref_column)[0])
+    def column_values(self):
+        """
+        Format the attribute data of the record to conform to the entity
+        columns without saving it. Values of multiple select columns are
+        resolved into the 'selection' of the multiple select columns.
+        :return: Column names and formatted values
+        :rtype: OrderedDict
+        """
+        self.column_info()
 
-                attributes = self.entity_data['social_tenure']
+        values = OrderedDict()
+        attributes = self.entity_data
 
-        except DummyException:
-            pass
+        if self.entity.short_name == 'social_tenure_relationship':
+            values.update(self.social_tenure_references())
+            attributes = self.entity_data['social_tenure']
 
         for k, v in attributes.items():
             # Check for multiple select column
@@ -328,8 +409,17 @@ class Save2DB():
             if hasattr(self.model, k):
                 col_type = self.entity_mapping.get(k)
                 col_prop = self.entity.columns[k]
-                var = self.attribute_formatter(col_type, col_prop, v)
-                setattr(self.model, k, var)
+                values[k] = self.attribute_formatter(col_type, col_prop, v)
+
+        return values
+
+    def save_to_db(self):
+        """
+        Format object attribute data from entity and save them into database
+        :return:
+        """
+        for k, v in self.column_values().items():
+            setattr(self.model, k, v)
 
         if self.entity_has_supporting_docs():
             if self._doc_manager:
@@ -410,39 +500,32 @@ class Save2DB():
         :return:
         """
         if col_type == 'BOOL':
-            if len(var) < 1:
-                return None
-            if len(var) > 1:
-                if var == '' or var is None:
-                    return None
-                if var == 'Yes' or (isinstance(var, bool) and var):
-                    return True
-                if var == 'No' or (isinstance(var, bool) and not var):
-                    return False
-            else:
+            if var is None or len(var) < 2:
                 return None
+            var = self.coercion_plan.coerce(col_prop.name, var)
+            if isinstance(var, bool):
+                return var
+            return None
 
         if col_type == 'LOOKUP':
             if len(var) < 1 or var is None:
                 return None
+            resolver = self.lookup_resolver
             if len(var) < 4:
                 if var == 'Yes' or var == 'No':
-                    return entity_attr_to_model(col_prop.parent, 'value', var).id
+                    return resolver.attrs_to_ids(col_prop.parent, 'value', [var]).get(var)
                 if var != 'Yes' and var != 'No':
-                    lk_code = entity_attr_to_id(col_prop.parent, "code", var)
+                    lk_code = resolver.attr_to_id(col_prop.parent, "code", var)
                     if not str(lk_code).isdigit():
                         return None
                     else:
                         return lk_code
 
             if len(var) > 3:
-                if not str(entity_attr_to_id(col_prop.parent, 'code', var)).isdigit():
-                    id_value = entity_attr_to_model(col_prop.parent, 'value', var)
-                    if id_value is not None:
-                        return id_value.id
-                    # return entity_attr_to_model(col_prop.parent, 'value', var).id
+                if not str(resolver.attr_to_id(col_prop.parent, 'code', var)).isdigit():
+                    return resolver.attrs_to_ids(col_prop.parent, 'value', [var]).get(var, None)
                 else:
-                    lk_code = entity_attr_to_id(col_prop.parent, "code", var)
+                    lk_code = resolver.attr_to_id(col_prop.parent, "code", var)
                     if not str(lk_code).isdigit():
                         return None
                     else:
@@ -451,25 +534,26 @@ class Save2DB():
                 return None
         elif col_type == 'ADMIN_SPATIAL_UNIT':
             var_code = None
+            resolver = self.lookup_resolver
             try:
                 if len(var) < 1 or var is None:
                     return None
                 elif not len(var) > 3:
-                    var_code = entity_attr_to_id(col_prop.parent, "code", var)
+                    var_code = resolver.attr_to_id(col_prop.parent, "code", var)
                     if var_code and var_code == var:
                         return None
                     else:
                         return var_code
 
-                elif len(var) > 3 and entity_attr_to_id(col_prop.parent, "name", var) is not None:
-                    var_code = entity_attr_to_id(col_prop.parent, "name", var)
+                elif len(var) > 3 and resolver.attr_to_id(col_prop.parent, "name", var) is not None:
+                    var_code = resolver.attr_to_id(col_prop.parent, "name", var)
                     if var_code and var_code == var:
                         return None
                     else:
                         return var_code
                 else:
-                    if entity_attr_to_id(col_prop.parent, "name", var) is None:
-                        var_code = entity_attr_to_id(col_prop.parent, "code", var)
+                    if resolver.attr_to_id(col_prop.parent, "name", var) is None:
+                        var_code = resolver.attr_to_id(col_prop.parent, "code", var)
                         if not var_code or var_code == var:
                             return None
             except DummyException:
@@ -480,11 +564,10 @@ class Save2DB():
                 return None
             else:
                 col_parent = col_prop.association.first_parent
-                lk_val_list = list(col_parent.values.values())
-                choices_list = []
-                for code in lk_val_list:
-                    choices_list.append(entity_attr_to_id(
-                        col_parent.association.first_parent, 'value', code.value))
+                lk_val_list = [code.value for code in col_parent.values.values()]
+                value_ids = self.lookup_resolver.attrs_to_ids(
+                    col_parent.association.first_parent, 'value', lk_val_list)
+                choices_list = [value_ids.get(v, v) for v in lk_val_list]
 
                 if len(choices_list) > 1:
                     return choices_list
@@ -492,19 +575,15 @@ class Save2DB():
                     return None
 
         elif col_type == 'GEOMETRY':
-            defualt_srid = 0
+            defualt_srid = GEOMPARAM
             if var:
-                geom_provider = STDMGeometry(var)
                 if isinstance(col_prop, GeometryColumn):
                     defualt_srid = col_prop.srid
-                if defualt_srid != 0:
-                    geom_provider.set_user_srid(defualt_srid)
-                else:
-                    geom_provider.set_user_srid(GEOMPARAM)
-                if col_prop.geometry_type() == 'POINT':
-                    return geom_provider.point_to_Wkt()
-                if col_prop.geometry_type() == 'POLYGON':
-                    return geom_provider.polygon_to_Wkt()
+                pending = PendingGeometry(var, col_prop.geometry_type(),
+                                          defualt_srid)
+                if self._defer_geometries:
+                    return pending
+                return self.geometry_builder.build(*pending)
             else:
                 return None
 
@@ -517,17 +596,8 @@ class Save2DB():
                     break
             return ret_val
 
-        elif col_type == 'INT' or col_type == 'DOUBLE' or col_type == 'PERCENT':
-            ret_val = None
-            if var != '':
-                ret_val = var
-            return ret_val
-
-        elif col_type == 'DATETIME' or col_type == 'DATE':
-            ret_val = None
-            if var != '':
-                ret_val = var
-            return ret_val
+        elif col_type in ('INT', 'DOUBLE', 'PERCENT', 'DATETIME', 'DATE'):
+            return self.coercion_plan.coerce(col_prop.name, var)
         else:
             return var
 
@@ -574,8 +644,11 @@ class Save2DB():
         :type selected_value: str
         """
         lookup_table = self.multiple_select_columns[field]['lookup_table_name']
-        lookup_data = export_data(lookup_table)
-        lookup_values = lookup_data.fetchall()
+        lookup_values = self._ms_lookup_values.get(lookup_table, None)
+        if lookup_values is None:
+            lookup_data = export_data(lookup_table)
+            lookup_values = lookup_data.fetchall()
+            self._ms_lookup_values[lookup_table] = lookup_values
 
         values = [f for f in lookup_values]
         sel_list = selected_value.split(' ')
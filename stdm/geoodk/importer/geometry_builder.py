@@ -0,0 +1,327 @@
+"""
+/***************************************************************************
+Name                 : GeometryBuilder
+Description          : Builds the geometries of mobile instances, in batches,
+                       as EWKB ready to be inserted in the database.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import binascii
+import logging
+import re
+import struct
+from collections import (
+    namedtuple,
+    OrderedDict
+)
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCsException,
+    QgsGeometry,
+    QgsProject
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# SRID of the coordinates captured by the mobile devices
+SOURCE_SRID = 4326
+
+# Number of decimal places of the captured coordinates which are kept
+COORDINATE_PRECISION = 6
+
+# WKB geometry type codes
+WKB_TYPES = {
+    'POINT': 1,
+    'LINESTRING': 2,
+    'POLYGON': 3,
+    'MULTIPOINT': 4,
+    'MULTILINESTRING': 5,
+    'MULTIPOLYGON': 6
+}
+
+# Flag of the geometry type code of EWKB values which include an SRID
+EWKB_SRID_FLAG = 0x20000000
+
+# Minimum number of vertices, including the closing vertex of rings
+MIN_LINE_VERTICES = 2
+MIN_RING_VERTICES = 4
+
+# A vertex of a geopoint, geotrace or geoshape value is made of the
+# latitude, longitude, altitude and accuracy separated by whitespace, and
+# vertices are separated by semicolons. Only the latitude and longitude
+# are read.
+_VERTEX = re.compile(
+    r'([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s+'
+    r'([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)[^;]*'
+)
+
+"""
+Geometry value of an instance whose EWKB is yet to be built, so that the
+geometries of several instances can be built in one batch.
+"""
+PendingGeometry = namedtuple(
+    'PendingGeometry',
+    ['coordinates', 'geometry_type', 'srid']
+)
+
+
+def parse_vertices(coordinates):
+    """
+    Reads the vertices of a geopoint, geotrace or geoshape value.
+    :param coordinates: Coordinates captured by the mobile device.
+    :type coordinates: str
+    :return: Longitude and latitude of each vertex, rounded to
+    COORDINATE_PRECISION decimal places.
+    :rtype: list
+    """
+    return [
+        (round(float(lon), COORDINATE_PRECISION),
+         round(float(lat), COORDINATE_PRECISION))
+        for lat, lon in _VERTEX.findall(coordinates)
+    ]
+
+
+def repair_vertices(vertices, geometry_type):
+    """
+    Removes repeated consecutive vertices and closes the ring of polygons.
+    :param vertices: Longitude and latitude of each vertex.
+    :type vertices: list
+    :param geometry_type: Type of the geometry column e.g. 'POLYGON'.
+    :type geometry_type: str
+    :return: Repaired vertices or None if there are too few vertices for
+    the geometry type.
+    :rtype: list
+    """
+    if geometry_type in ('POINT', 'MULTIPOINT'):
+        return vertices if len(vertices) > 0 else None
+
+    repaired = [
+        v for i, v in enumerate(vertices)
+        if i == 0 or v != vertices[i - 1]
+    ]
+
+    if geometry_type in ('POLYGON', 'MULTIPOLYGON'):
+        if len(repaired) > 0 and repaired[0] != repaired[-1]:
+            repaired.append(repaired[0])
+        min_vertices = MIN_RING_VERTICES
+    else:
+        min_vertices = MIN_LINE_VERTICES
+
+    if len(repaired) < min_vertices:
+        return None
+
+    return repaired
+
+
+def _pack_points(vertices):
+    # Number of points followed by their coordinates
+    return struct.pack(
+        '<I{0}d'.format(len(vertices) * 2),
+        len(vertices),
+        *[c for v in vertices for c in v]
+    )
+
+
+def vertices_to_wkb(vertices, geometry_type):
+    """
+    :param vertices: Longitude and latitude of each vertex, as returned by
+    repair_vertices.
+    :type vertices: list
+    :param geometry_type: Type of the geometry column e.g. 'POLYGON'.
+    :type geometry_type: str
+    :return: Little-endian WKB of the geometry. Multi-part types contain a
+    single part except for multi points, which contain each vertex.
+    :rtype: bytes
+    """
+    if geometry_type == 'POINT':
+        return struct.pack('<BI2d', 1, 1, *vertices[0])
+
+    if geometry_type == 'LINESTRING':
+        return struct.pack('<BI', 1, 2) + _pack_points(vertices)
+
+    if geometry_type == 'POLYGON':
+        return struct.pack('<BII', 1, 3, 1) + _pack_points(vertices)
+
+    if geometry_type == 'MULTIPOINT':
+        return struct.pack('<BII', 1, 4, len(vertices)) + b''.join(
+            struct.pack('<BI2d', 1, 1, *v) for v in vertices
+        )
+
+    part_type = 'LINESTRING' if geometry_type == 'MULTILINESTRING' \
+        else 'POLYGON'
+
+    return struct.pack('<BII', 1, WKB_TYPES[geometry_type], 1) + \
+        vertices_to_wkb(vertices, part_type)
+
+
+def wkb_to_ewkb(wkb, srid):
+    """
+    :param wkb: WKB of a geometry.
+    :type wkb: bytes
+    :param srid: SRID of the geometry.
+    :type srid: int
+    :return: EWKB of the geometry, as a hex string which is accepted by
+    ST_GeomFromEWKT in place of EWKT.
+    :rtype: str
+    """
+    byte_order = '<' if wkb[0] == 1 else '>'
+    wkb_type = struct.unpack(byte_order + 'I', wkb[1:5])[0]
+    ewkb = wkb[:1] + struct.pack(
+        byte_order + 'II',
+        wkb_type | EWKB_SRID_FLAG,
+        srid
+    ) + wkb[5:]
+
+    return binascii.hexlify(ewkb).decode('ascii')
+
+
+class GeometryBuilder:
+    """
+    Builds the EWKB of the geopoint, geotrace and geoshape values of mobile
+    instances. The vertices are read with a single regular expression and
+    packed directly into WKB. Geometries are only loaded in QGIS when they
+    need to be reprojected, using the coordinate transform of the target
+    SRID which is created once for the builder. It should therefore be
+    shared by all the records of an import.
+
+        builder = GeometryBuilder()
+        values = builder.build_all([
+            PendingGeometry(coordinates, 'POLYGON', 32736),
+            ...
+        ])
+    """
+
+    def __init__(self, source_srid=SOURCE_SRID):
+        """
+        :param source_srid: SRID of the captured coordinates.
+        :type source_srid: int
+        """
+        self.source_srid = source_srid
+        # SRID -> QgsCoordinateTransform or None if no transform is required
+        self._transforms = {}
+
+    def target_srid(self, srid):
+        """
+        :param srid: SRID of a geometry column, zero if it is not set.
+        :type srid: int
+        :return: SRID of the geometries written to the column.
+        :rtype: int
+        """
+        srid = int(srid or 0)
+
+        return srid if srid > 0 else self.source_srid
+
+    def transform(self, srid):
+        """
+        :param srid: Target SRID.
+        :type srid: int
+        :return: Transform from the source to the target SRID, or None if
+        the SRIDs are the same or the target SRID is unknown.
+        :rtype: QgsCoordinateTransform
+        """
+        if srid in self._transforms:
+            return self._transforms[srid]
+
+        transform = None
+        if srid != self.source_srid:
+            target_crs = QgsCoordinateReferenceSystem.fromEpsgId(srid)
+            if target_crs.isValid():
+                transform = QgsCoordinateTransform(
+                    QgsCoordinateReferenceSystem.fromEpsgId(
+                        self.source_srid
+                    ),
+                    target_crs,
+                    QgsProject.instance()
+                )
+            else:
+                LOGGER.debug('Unknown SRID %s, geometries will not be '
+                             'reprojected', srid)
+        self._transforms[srid] = transform
+
+        return transform
+
+    def _reproject(self, wkb, transform):
+        geom = QgsGeometry()
+        geom.fromWkb(wkb)
+        try:
+            geom.transform(transform)
+        except QgsCsException as cse:
+            LOGGER.debug('Geometry could not be reprojected: %s', str(cse))
+            return None
+
+        return bytes(geom.asWkb())
+
+    def build(self, coordinates, geometry_type, srid):
+        """
+        :param coordinates: Coordinates captured by the mobile device.
+        :type coordinates: str
+        :param geometry_type: Type of the geometry column e.g. 'POLYGON'.
+        :type geometry_type: str
+        :param srid: SRID of the geometry column, zero if it is not set.
+        :type srid: int
+        :return: EWKB of the geometry as a hex string or None if there are
+        too few vertices for the geometry type.
+        :rtype: str
+        """
+        return self.build_all([
+            PendingGeometry(coordinates, geometry_type, srid)
+        ])[0]
+
+    def build_all(self, geometries):
+        """
+        Builds the EWKB of several geometries, which are grouped by target
+        SRID so that each group is reprojected with the same transform.
+        :param geometries: Geometry values of the instances.
+        :type geometries: list
+        :return: EWKB of each geometry as a hex string, None for the
+        geometries with too few vertices or of an unsupported type.
+        :rtype: list
+        """
+        values = [None] * len(geometries)
+        # Target SRID -> [(index, WKB)]
+        srid_wkbs = OrderedDict()
+
+        for i, pending in enumerate(geometries):
+            geometry_type = pending.geometry_type
+            if geometry_type not in WKB_TYPES or not pending.coordinates:
+                continue
+
+            vertices = repair_vertices(
+                parse_vertices(pending.coordinates),
+                geometry_type
+            )
+            if vertices is None:
+                LOGGER.debug('Too few vertices for a %s: %s', geometry_type,
+                             pending.coordinates)
+                continue
+
+            srid_wkbs.setdefault(self.target_srid(pending.srid), []).append(
+                (i, vertices_to_wkb(vertices, geometry_type))
+            )
+
+        for srid, wkbs in srid_wkbs.items():
+            transform = self.transform(srid)
+            if transform is None:
+                srid = self.source_srid
+            for i, wkb in wkbs:
+                if transform is not None:
+                    wkb = self._reproject(wkb, transform)
+                    if wkb is None:
+                        continue
+                values[i] = wkb_to_ewkb(wkb, srid)
+
+        return values
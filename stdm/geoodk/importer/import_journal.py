@@ -0,0 +1,251 @@
+"""
+/***************************************************************************
+Name                 : ImportJournal
+Description          : Append-only journal, in a local SQLite file, of the
+                       mobile instances which have been imported.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+from stdm.geoodk.importer.import_log import LOGGER_HOME
+
+LOGGER = logging.getLogger('stdm')
+
+JOURNAL_FILE = 'import_journal.sqlite'
+LEGACY_JSON_FILE = 'import_log.json'
+LEGACY_HISTORY_FILE = 'history.txt'
+
+# Maximum number of values in a single IN (...) clause
+IN_CLAUSE_SIZE = 500
+
+# Header preceding the path of an imported instance in history.txt
+_HISTORY_ENTRY = 'File instance '
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS imported_instances ('
+    'file_name TEXT PRIMARY KEY, '
+    'instance_uuid TEXT, '
+    'imported_on TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS idx_imported_instances_uuid '
+    'ON imported_instances (instance_uuid)',
+    'CREATE TABLE IF NOT EXISTS journal_info ('
+    'key TEXT PRIMARY KEY, '
+    'value TEXT)'
+)
+
+
+def instance_uuid(file_name):
+    """
+    :param file_name: Name of an instance file, which is renamed after the
+    instance UUID when the instances are enumerated.
+    :type file_name: str
+    :return: UUID of the instance or None if the file has not been renamed.
+    :rtype: str
+    """
+    base_name = os.path.splitext(os.path.basename(file_name))[0]
+    if base_name.startswith('uuid'):
+        return base_name
+
+    return None
+
+
+class ImportJournal:
+    """
+    Records the instance files which have been imported in a SQLite
+    database, indexed by file name and instance UUID, in place of the JSON
+    import log which was read and written in full for each instance.
+    Entries are only ever added. On first use, the instances recorded in
+    the JSON log and in history.txt are copied into the journal.
+    A journal should be used by one thread only.
+
+        with ImportJournal() as journal:
+            if not journal.is_imported(file_name):
+                ...
+                journal.add_instances([file_name])
+    """
+
+    def __init__(self, journal_dir=LOGGER_HOME):
+        """
+        :param journal_dir: Directory containing the journal and the
+        legacy log files.
+        :type journal_dir: str
+        """
+        self.journal_dir = journal_dir
+        if not os.access(journal_dir, os.F_OK):
+            os.makedirs(str(journal_dir))
+
+        self._conn = sqlite3.connect(
+            os.path.join(journal_dir, JOURNAL_FILE),
+            timeout=30
+        )
+        with self._conn:
+            for stmt in _SCHEMA:
+                self._conn.execute(stmt)
+
+        if self._info('migrated') is None:
+            self.migrate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Closes the journal database.
+        """
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _info(self, key):
+        row = self._conn.execute(
+            'SELECT value FROM journal_info WHERE key = ?',
+            (key,)
+        ).fetchone()
+
+        return None if row is None else row[0]
+
+    @staticmethod
+    def log_date():
+        """
+        :return: Current date and time in the format used by the import log.
+        :rtype: str
+        """
+        return datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+    def is_imported(self, file_name):
+        """
+        :param file_name: Name or path of an instance file.
+        :type file_name: str
+        :return: True if the instance, identified by its file name or UUID,
+        has been imported.
+        :rtype: bool
+        """
+        file_name = os.path.basename(file_name)
+        row = self._conn.execute(
+            'SELECT 1 FROM imported_instances WHERE file_name = ? LIMIT 1',
+            (file_name,)
+        ).fetchone()
+        if row is not None:
+            return True
+
+        uuid = instance_uuid(file_name)
+        if uuid is None:
+            return False
+
+        row = self._conn.execute(
+            'SELECT 1 FROM imported_instances WHERE instance_uuid = ? '
+            'LIMIT 1',
+            (uuid,)
+        ).fetchone()
+
+        return row is not None
+
+    def imported_files(self, file_names):
+        """
+        :param file_names: Names of instance files.
+        :type file_names: list
+        :return: Names, among those given, of the files which have been
+        imported.
+        :rtype: set
+        """
+        file_names = list(set(file_names))
+        imported = set()
+        for i in range(0, len(file_names), IN_CLAUSE_SIZE):
+            chunk = file_names[i:i + IN_CLAUSE_SIZE]
+            placeholders = ', '.join(['?'] * len(chunk))
+            rows = self._conn.execute(
+                'SELECT file_name FROM imported_instances '
+                'WHERE file_name IN ({0})'.format(placeholders),
+                chunk
+            )
+            imported.update(r[0] for r in rows)
+
+        return imported
+
+    def add_instances(self, file_names, imported_on=None):
+        """
+        Records the given instance files as imported, in one transaction.
+        :param file_names: Names or paths of the instance files.
+        :type file_names: list
+        :param imported_on: Date of the import. Defaults to now.
+        :type imported_on: str
+        """
+        if imported_on is None:
+            imported_on = self.log_date()
+
+        entries = []
+        for file_name in file_names:
+            file_name = os.path.basename(file_name)
+            entries.append((file_name, instance_uuid(file_name), imported_on))
+
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO imported_instances '
+                '(file_name, instance_uuid, imported_on) VALUES (?, ?, ?)',
+                entries
+            )
+
+    def migrate(self):
+        """
+        Copies the instances recorded in the JSON import log and in the
+        'File instance' entries of history.txt into the journal. The legacy
+        files are left in place.
+        """
+        entries = []
+
+        json_path = os.path.join(self.journal_dir, LEGACY_JSON_FILE)
+        if os.path.isfile(json_path):
+            try:
+                with open(json_path, 'r') as json_file:
+                    log_data = json.load(json_file)
+                for file_name, imported_on in log_data.items():
+                    entries.append((file_name, str(imported_on)))
+            except (IOError, ValueError, AttributeError) as ex:
+                LOGGER.debug('JSON import log could not be read: %s',
+                             str(ex))
+
+        history_path = os.path.join(self.journal_dir, LEGACY_HISTORY_FILE)
+        if os.path.isfile(history_path):
+            try:
+                with open(history_path, 'r') as history_file:
+                    lines = history_file.read().splitlines()
+                for i, line in enumerate(lines[:-1]):
+                    if line.startswith(_HISTORY_ENTRY):
+                        entries.append((lines[i + 1].strip(), ''))
+            except IOError as ex:
+                LOGGER.debug('Import history could not be read: %s', str(ex))
+
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO imported_instances '
+                '(file_name, instance_uuid, imported_on) VALUES (?, ?, ?)',
+                [
+                    (os.path.basename(f), instance_uuid(f), d)
+                    for f, d in entries if f
+                ]
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO journal_info (key, value) '
+                'VALUES (?, ?)',
+                ('migrated', self.log_date())
+            )
@@ -0,0 +1,302 @@
+"""
+/***************************************************************************
+Name                 : InstanceParser
+Description          : Reads the entity data of mobile instance files in a
+                       single streaming pass, across a pool of processes
+                       for large numbers of files.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+import logging
+import multiprocessing
+import os
+import sys
+from collections import (
+    namedtuple,
+    OrderedDict
+)
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from xml.etree.ElementTree import (
+    iterparse,
+    ParseError
+)
+
+LOGGER = logging.getLogger('stdm')
+
+# Name of the social tenure relationship in the instance files
+SOCIAL_TENURE = 'social_tenure'
+
+# Minimum number of files for which parsing is spread across processes
+PARALLEL_MIN_FILES = 200
+
+# Maximum number of processes parsing files
+MAX_PROCESSES = 4
+
+"""
+Attribute data read from an instance file. 'entities' and
+'repeated_entities' contain the single and repeated entities, and
+'str_entities' and 'repeated_str_entities' the social tenure relationships,
+as returned by InstanceUUIDExtractor.instance_data_from_nodelist.
+"""
+ParsedInstance = namedtuple(
+    'ParsedInstance',
+    ['filename', 'full_filename', 'entities', 'repeated_entities',
+     'str_entities', 'repeated_str_entities']
+)
+
+
+def _node_name(tag, namespaces):
+    # Name of the element as reported by QDomNode.nodeName i.e. with the
+    # namespace prefix rather than the namespace URI
+    if not tag.startswith('{'):
+        return tag
+
+    uri, local_name = tag[1:].split('}', 1)
+    prefix = namespaces.get(uri, '')
+    if not prefix:
+        return local_name
+
+    return '{0}:{1}'.format(prefix, local_name)
+
+
+def _instance_data(entity_names, entity_fields):
+    # Same structures as InstanceUUIDExtractor.instance_data_from_nodelist
+    instances = OrderedDict()
+    repeated_instances = OrderedDict()
+
+    for entity_name in entity_names:
+        fields_list = entity_fields.get(entity_name, [])
+        if len(fields_list) > 1:
+            for i, fields in enumerate(fields_list):
+                repeated_instances['{}'.format(i) + entity_name] = fields
+        elif len(fields_list) == 1:
+            instances[entity_name] = fields_list[0]
+
+    return instances, repeated_instances
+
+
+def parse_instance(full_filename, profile_name, entities):
+    """
+    Reads the attribute data of the given entities, and of the social
+    tenure relationships, from an instance file in a single pass using
+    ElementTree.iterparse. Elements are discarded as soon as they have been
+    read. The result is the same as reading the file with
+    InstanceUUIDExtractor.
+    :param full_filename: Path of the instance file.
+    :type full_filename: str
+    :param profile_name: Name of the profile element in the file.
+    :type profile_name: str
+    :param entities: Names of the entities to be read.
+    :type entities: list
+    :return: Attribute data of the instance.
+    :rtype: ParsedInstance
+    """
+    entities = list(entities)
+    wanted = set(entities)
+    wanted.add(SOCIAL_TENURE)
+
+    namespaces = {}
+    # Names of the open elements
+    path = []
+    # Depth of the first profile element and whether it has been read
+    profile_depth = None
+    profile_read = False
+    # Names of the child elements of the profile element, in order
+    profile_children = []
+    # Number of open elements whose data is being read
+    open_wanted = 0
+    # Entity name -> list of fields of each occurrence of the entity
+    entity_fields = {}
+
+    try:
+        events = iterparse(full_filename,
+                           events=('start-ns', 'start', 'end'))
+        for event, item in events:
+            if event == 'start-ns':
+                prefix, uri = item
+                namespaces.setdefault(uri, prefix)
+                continue
+
+            if event == 'start':
+                name = _node_name(item.tag, namespaces)
+                path.append(name)
+
+                if profile_depth is None and name == profile_name:
+                    profile_depth = len(path)
+                elif not profile_read and profile_depth is not None and \
+                        len(path) == profile_depth + 1:
+                    profile_children.append(name)
+
+                if name in wanted:
+                    open_wanted += 1
+
+                continue
+
+            if len(path) == profile_depth:
+                profile_read = True
+
+            name = path.pop()
+            open_wanted = _read_element(name, item, wanted, open_wanted,
+                                        namespaces, entity_fields)
+    except ParseError as pe:
+        # Same as an empty document
+        LOGGER.debug('%s could not be read: %s', full_filename, str(pe))
+        profile_children = []
+
+    # Only entities defined in the profile element are read
+    field_names = [n for n in profile_children if n in entities]
+    str_names = [n for n in profile_children if n == SOCIAL_TENURE]
+
+    entity_data, repeated_data = _instance_data(field_names, entity_fields)
+    str_data, repeated_str_data = _instance_data(str_names, entity_fields)
+
+    return ParsedInstance(
+        os.path.basename(full_filename),
+        full_filename,
+        entity_data,
+        repeated_data,
+        str_data,
+        repeated_str_data
+    )
+
+
+def _read_element(name, element, wanted, open_wanted, namespaces,
+                  entity_fields):
+    # Reads the fields of a complete entity element then discards the
+    # element unless it belongs to another entity which is being read.
+    # Returns the number of entity elements which are still open.
+    if name in wanted:
+        open_wanted -= 1
+        fields = OrderedDict()
+        for child in element:
+            fields[_node_name(child.tag, namespaces)] = \
+                ''.join(child.itertext())
+        entity_fields.setdefault(name, []).append(fields)
+
+    if open_wanted == 0:
+        element.clear()
+
+    return open_wanted
+
+
+def _python_executable():
+    # Interpreter used to start the worker processes. Within QGIS,
+    # sys.executable may be the QGIS application instead of Python.
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    for name in ('pythonw.exe', 'python.exe', 'bin/python3'):
+        python = os.path.join(sys.exec_prefix, name)
+        if os.path.isfile(python):
+            return python
+
+    return None
+
+
+class InstanceParser:
+    """
+    Reads the attribute data of instance files using parse_instance. The
+    files are spread across a pool of processes when there are at least
+    PARALLEL_MIN_FILES of them, else they are read in the current thread.
+    Reading falls back to the current thread if the processes cannot be
+    started.
+
+        with InstanceParser(profile_name, entities) as parser:
+            instances = parser.parse(files)
+    """
+
+    def __init__(self, profile_name, entities, processes=0):
+        """
+        :param profile_name: Name of the profile element in the files.
+        :type profile_name: str
+        :param entities: Names of the entities to be read.
+        :type entities: list
+        :param processes: Number of processes reading the files. One per
+        CPU, up to MAX_PROCESSES, if zero. Files are always read in the
+        current thread if one.
+        :type processes: int
+        """
+        self.profile_name = profile_name
+        self.entities = list(entities)
+        if processes <= 0:
+            processes = min(MAX_PROCESSES, os.cpu_count() or 1)
+        self.processes = processes
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _parse_file(self, full_filename):
+        return parse_instance(full_filename, self.profile_name, self.entities)
+
+    def _executor(self):
+        if self._pool is None:
+            python = _python_executable()
+            if python is None:
+                self.processes = 1
+                return None
+
+            context = multiprocessing.get_context('spawn')
+            context.set_executable(python)
+            self._pool = ProcessPoolExecutor(self.processes,
+                                             mp_context=context)
+
+        return self._pool
+
+    def parse(self, full_filenames):
+        """
+        Reads the given instance files.
+        :param full_filenames: Paths of the instance files.
+        :type full_filenames: list
+        :return: Attribute data of the instances, in the order of the
+        files.
+        :rtype: list
+        """
+        full_filenames = list(full_filenames)
+        if self.processes > 1 and len(full_filenames) >= PARALLEL_MIN_FILES:
+            pool = self._executor()
+            if pool is not None:
+                chunk_size = max(
+                    1,
+                    len(full_filenames) // (self.processes * 4)
+                )
+                try:
+                    return list(pool.map(
+                        partial(parse_instance,
+                                profile_name=self.profile_name,
+                                entities=self.entities),
+                        full_filenames,
+                        chunksize=chunk_size
+                    ))
+                except (BrokenProcessPool, OSError) as err:
+                    LOGGER.debug('Instance files will be read serially: %s',
+                                 str(err))
+                    self.close()
+                    self.processes = 1
+
+        return [self._parse_file(f) for f in full_filenames]
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -20,7 +20,10 @@ email                : stdm@unhabitat.org
  *                                                                         *
  ***************************************************************************/
 """
-from collections import OrderedDict
+from collections import (
+    defaultdict,
+    OrderedDict
+)
 
 from qgis.PyQt.QtWidgets import (
     QApplication
@@ -31,6 +34,7 @@ from sqlalchemy import (
 )
 
 from stdm.data.configuration import entity_model
+from stdm.data.lookup_resolver import LookupResolver
 from stdm.navigation.socialtenure.nodes import (
     BaseSTRNode,
     EntityNode,
@@ -44,10 +48,12 @@ from stdm.ui.stdmdialog import DeclareMapping
 from stdm.utils.util import (
     getIndex,
     entity_display_columns,
-    profile_spatial_tables,
-    lookup_id_to_value
+    profile_spatial_tables
 )
 
+# Maximum number of values in a single IN (...) clause
+IN_CLAUSE_SIZE = 500
+
 
 class STRNodeFormatter:
     """
@@ -121,6 +127,16 @@ class EntityNodeFormatter(STRNodeFormatter):
         # [table_name]:[list of supporting document tables]
         self._entity_supporting_doc_tables = {}
 
+        # Lookup values are read once for all the nodes
+        self._lookup_resolver = LookupResolver()
+
+        # Models referenced by the foreign keys of the records being
+        # formatted, loaded by load_str_tree().
+        # (model, column) -> {column value: [models]}
+        self._fk_models = {}
+        # STR id -> supporting document models grouped by document type
+        self._str_doc_models = {}
+
         self._str_model_disp_mapping = {}
         if self._str_model is not None:
             self._str_model_disp_mapping = entity_display_columns(
@@ -165,7 +181,7 @@ class EntityNodeFormatter(STRNodeFormatter):
                     else:
                         k = c, header
 
-                    disp_mapping[k] = lookup_id_to_value(
+                    disp_mapping[k] = self._lookup_resolver.lookup_id_to_value(
                         self.curr_profile, c, getattr(model, c)
                     )
 
@@ -228,6 +244,149 @@ class EntityNodeFormatter(STRNodeFormatter):
             entity_model, ent_col, self._str_model, str_col
         )
 
+    @staticmethod
+    def _fk_value_key(value, is_string):
+        # String foreign keys are matched regardless of case
+        if is_string and value is not None:
+            return str(value).lower()
+
+        return value
+
+    def _load_fk_models(self, source_models, source_column,
+                        referenced_model, referenced_column):
+        """
+        Loads the models referenced by the foreign key values of all the
+        source models in a few IN queries, so that
+        _models_from_fk_reference reads them from memory.
+        :param source_models: Models containing the foreign key values.
+        :type source_models: list
+        :param source_column: Name of the foreign key column in the source
+        models.
+        :type source_column: str
+        :param referenced_model: Referenced model or its table name.
+        :type referenced_model: object
+        :param referenced_column: Name of the referenced column.
+        :type referenced_column: str
+        :return: Models which have been loaded.
+        :rtype: list
+        """
+        ref_model = referenced_model
+        if isinstance(ref_model, str):
+            ref_model = DeclareMapping.instance().tableMapping(ref_model)
+
+        if ref_model is None or not hasattr(ref_model, referenced_column):
+            return []
+
+        col_prop = getattr(ref_model, referenced_column)
+        is_string = isinstance(col_prop.property.columns[0].type, String)
+
+        ref_models = self._fk_models.setdefault(
+            (ref_model, referenced_column),
+            {}
+        )
+
+        pending = []
+        for m in source_models:
+            if not hasattr(m, source_column):
+                continue
+            value = getattr(m, source_column)
+            key = self._fk_value_key(value, is_string)
+            if value is None or key in ref_models:
+                continue
+            ref_models[key] = []
+            pending.append(key)
+
+        loaded = []
+        query_obj = ref_model().queryObject()
+        for i in range(0, len(pending), IN_CLAUSE_SIZE):
+            chunk = pending[i:i + IN_CLAUSE_SIZE]
+            if is_string:
+                criterion = func.lower(col_prop).in_(chunk)
+            else:
+                criterion = col_prop.in_(chunk)
+
+            for r in query_obj.filter(criterion).all():
+                key = self._fk_value_key(
+                    getattr(r, referenced_column),
+                    is_string
+                )
+                ref_models.setdefault(key, []).append(r)
+                loaded.append(r)
+
+        return loaded
+
+    def _load_supporting_docs(self, str_models):
+        """
+        Loads the supporting documents of the given STR models in a few IN
+        queries, so that _supporting_doc_models reads them from memory.
+        :param str_models: STR models.
+        :type str_models: list
+        """
+        from stdm.data.supporting_documents import supporting_doc_tables
+
+        if self._str_doc_model is None:
+            return
+
+        if self._str_ref not in self._entity_supporting_doc_tables:
+            doc_tables = supporting_doc_tables(self._str_ref)
+            if len(doc_tables) == 0:
+                return
+            self._entity_supporting_doc_tables[self._str_ref] = doc_tables[0]
+
+        doc_link_col = self._entity_supporting_doc_tables[self._str_ref][0]
+        if not hasattr(self._str_doc_model, doc_link_col):
+            return
+
+        link_col_prop = getattr(self._str_doc_model, doc_link_col)
+
+        str_ids = []
+        for s in str_models:
+            str_id = getattr(s, 'id', None)
+            if str_id is None or str_id in self._str_doc_models:
+                continue
+            self._str_doc_models[str_id] = defaultdict(list)
+            str_ids.append(str_id)
+
+        query_obj = self._str_doc_model().queryObject()
+        for i in range(0, len(str_ids), IN_CLAUSE_SIZE):
+            chunk = str_ids[i:i + IN_CLAUSE_SIZE]
+            for doc_obj in query_obj.filter(link_col_prop.in_(chunk)).all():
+                self._str_doc_models[getattr(doc_obj, doc_link_col)][
+                    doc_obj.document_type
+                ].append(doc_obj)
+
+        for str_id in str_ids:
+            self._str_doc_models[str_id] = OrderedDict(
+                self._str_doc_models[str_id]
+            )
+
+    def load_str_tree(self):
+        """
+        Loads the STRs of the data being formatted, together with the
+        related entities and the supporting documents of the STRs, with a
+        few IN queries per table rather than several queries per record.
+        The nodes created by root() are then built from memory. Models
+        loaded previously are discarded as they may be out of date.
+        """
+        self._fk_models = {}
+        self._str_doc_models = {}
+
+        if self._config.data_source_name != self._str_ref:
+            if self._current_data_source_fk_ref is None:
+                return
+
+            ent_col, str_col = self._current_data_source_fk_ref
+            str_models = self._load_fk_models(self._data, ent_col,
+                                              self._str_model, str_col)
+        else:
+            str_models = list(self._data)
+
+        for str_col, mod_table, mod_col in self._fk_references:
+            if mod_table != self._config.data_source_name:
+                self._load_fk_models(str_models, str_col, mod_table, mod_col)
+
+        self._load_supporting_docs(str_models)
+
     def is_str_defined(self, entity_model):
         """
         :param entity_model: Related STR entity
@@ -281,6 +440,10 @@ class EntityNodeFormatter(STRNodeFormatter):
         if not hasattr(model_obj, 'id'):
             return []
 
+        if entity_table == self._str_ref and \
+                model_obj.id in self._str_doc_models:
+            return self._str_doc_models[model_obj.id]
+
         return document_models(
             self.curr_profile.social_tenure,
             doc_link_col,
@@ -361,6 +524,18 @@ class EntityNodeFormatter(STRNodeFormatter):
                 # Get property type so that the filter can be applied according to the appropriate type
                 col_prop_type = col_prop.property.columns[0].type
 
+                # Use the models loaded by load_str_tree, if any
+                ref_models = self._fk_models.get(
+                    (ref_model, referenced_column),
+                    {}
+                )
+                key = self._fk_value_key(
+                    source_col_value,
+                    isinstance(col_prop_type, String)
+                )
+                if key in ref_models:
+                    return list(ref_models[key])
+
                 ref_model_instance = ref_model()
                 ref_query_obj = ref_model_instance.queryObject()
 
@@ -416,6 +591,8 @@ class EntityNodeFormatter(STRNodeFormatter):
         :return:
         :rtype:
         """
+        self.load_str_tree()
+
         for ed in self._data:
             disp_mapping = self._format_display_mapping(ed,
                                                         self._config.displayColumns,
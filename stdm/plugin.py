@@ -61,7 +61,9 @@ from stdm.composer.composer_wrapper import ComposerWrapper
 from stdm.composer.custom_layout_items import StdmCustomLayoutItems
 from stdm.composer.document_template import DocumentTemplate
 from stdm.data import globals
+from stdm.data.catalog import invalidate_catalog_snapshot
 from stdm.data.configfile_paths import FilePaths
+from stdm.data.configuration import clear_entity_model_cache
 from stdm.data.configuration.column_updaters import varchar_updater
 from stdm.data.configuration.config_updater import ConfigurationSchemaUpdater
 from stdm.data.configuration.exception import ConfigurationException
@@ -77,6 +79,7 @@ from stdm.data.pg_utils import (
     create_postgis,
     table_column_names
 )
+from stdm.data.table_model_cache import entity_table_models
 from stdm.exceptions import DummyException
 from stdm.mapping.utils import pg_layerNamesIDMapping
 from stdm.navigation.components import STDMAction
@@ -97,7 +100,8 @@ from stdm.settings.registryconfig import (
     CONFIG_UPDATED,
     HOST,
     composer_template_path,
-    run_template_converter_on_startup
+    run_template_converter_on_startup,
+    table_change_notifications
 )
 from stdm.settings.startup_handler import copy_startup
 from stdm.settings.template_updater import TemplateFileUpdater
@@ -402,6 +406,10 @@ class STDMQGISLoader:
 
                     return
 
+            # Refresh entity browsers when other sessions change the data
+            if table_change_notifications():
+                entity_table_models.start_listening(db.engine)
+
             # Checks if the license is accepted and stops loading
             # modules if the terms and conditions are never accepted.
             license_status = self.load_license_agreement()
@@ -2137,6 +2145,12 @@ class STDMQGISLoader:
             # Remove Spatial Unit Manager
             self.remove_spatial_unit_mgr()
 
+            # Discard cached mapped classes, database catalog and records
+            clear_entity_model_cache()
+            invalidate_catalog_snapshot()
+            entity_table_models.stop_listening()
+            entity_table_models.clear()
+
             if not reload_plugin:
                 if self.profile_status_label is not None:
                     self.profile_status_label.deleteLater()
@@ -2148,6 +2162,7 @@ class STDMQGISLoader:
 
                 # Clear singleton ref for SQLAlchemy connections
                 if globals.APP_DBCONN is not None:
+                    STDMDb.instance().dispose()
                     STDMDb.cleanUp()
                     DeclareMapping.cleanUp()
                 # Remove database reference
@@ -37,9 +37,14 @@ def save_current_profile(name: str):
     :param name: Name of the current profile.
     :type name: unicode
     """
+    from stdm.data.configuration import clear_entity_model_cache
+
     if not name:
         return
 
+    # Mapped classes of the previous profile are no longer required
+    clear_entity_model_cache()
+
     # Save profile in the registry/settings
     reg_config = RegistryConfig()
     reg_config.write({CURRENT_PROFILE: name})
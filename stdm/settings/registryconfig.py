@@ -43,6 +43,17 @@ STDM_VERSION = 'STDMVersion'
 ENTITY_BROWSER_RECORD_LIMIT = 'EntityBrowserRecordLimit'
 ENTITY_SORT_ORDER = 'EntitySortOrder'
 RUN_TEMPLATE_CONVERTER = 'RunTemplateConverter'
+DB_POOL_SIZE = 'DbPoolSize'
+DB_POOL_MAX_OVERFLOW = 'DbPoolMaxOverflow'
+DB_POOL_PRE_PING = 'DbPoolPrePing'
+DB_POOL_RECYCLE = 'DbPoolRecycle'
+TABLE_CHANGE_NOTIFICATIONS = 'TableChangeNotifications'
+DOC_GENERATOR_WORKERS = 'DocumentGeneratorWorkers'
+DOC_GENERATOR_PROFILING = 'DocumentGeneratorProfiling'
+GEOODK_PARSER_PROCESSES = 'GeoODKParserProcesses'
+
+# Default number of background workers fetching records for documents
+DEFAULT_DOC_GENERATOR_WORKERS = 2
 
 
 def registry_value(key_name):
@@ -133,6 +144,60 @@ def set_debug_logging(state):
 
     set_registry_value(DEBUG_LOG, lvl)
 
+def table_change_notifications():
+    """
+    :return: Returns whether changes to tables should be exchanged with
+    other STDM sessions so that entity browsers can be refreshed.
+    :rtype: bool
+    """
+    value = registry_value(TABLE_CHANGE_NOTIFICATIONS)
+
+    return str(value).lower() in ('true', '1')
+
+
+def document_generator_workers():
+    """
+    :return: Returns the maximum number of background workers fetching the
+    records whose documents are being generated.
+    :rtype: int
+    """
+    value = registry_value(DOC_GENERATOR_WORKERS)
+
+    try:
+        workers = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_DOC_GENERATOR_WORKERS
+
+    return max(1, workers)
+
+
+def document_generator_profiling():
+    """
+    :return: Returns whether the time spent in each stage of document
+    generation should be recorded and reported in the logs.
+    :rtype: bool
+    """
+    value = registry_value(DOC_GENERATOR_PROFILING)
+
+    return str(value).lower() in ('true', '1')
+
+
+def geoodk_parser_processes():
+    """
+    :return: Returns the number of processes reading mobile instance files
+    during import. Zero, the default, for one process per CPU.
+    :rtype: int
+    """
+    value = registry_value(GEOODK_PARSER_PROCESSES)
+
+    try:
+        processes = int(value)
+    except (TypeError, ValueError):
+        return 0
+
+    return max(0, processes)
+
+
 def set_run_template_converter_on_startup(state: bool):
     value = 'True' if state else 'False'
     set_registry_value(RUN_TEMPLATE_CONVERTER, value) 
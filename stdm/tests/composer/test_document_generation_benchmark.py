@@ -0,0 +1,122 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.composer.composer_data_source import ComposerDataSource
+from stdm.composer.document_generator import DocumentGenerator
+from stdm.composer.generation_profiler import GenerationProfiler
+from stdm.data import globals
+from stdm.data.configuration.stdm_configuration import StdmConfiguration
+from stdm.data.database import STDMDb
+from stdm.settings import save_current_profile
+from stdm.settings.config_serializer import ConfigurationFileSerializer
+from stdm.tests.data.utils import (
+    BASIC_PROFILE,
+    create_db_connection
+)
+from stdm.tests.utilities import get_qgis_app
+
+# Sample templates and the configuration of their entities
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(__file__),
+    os.pardir,
+    os.pardir,
+    'templates'
+)
+config_path = os.path.join(TEMPLATES_DIR, 'configuration.stc')
+
+# Number of entity records whose documents are generated per template
+NUM_RECORDS = 500
+
+
+@unittest.skip('written for local use only')
+class TestDocumentGenerationBenchmark(TestCase):
+    """
+    Generates the documents of the sample templates against a local
+    PostGIS database, created from the sample configuration and populated
+    with at least NUM_RECORDS records per entity, and prints the time spent
+    and queries executed in each stage.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        _, _, cls.iface, _ = get_qgis_app()
+
+        globals.APP_DBCONN = create_db_connection()
+        ConfigurationFileSerializer(config_path).load()
+        save_current_profile(BASIC_PROFILE)
+
+    @classmethod
+    def tearDownClass(cls):
+        StdmConfiguration.cleanUp()
+        STDMDb.cleanUp()
+        globals.APP_DBCONN = None
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.generator = DocumentGenerator(self.iface)
+
+    def tearDown(self):
+        self.generator.clear_temporary_layers()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def _record_ids(self, table_name):
+        result = STDMDb.instance().engine.execute(
+            'SELECT id FROM {0} ORDER BY id LIMIT {1}'.format(
+                table_name,
+                NUM_RECORDS
+            )
+        )
+
+        return [r[0] for r in result]
+
+    def _benchmark(self, template_path):
+        data_source = ComposerDataSource.from_template_file(template_path)
+        self.assertIsNotNone(data_source)
+
+        entity_table = data_source.referenced_table_name
+        record_ids = self._record_ids(entity_table)
+        self.assertGreater(len(record_ids), 0)
+
+        profiler = GenerationProfiler()
+        profiler.attach(STDMDb.instance().engine)
+        self.generator.set_profiler(profiler)
+        try:
+            status, msg = self.generator.run_batch(
+                template_path,
+                record_ids,
+                DocumentGenerator.PDFAtlas,
+                file_path=os.path.join(self.output_dir, 'documents.pdf'),
+                data_source=entity_table
+            )
+        finally:
+            self.generator.set_profiler(None)
+            profiler.detach()
+
+        print('\n{0}\n{1}'.format(
+            os.path.basename(template_path),
+            profiler.report()
+        ))
+
+        self.assertTrue(status, msg)
+        self.assertEqual(len(profiler.documents), len(record_ids))
+
+    def test_sample_templates(self):
+        templates = sorted(glob.glob(os.path.join(TEMPLATES_DIR, '*.sdt')))
+        self.assertGreater(len(templates), 0)
+
+        for template_path in templates:
+            with self.subTest(template=os.path.basename(template_path)):
+                self._benchmark(template_path)
+
+
+def suite():
+    suite = makeSuite(TestDocumentGenerationBenchmark, 'test')
+
+    return suite
@@ -0,0 +1,77 @@
+import threading
+from unittest import (
+    TestCase
+)
+
+from sqlalchemy import create_engine
+
+from stdm.composer.generation_profiler import (
+    EXPORT,
+    FETCH,
+    FIELDS,
+    GenerationProfiler
+)
+
+
+class TestGenerationProfiler(TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.profiler = GenerationProfiler()
+        self.profiler.attach(self.engine)
+
+    def tearDown(self):
+        self.profiler.detach()
+
+    def test_stage_queries(self):
+        self.profiler.begin_document(1)
+        with self.profiler.stage(FIELDS):
+            self.engine.execute('SELECT 1')
+            self.engine.execute('SELECT 2')
+        with self.profiler.stage(EXPORT):
+            pass
+        self.profiler.end_document()
+
+        self.assertEqual(self.profiler.stages[FIELDS].calls, 1)
+        self.assertEqual(self.profiler.stages[FIELDS].queries, 2)
+        self.assertEqual(self.profiler.stages[EXPORT].queries, 0)
+
+        self.assertEqual(len(self.profiler.documents), 1)
+        document = self.profiler.documents[0]
+        self.assertEqual(document.record_id, 1)
+        self.assertEqual(document.queries, 2)
+        self.assertEqual(list(document.stages), [FIELDS, EXPORT])
+
+    def test_background_stage(self):
+        def fetch():
+            with self.profiler.stage(FETCH):
+                self.engine.execute('SELECT 1')
+
+        self.profiler.begin_document(1)
+        worker = threading.Thread(target=fetch)
+        worker.start()
+        worker.join()
+        self.profiler.end_document()
+
+        # Counted in total but not in the document being generated
+        self.assertEqual(self.profiler.stages[FETCH].queries, 1)
+        self.assertEqual(len(self.profiler.documents[0].stages), 0)
+
+    def test_detach(self):
+        self.profiler.detach()
+        with self.profiler.stage(FIELDS):
+            self.engine.execute('SELECT 1')
+
+        self.assertEqual(self.profiler.stages[FIELDS].queries, 0)
+
+    def test_report(self):
+        for record_id in range(3):
+            self.profiler.begin_document(record_id)
+            with self.profiler.stage(FIELDS):
+                self.engine.execute('SELECT 1')
+            self.profiler.end_document()
+
+        report = self.profiler.report()
+
+        self.assertIn('3 record(s)', report)
+        self.assertIn(FIELDS, report)
+        self.assertNotIn(EXPORT, report)
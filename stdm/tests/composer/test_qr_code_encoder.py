@@ -0,0 +1,60 @@
+import timeit
+import unittest
+from unittest import (
+    TestCase
+)
+
+import pyqrcode
+
+from stdm.composer import qr_code_encoder
+from stdm.composer.qr_code_encoder import (
+    create,
+    qr_code_svg
+)
+
+# Numeric, alphanumeric and binary content which fits in a version 1 code
+CONTENTS = ['1234567', 'STDM 42', 'lot/7']
+
+
+class TestQRCodeEncoder(TestCase):
+    def test_same_code_as_pyqrcode(self):
+        for version in range(1, 11):
+            for error in ('L', 'H'):
+                for content in CONTENTS:
+                    expected = pyqrcode.create(content, error, version)
+                    code = create(content, error, version)
+
+                    self.assertEqual(code.builder.best_mask,
+                                     expected.builder.best_mask)
+                    self.assertEqual(code.builder.scores,
+                                     expected.builder.scores)
+                    self.assertEqual(code.code, expected.code)
+
+    def test_svg_cache(self):
+        qr_code_encoder.clear_cache()
+        svg = qr_code_svg('STDM 42')
+
+        self.assertTrue(svg.startswith(b'<?xml'))
+        self.assertIs(qr_code_svg('STDM 42'), svg)
+        self.assertIsNot(qr_code_svg('STDM 43'), svg)
+
+
+@unittest.skip('written for local use only')
+class TestQRCodeEncoderBenchmark(TestCase):
+    def test_benchmark(self):
+        # Time taken to build a code of each version, in milliseconds
+        number = 20
+        for version in range(1, 11):
+            pyqrcode_time = timeit.timeit(
+                lambda: pyqrcode.create('STDM 42', version=version),
+                number=number
+            )
+            array_time = timeit.timeit(
+                lambda: create('STDM 42', version=version),
+                number=number
+            )
+            print('Version {0}: pyqrcode {1:.2f} ms, arrays {2:.2f} ms'.format(
+                version,
+                pyqrcode_time * 1000 / number,
+                array_time * 1000 / number
+            ))
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from qgis.core import (
+    QgsGeometry,
+    QgsLayoutItemMap,
+    QgsLayoutSize,
+    QgsPrintLayout,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer
+)
+
+from stdm.composer.document_generator import DocumentGenerator
+from stdm.tests.utilities import get_qgis_app
+
+QGIS_APP = get_qgis_app()
+
+PARCEL = 'POLYGON((36.80 -1.30, 36.81 -1.30, 36.81 -1.29, 36.80 -1.29, ' \
+         '36.80 -1.30))'
+
+
+class _SpatialFieldMapping:
+    zoom_type = 'RELATIVE'
+
+    def spatialField(self):
+        return 'geom_polygon'
+
+    def labelField(self):
+        return ''
+
+    def zoomLevel(self):
+        return 1.0
+
+
+class TestSpatialFeatures(TestCase):
+    def setUp(self):
+        # Only the methods which do not depend on the profile are used
+        self.generator = DocumentGenerator.__new__(DocumentGenerator)
+
+        self.layout = QgsPrintLayout(QgsProject.instance())
+        self.map_item = QgsLayoutItemMap(self.layout)
+        self.map_item.setId('spatial_map')
+        self.map_item.attemptResize(QgsLayoutSize(100, 100))
+        self.layout.addLayoutItem(self.map_item)
+
+        self.template_extent = QgsRectangle(30.0, -5.0, 40.0, 5.0)
+        self.map_item.zoomToExtent(self.template_extent)
+
+        self.layer = QgsVectorLayer('Polygon?crs=epsg:4326', 'parcel',
+                                    'memory')
+        self.context = SimpleNamespace(
+            print_layout=self.layout,
+            spatial_layers={
+                'spatial_map': (
+                    QgsRectangle(self.template_extent),
+                    [(_SpatialFieldMapping(), self.layer)]
+                )
+            }
+        )
+
+    def _record(self, wkt):
+        wkb = None
+        if wkt is not None:
+            wkb = QgsGeometry.fromWkt(wkt).asWkb()
+
+        return SimpleNamespace(stdm_wkb_geom_polygon=wkb)
+
+    def test_record_without_geometry(self):
+        self.generator._set_spatial_features(self.context,
+                                             self._record(PARCEL))
+        parcel_center = self.map_item.extent().center()
+        self.assertAlmostEqual(parcel_center.x(), 36.805)
+
+        # The next record is not zoomed on the previous parcel
+        self.generator._set_spatial_features(self.context,
+                                             self._record(None))
+        center = self.map_item.extent().center()
+        self.assertAlmostEqual(center.x(), self.template_extent.center().x())
+        self.assertAlmostEqual(center.y(), self.template_extent.center().y())
+        self.assertEqual(self.layer.featureCount(), 0)
+
+
+def suite():
+    suite = makeSuite(TestSpatialFeatures, 'test')
+
+    return suite
@@ -0,0 +1,57 @@
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from qgis.core import (
+    QgsLayoutItemMap,
+    QgsPrintLayout,
+    QgsProject,
+    QgsVectorLayer
+)
+
+from stdm.composer.document_generator import spatial_map_layers
+from stdm.tests.utilities import get_qgis_app
+
+QGIS_APP = get_qgis_app()
+
+
+class TestSpatialMapLayers(TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.base_layer = QgsVectorLayer('Polygon?crs=epsg:4326', 'parcels',
+                                         'memory')
+        self.hidden_layer = QgsVectorLayer('Point?crs=epsg:4326', 'hidden',
+                                           'memory')
+        self.project.addMapLayers([self.base_layer, self.hidden_layer])
+        self.project.layerTreeRoot().findLayer(
+            self.hidden_layer.id()
+        ).setItemVisibilityChecked(False)
+
+        self.spatial_layer = QgsVectorLayer('Polygon?crs=epsg:4326',
+                                            'spatial_unit', 'memory')
+
+        layout = QgsPrintLayout(self.project)
+        self.map_item = QgsLayoutItemMap(layout)
+
+    def tearDown(self):
+        self.project.removeAllMapLayers()
+
+    def test_unlocked_map_shows_project_layers(self):
+        layers = spatial_map_layers(self.map_item, [self.spatial_layer])
+
+        self.assertEqual(layers, [self.spatial_layer, self.base_layer])
+
+    def test_locked_map_keeps_layer_set(self):
+        self.map_item.setLayers([self.hidden_layer])
+        self.map_item.setKeepLayerSet(True)
+
+        layers = spatial_map_layers(self.map_item, [self.spatial_layer])
+
+        self.assertEqual(layers, [self.spatial_layer, self.hidden_layer])
+
+
+def suite():
+    suite = makeSuite(TestSpatialMapLayers, 'test')
+
+    return suite
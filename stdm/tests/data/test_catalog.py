@@ -0,0 +1,105 @@
+from unittest import (
+    TestCase
+)
+
+from stdm.data.catalog import (
+    CatalogSnapshot,
+    is_ddl
+)
+
+TABLES = [
+    {'table_name': 'ho_household', 'table_type': 'BASE TABLE'},
+    {'table_name': 'ho_parcel', 'table_type': 'BASE TABLE'},
+    {'table_name': 'vw_parcel', 'table_type': 'VIEW'}
+]
+
+COLUMNS = [
+    {'table_name': 'ho_household', 'column_name': 'id',
+     'data_type': 'integer', 'udt_name': 'int4'},
+    {'table_name': 'ho_household', 'column_name': 'parcel_id',
+     'data_type': 'integer', 'udt_name': 'int4'},
+    {'table_name': 'ho_household', 'column_name': 'head',
+     'data_type': 'character varying', 'udt_name': 'varchar'},
+    {'table_name': 'vw_parcel', 'column_name': 'geom',
+     'data_type': 'USER-DEFINED', 'udt_name': 'geometry'},
+    {'table_name': 'ho_parcel', 'column_name': 'geom',
+     'data_type': 'USER-DEFINED', 'udt_name': 'geometry'}
+]
+
+FOREIGN_KEYS = [
+    {'constraint_name': 'fk_ho_household_parcel_id',
+     'table_name': 'ho_household', 'column_name': 'parcel_id',
+     'foreign_table_name': 'ho_parcel', 'foreign_column_name': 'id'}
+]
+
+GEOMETRY_COLUMNS = [
+    {'f_table_name': 'ho_parcel', 'f_geometry_column': 'geom',
+     'type': 'POLYGON', 'srid': 4326}
+]
+
+
+class _Connection:
+    def execute(self, sql, **kwargs):
+        sql = str(sql)
+        if 'information_schema.tables' in sql:
+            return TABLES
+        if 'information_schema.columns' in sql:
+            return COLUMNS
+        if 'table_constraints' in sql:
+            return FOREIGN_KEYS
+
+        return GEOMETRY_COLUMNS
+
+
+class TestCatalogSnapshot(TestCase):
+    def setUp(self):
+        self.snapshot = CatalogSnapshot()
+        self.snapshot.load(_Connection())
+
+    def test_tables(self):
+        self.assertEqual(self.snapshot.tables, ['ho_household', 'ho_parcel'])
+        self.assertEqual(self.snapshot.views, ['vw_parcel'])
+        self.assertTrue(self.snapshot.table_exists('vw_parcel'))
+        self.assertFalse(self.snapshot.table_exists('vw_parcel', False))
+        self.assertFalse(self.snapshot.table_exists('ho_spouse'))
+
+    def test_columns(self):
+        self.assertEqual(
+            self.snapshot.column_names('ho_household', True),
+            ['id', 'parcel_id', 'head']
+        )
+        self.assertEqual(
+            self.snapshot.column_names('ho_household'),
+            ['head', 'id', 'parcel_id']
+        )
+        self.assertEqual(
+            self.snapshot.column_type('ho_household', '"head"'),
+            'character varying'
+        )
+        self.assertEqual(self.snapshot.column_type('vw_parcel', 'geom'),
+                         'geometry')
+        self.assertEqual(self.snapshot.column_type('ho_parcel', 'geom'),
+                         'USER-DEFINED')
+
+    def test_geometry_columns(self):
+        self.assertEqual(self.snapshot.geometry_columns('ho_parcel'),
+                         ['geom'])
+        self.assertEqual(self.snapshot.geometry_type('ho_parcel', 'geom'),
+                         ('POLYGON', 4326))
+        self.assertEqual(self.snapshot.geometry_type('ho_parcel', 'point'),
+                         ('', -1))
+
+    def test_foreign_keys(self):
+        self.assertEqual(
+            self.snapshot.foreign_keys('ho_household'),
+            [('parcel_id', 'ho_parcel', 'id', 'fk_ho_household_parcel_id')]
+        )
+        self.assertEqual(
+            self.snapshot.foreign_keys('ho_parcel', False),
+            [('parcel_id', 'ho_household', 'id', 'fk_ho_household_parcel_id')]
+        )
+
+    def test_is_ddl(self):
+        self.assertTrue(is_ddl('  ALTER TABLE ho_parcel ADD COLUMN x int'))
+        self.assertTrue(is_ddl('drop view if exists vw_parcel'))
+        self.assertFalse(is_ddl('SELECT * FROM ho_parcel'))
@@ -0,0 +1,149 @@
+import csv
+import os
+import tempfile
+import time
+import unittest
+from collections import OrderedDict
+from unittest import (
+    TestCase
+)
+
+from stdm.data.importexport.coercion import CoercionPlan
+
+
+class _Column:
+    def __init__(self, type_info):
+        self.TYPE_INFO = type_info
+
+
+class _Entity:
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = OrderedDict(
+            [(c, _Column(t)) for c, t in columns.items()]
+        )
+
+
+PARCEL_COLUMNS = {
+    'id': 'SERIAL',
+    'code': 'VARCHAR',
+    'rooms': 'INT',
+    'area': 'DOUBLE',
+    'share': 'PERCENT',
+    'land_use': 'LOOKUP',
+    'registered': 'BOOL',
+    'survey_date': 'DATE'
+}
+
+
+class TestCoercionPlan(TestCase):
+    def setUp(self):
+        self.plan = CoercionPlan(_Entity('parcel', PARCEL_COLUMNS))
+
+    def test_coerce_row(self):
+        row = self.plan.coerce_row({
+            'code': 'P001',
+            'rooms': '3',
+            'area': '12.5',
+            'share': '45%',
+            'land_use': '0',
+            'registered': 'Yes',
+            'survey_date': 'NULL'
+        })
+
+        self.assertEqual(row['code'], 'P001')
+        self.assertEqual(row['rooms'], 3)
+        self.assertEqual(row['area'], 12.5)
+        self.assertEqual(row['share'], 45.0)
+        self.assertIsNone(row['land_use'])
+        self.assertTrue(row['registered'])
+        self.assertIsNone(row['survey_date'])
+
+    def test_whole_float_to_int(self):
+        self.assertEqual(self.plan.coerce('rooms', '3.0'), 3)
+
+    def test_invalid_numbers(self):
+        with self.assertLogs('stdm', 'WARNING'):
+            self.assertIsNone(self.plan.coerce('rooms', '3.5'))
+        self.assertIsNone(self.plan.coerce('rooms', 'three'))
+        self.assertIsNone(self.plan.coerce('area', ' '))
+        self.assertIsNone(self.plan.coerce('share', None))
+
+    def test_unknown_column(self):
+        self.assertEqual(self.plan.coerce('remarks', ' 1 '), ' 1 ')
+
+    def test_custom_converter(self):
+        plan = CoercionPlan(
+            _Entity('parcel', PARCEL_COLUMNS),
+            {'VARCHAR': str.upper}
+        )
+
+        self.assertEqual(plan.coerce('code', 'p001'), 'P001')
+
+
+@unittest.skip('written for local use only')
+class TestCoercionPlanBenchmark(TestCase):
+    """
+    Compares the compiled plan with the per-value column lookups of
+    OGRReader.auto_fix_* on a 100k-row CSV file.
+    """
+    num_rows = 100000
+
+    def setUp(self):
+        fd, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(PARCEL_COLUMNS.keys())[1:])
+            for i in range(self.num_rows):
+                writer.writerow([
+                    'P{0}'.format(i), i % 7, i * 0.5, '{0}%'.format(i % 100),
+                    i % 4, 'Yes' if i % 2 else 'No', ''
+                ])
+
+        # Profile with 60 entities scanned linearly as in entity_by_name
+        self.entities = [_Entity('e{0}'.format(i), PARCEL_COLUMNS)
+                         for i in range(59)]
+        self.entity = _Entity('parcel', PARCEL_COLUMNS)
+        self.entities.append(self.entity)
+
+    def tearDown(self):
+        os.remove(self.csv_path)
+
+    def _rows(self):
+        with open(self.csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield row
+
+    def test_benchmark(self):
+        from stdm.data.importexport.reader import OGRReader
+
+        entities = self.entities
+
+        class _Reader:
+            def _data_source_entity(self, table_name):
+                for e in entities:
+                    if e.name == table_name:
+                        return e
+
+        reader = _Reader()
+        start = time.perf_counter()
+        for row in self._rows():
+            for col, value in row.items():
+                value = OGRReader.auto_fix_float_integer(
+                    reader, 'parcel', col, value)
+                value = OGRReader.auto_fix_percent(
+                    reader, 'parcel', col, value)
+                value = OGRReader.auto_fix_date(reader, 'parcel', col, value)
+                OGRReader.auto_fix_yes_no(reader, 'parcel', col, value)
+        legacy_time = time.perf_counter() - start
+
+        plan = CoercionPlan(self.entity)
+        start = time.perf_counter()
+        for row in self._rows():
+            plan.coerce_row(row)
+        plan_time = time.perf_counter() - start
+
+        print('auto_fix_*: {0:.2f}s, coercion plan: {1:.2f}s'.format(
+            legacy_time, plan_time
+        ))
+        self.assertLess(plan_time, legacy_time)
@@ -0,0 +1,68 @@
+from unittest import (
+    TestCase
+)
+
+from stdm.data.table_model_cache import (
+    model_size,
+    TableModelCache
+)
+
+
+class _Model:
+    def __init__(self, num_rows):
+        self._initData = [['Name {0}'.format(i), i] for i in range(num_rows)]
+        self._raw_values = [['Name {0}'.format(i), i]
+                            for i in range(num_rows)]
+
+    def rowCount(self):
+        return len(self._initData)
+
+
+class TestTableModelCache(TestCase):
+    def setUp(self):
+        self.model_bytes = model_size(_Model(100))
+        # Budget for two models
+        self.cache = TableModelCache(int(self.model_bytes * 2.5))
+
+    def test_put_take(self):
+        model = _Model(100)
+        self.cache.put('ho_household', model)
+
+        self.assertIn('ho_household', self.cache)
+        self.assertEqual(self.cache.size, self.model_bytes)
+        self.assertIs(self.cache.take('ho_household'), model)
+        self.assertNotIn('ho_household', self.cache)
+        self.assertEqual(self.cache.size, 0)
+        self.assertIsNone(self.cache.take('ho_household'))
+
+    def test_evicts_least_recently_added(self):
+        self.cache.put('ho_household', _Model(100))
+        self.cache.put('ho_parcel', _Model(100))
+        self.cache.put('ho_spouse', _Model(100))
+
+        self.assertNotIn('ho_household', self.cache)
+        self.assertEqual(len(self.cache), 2)
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+
+    def test_model_exceeding_budget(self):
+        self.cache.put('ho_household', _Model(1000))
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate(self):
+        version = self.cache.version('ho_household')
+        self.cache.put('ho_household', _Model(100), version)
+        self.cache.invalidate('ho_household')
+
+        self.assertNotIn('ho_household', self.cache)
+
+        # Records fetched before the change are not cached
+        self.cache.put('ho_household', _Model(100), version)
+        self.assertNotIn('ho_household', self.cache)
+
+        self.cache.put(
+            'ho_household',
+            _Model(100),
+            self.cache.version('ho_household')
+        )
+        self.assertIn('ho_household', self.cache)
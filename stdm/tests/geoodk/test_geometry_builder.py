@@ -0,0 +1,65 @@
+import binascii
+import struct
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.geoodk.importer.geometry_builder import (
+    GeometryBuilder,
+    parse_vertices,
+    PendingGeometry,
+    repair_vertices
+)
+
+GEOSHAPE = '-1.28 36.81 1650.0 5.0;-1.28 36.82 1650.0 5.0;' \
+           '-1.29 36.82 1650.0 5.0;-1.29 36.82 1650.0 5.0;'
+
+
+class TestGeometryBuilder(TestCase):
+    def test_parse_vertices(self):
+        self.assertEqual(
+            parse_vertices('-1.2834567 36.8167890 1650.0 5.0;'),
+            [(36.816789, -1.283457)]
+        )
+
+    def test_repair_ring(self):
+        ring = repair_vertices(parse_vertices(GEOSHAPE), 'POLYGON')
+
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(ring[0], ring[-1])
+
+    def test_too_few_vertices(self):
+        two_vertices = '-1.28 36.81 0.0 0.0;-1.28 36.82 0.0 0.0;'
+        self.assertIsNone(
+            repair_vertices(parse_vertices(two_vertices), 'POLYGON')
+        )
+        self.assertIsNone(
+            repair_vertices(parse_vertices(two_vertices[:20]), 'LINESTRING')
+        )
+
+    def test_build_all(self):
+        builder = GeometryBuilder()
+        values = builder.build_all([
+            PendingGeometry(GEOSHAPE, 'POLYGON', 4326),
+            PendingGeometry('-1.28 36.81 0.0 0.0', 'POINT', 0),
+            PendingGeometry('-1.28 36.81 0.0 0.0', 'LINESTRING', 4326)
+        ])
+
+        ewkb = binascii.unhexlify(values[0])
+        self.assertEqual(
+            struct.unpack('<BIIII', ewkb[:17]),
+            (1, 0x20000003, 4326, 1, 4)
+        )
+        self.assertEqual(
+            struct.unpack('<2d', ewkb[17:33]),
+            (36.81, -1.28)
+        )
+        self.assertEqual(len(binascii.unhexlify(values[1])), 25)
+        self.assertIsNone(values[2])
+
+
+def suite():
+    suite = makeSuite(TestGeometryBuilder, 'test')
+
+    return suite
@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.geoodk.importer.import_journal import ImportJournal
+
+
+class TestImportJournal(TestCase):
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.journal_dir, ignore_errors=True)
+
+    def test_add_instances(self):
+        with ImportJournal(self.journal_dir) as journal:
+            self.assertFalse(journal.is_imported('uuid0a1b.xml'))
+
+            journal.add_instances(['/instances/ha_1/uuid0a1b.xml'])
+
+            self.assertTrue(journal.is_imported('uuid0a1b.xml'))
+            self.assertEqual(
+                journal.imported_files(['uuid0a1b.xml', 'uuid2c3d.xml']),
+                {'uuid0a1b.xml'}
+            )
+
+        # Entries persist across sessions
+        with ImportJournal(self.journal_dir) as journal:
+            self.assertTrue(journal.is_imported('uuid0a1b.xml'))
+
+    def test_migrate(self):
+        with open(os.path.join(self.journal_dir, 'import_log.json'), 'w') \
+                as json_file:
+            json.dump({'uuid0a1b.xml': '01/02/2021 10:00:00'}, json_file)
+        with open(os.path.join(self.journal_dir, 'history.txt'), 'w') \
+                as history_file:
+            history_file.write(
+                '\nFile instance 1 : \n/instances/ha_2/uuid2c3d.xml'
+            )
+
+        with ImportJournal(self.journal_dir) as journal:
+            self.assertTrue(journal.is_imported('uuid0a1b.xml'))
+            self.assertTrue(journal.is_imported('uuid2c3d.xml'))
+            self.assertFalse(journal.is_imported('uuid4e5f.xml'))
+
+
+def suite():
+    suite = makeSuite(TestImportJournal, 'test')
+
+    return suite
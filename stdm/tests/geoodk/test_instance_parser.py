@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from unittest import (
+    makeSuite,
+    TestCase
+)
+
+from stdm.geoodk.importer.instance_parser import (
+    InstanceParser,
+    parse_instance
+)
+
+PROFILE = 'ha_Profile'
+ENTITIES = ['ha_person', 'ha_household', 'ha_spatial_unit']
+
+INSTANCE = '''<?xml version="1.0"?>
+<ha_Profile id="ha_Profile" xmlns:orx="http://openrosa.org/xforms">
+  <ha_person>
+    <first_name>Jane</first_name>
+    <age>34</age>
+  </ha_person>
+  <ha_household><size>2</size></ha_household>
+  <ha_household><size>5</size></ha_household>
+  <ha_spatial_unit><geom>-1.28 36.81 0 0</geom></ha_spatial_unit>
+  <ha_other><name>Skipped</name></ha_other>
+  <social_tenure>
+    <party>ha_person</party>
+    <tenure_type>Owner</tenure_type>
+  </social_tenure>
+  <orx:meta><orx:instanceID>uuid:7f0c</orx:instanceID></orx:meta>
+</ha_Profile>
+'''
+
+
+class TestInstanceParser(TestCase):
+    def setUp(self):
+        self.instance_dir = tempfile.mkdtemp()
+        self.instance_file = os.path.join(self.instance_dir, 'uuid7f0c.xml')
+        with open(self.instance_file, 'w') as f:
+            f.write(INSTANCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.instance_dir, ignore_errors=True)
+
+    def test_parse_instance(self):
+        instance = parse_instance(self.instance_file, PROFILE, ENTITIES)
+
+        self.assertEqual(instance.filename, 'uuid7f0c.xml')
+        self.assertEqual(list(instance.entities.keys()),
+                         ['ha_person', 'ha_spatial_unit'])
+        self.assertEqual(instance.entities['ha_person']['first_name'], 'Jane')
+        self.assertEqual(instance.entities['ha_person']['age'], '34')
+        self.assertEqual(list(instance.repeated_entities.keys()),
+                         ['0ha_household', '1ha_household'])
+        self.assertEqual(instance.repeated_entities['1ha_household']['size'],
+                         '5')
+        self.assertEqual(
+            instance.str_entities['social_tenure']['tenure_type'],
+            'Owner'
+        )
+        self.assertEqual(len(instance.repeated_str_entities), 0)
+
+    def test_parse_invalid_instance(self):
+        with open(self.instance_file, 'w') as f:
+            f.write('<ha_Profile><ha_person>')
+
+        instance = parse_instance(self.instance_file, PROFILE, ENTITIES)
+
+        self.assertEqual(len(instance.entities), 0)
+        self.assertEqual(len(instance.str_entities), 0)
+
+    def test_parse_serially(self):
+        files = [self.instance_file] * 3
+        with InstanceParser(PROFILE, ENTITIES, processes=1) as parser:
+            instances = parser.parse(files)
+
+        self.assertEqual(len(instances), 3)
+        self.assertEqual(
+            instances[2],
+            parse_instance(self.instance_file, PROFILE, ENTITIES)
+        )
+
+
+def suite():
+    suite = makeSuite(TestInstanceParser, 'test')
+
+    return suite
@@ -0,0 +1,43 @@
+from unittest import (
+    TestCase
+)
+
+from stdm.utils.lru_cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+
+        # Reading 'a' makes 'b' the least recently used item
+        self.assertEqual(cache['a'], 1)
+        cache['c'] = 3
+
+        self.assertEqual(list(cache), ['a', 'c'])
+        self.assertNotIn('b', cache)
+
+    def test_hit_statistics(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+
+        cache.get('a')
+        cache.get('b')
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_peek_does_not_change_order(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+
+        self.assertEqual(cache.peek('a'), 1)
+        cache['c'] = 3
+
+        self.assertEqual(list(cache), ['b', 'c'])
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
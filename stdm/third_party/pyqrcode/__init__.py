@@ -130,6 +130,9 @@ class QRCode:
         For what all of the parameters do, see the :func:`pyqrcode.create`
         function.
     """
+    #Class used to build the code, which subclasses can replace
+    builder_class = builder.QRCodeBuilder
+
     def __init__(self, content, error='H', version=None, mode=None,
                  encoding='iso-8859-1'):
         #Guess the mode of the code, this will also be used for
@@ -219,10 +222,10 @@ class QRCode:
                                  'version {}).'.format(version, self.version))
 
         #Build the QR code
-        self.builder = builder.QRCodeBuilder(data=self.data,
-                                             version=self.version,
-                                             mode=self.mode,
-                                             error=self.error)
+        self.builder = self.builder_class(data=self.data,
+                                          version=self.version,
+                                          mode=self.mode,
+                                          error=self.error)
 
         #Save the code for easier reference
         self.code = self.builder.code
@@ -30,7 +30,6 @@ from qgis.PyQt.QtCore import (
     QTimer
 )
 from qgis.PyQt.QtGui import (
-    QCursor,
     QImageWriter
 )
 from qgis.PyQt.QtWidgets import (
@@ -43,16 +42,24 @@ from qgis.PyQt.QtWidgets import (
     QFileDialog,
     QTableView
 )
+from qgis.core import (
+    Qgis,
+    QgsMessageLog
+)
 
 from sqlalchemy.exc import SQLAlchemyError
 
 from stdm.exceptions import DummyException
+from stdm.composer.document_generation_task import DocumentGenerationJob
 from stdm.composer.document_generator import DocumentGenerator
+from stdm.composer.generation_profiler import GenerationProfiler
 from stdm.data.configuration import entity_model
+from stdm.data.database import STDMDb
 from stdm.settings import current_profile
 from stdm.settings.registryconfig import (
     RegistryConfig,
-    COMPOSER_OUTPUT
+    COMPOSER_OUTPUT,
+    document_generator_profiling
 )
 from stdm.ui.composer.composer_doc_selector import TemplateDocumentSelector
 from stdm.ui.foreign_key_mapper import ForeignKeyMapper
@@ -265,6 +272,14 @@ class DocumentGeneratorDialog(WIDGET, BASE):
 
         self._doc_generator = DocumentGenerator(self._iface, self)
 
+        # Background document generation
+        self._job = None
+        self._job_key = None
+        self._interrupted_job_key = None
+        self._job_errors = 0
+        self._job_stopped = False
+        self._progress_dlg = None
+
         self._data_source = ""
 
         self.access_templates = access_templates
@@ -289,6 +304,7 @@ class DocumentGeneratorDialog(WIDGET, BASE):
         self.buttonBox.accepted.connect(self.onGenerate)
         self.chkUseOutputFolder.stateChanged.connect(self.onToggledOutputFolder)
         self.rbExpImage.toggled.connect(self.onToggleExportImage)
+        self.rbExpAtlas.toggled.connect(self.onToggleExportAtlas)
         self.tabWidget.currentChanged.connect(self.on_tab_index_changed)
         self.chk_template_datasource.stateChanged.connect(self.on_use_template_datasource)
 
@@ -301,6 +317,7 @@ class DocumentGeneratorDialog(WIDGET, BASE):
         self.datasource_fields_loaded = False
 
         self.onToggleExportImage(False)
+        self.onToggleExportAtlas(False)
 
     def _init_progress_dialog(self):
         """
@@ -550,12 +567,20 @@ class DocumentGeneratorDialog(WIDGET, BASE):
         """
         self.cboImageType.setEnabled(state)
 
+    def onToggleExportAtlas(self, state: bool):
+        """
+        Slot raised to enable/disable the number of records per PDF file.
+        """
+        self.sbAtlasRecords.setEnabled(state)
+
     def onGenerate(self):
         """
         Slot raised to initiate the certificate generation process.
         """
         self._notif_bar.clear()
-        success_status = True
+
+        if self._job is not None and self._job.is_running():
+            return
 
         config = self.current_config()
         self._docTemplatePath = self.plugin.action_cache.get('prev_document_template_path', "")
@@ -584,7 +609,8 @@ class DocumentGeneratorDialog(WIDGET, BASE):
 
         documentNamingAttrs = self.lstDocNaming.selectedMappings()
 
-        if self.chkUseOutputFolder.checkState() == Qt.Checked and len(documentNamingAttrs) == 0:
+        if self.chkUseOutputFolder.checkState() == Qt.Checked and len(documentNamingAttrs) == 0 \
+                and not self.rbExpAtlas.isChecked():
             self._notif_bar.insertErrorNotification(QApplication.translate("DocumentGeneratorDialog", \
                                                                            "Please select at least one field for naming the output document"))
             return
@@ -594,13 +620,21 @@ class DocumentGeneratorDialog(WIDGET, BASE):
             outputMode = DocumentGenerator.Image
             fileExtension = self.cboImageType.currentText()
             saveAsText = "Image File"
+        elif self.rbExpAtlas.isChecked():
+            # All the records are written to one file
+            outputMode = DocumentGenerator.PDFAtlas
+            fileExtension = "pdf"
+            saveAsText = "PDF File"
         else:
             outputMode = DocumentGenerator.PDF
             fileExtension = "pdf"
             saveAsText = "PDF File"
 
+        use_output_folder = self.chkUseOutputFolder.checkState() == Qt.Checked and \
+                            outputMode != DocumentGenerator.PDFAtlas
+
         # Show save file dialog if not using output folder
-        if self.chkUseOutputFolder.checkState() == Qt.Unchecked:
+        if not use_output_folder:
             docDir = output_document_location()
 
             if self._outputFilePath:
@@ -641,74 +675,181 @@ class DocumentGeneratorDialog(WIDGET, BASE):
             # Apply cell formatters for naming output files
             self._doc_generator.set_attr_value_formatters(config.formatters())
 
-        entity_field_name = "id"
+        record_ids = [record.id for record in records]
 
-        # Iterate through the selected records
-        progressDlg = QProgressDialog(self)
-        progressDlg.setMaximum(len(records))
+        # Documents written by an interrupted run can be skipped
+        job_key = (self._docTemplatePath, tuple(record_ids), outputMode,
+                   tuple(documentNamingAttrs), fileExtension)
+        skip_existing = False
+        if use_output_folder and job_key == self._interrupted_job_key:
+            result = QMessageBox.question(
+                self,
+                QApplication.translate("DocumentGeneratorDialog",
+                                       "Resume Document Generation"),
+                QApplication.translate("DocumentGeneratorDialog",
+                                       "Document generation for the selected "
+                                       "records was interrupted. Do you want "
+                                       "to skip the documents that have "
+                                       "already been generated?"),
+                QMessageBox.Yes | QMessageBox.No
+            )
+            skip_existing = result == QMessageBox.Yes
+
+        # User-defined location
+        if not use_output_folder:
+            job = DocumentGenerationJob(
+                self._doc_generator,
+                self._docTemplatePath,
+                record_ids,
+                outputMode,
+                file_path=self._outputFilePath,
+                data_source=self.ds_entity.name,
+                records_per_file=self.sbAtlasRecords.value(),
+                parent=self
+            )
+
+        # Output folder location using custom naming
+        else:
+            job = DocumentGenerationJob(
+                self._doc_generator,
+                self._docTemplatePath,
+                record_ids,
+                outputMode,
+                data_fields=documentNamingAttrs,
+                file_extension=fileExtension,
+                data_source=self.ds_entity.name,
+                skip_existing=skip_existing,
+                parent=self
+            )
+
+        self._job = job
+        self._job_key = job_key
+        self._job_errors = 0
+        self._job_stopped = False
+
+        self._progress_dlg = QProgressDialog(self)
+        self._progress_dlg.setWindowModality(Qt.WindowModal)
+        self._progress_dlg.setMaximum(len(record_ids))
+        self._progress_dlg.canceled.connect(self._on_generation_canceled)
 
+        job.record_generated.connect(self._on_record_generated)
+        job.finished.connect(self._on_generation_finished)
+
+        if document_generator_profiling():
+            self._start_profiling()
 
         try:
-            QApplication.setOverrideCursor(QCursor(Qt.WaitCursor))
+            job.start()
 
-            for i, record in enumerate(records):
-                progressDlg.setValue(i)
+        except SQLAlchemyError as sqlerr:
+            LOGGER.debug(str(sqlerr))
+            err_msg = QApplication.translate("DocumentGeneratorDialog",
+                                             "Database error occured, check QGIS logs.")
+            self._show_generation_error(err_msg)
 
-                if progressDlg.wasCanceled():
-                    success_status = False
-                    break
-                # User-defined location
-                if self.chkUseOutputFolder.checkState() == Qt.Unchecked:
+        except DummyException as ex:
+            LOGGER.debug(str(ex))
+            err_msg = sys.exc_info()[1]
+            self._show_generation_error(err_msg)
 
-                    status, msg = self._doc_generator.run(self._docTemplatePath, entity_field_name,
-                                                        record.id, outputMode,
-                                                        data_source=self.ds_entity.name,
-                                                        filePath=self._outputFilePath)
-                    self._doc_generator.clear_temporary_layers()
+    def _start_profiling(self):
+        """
+        Records the time spent, and queries executed, in each stage of
+        document generation.
+        """
+        profiler = GenerationProfiler()
+        profiler.attach(STDMDb.instance().engine)
+        self._doc_generator.set_profiler(profiler)
 
+    def _stop_profiling(self):
+        """
+        Writes the report of the profiler, if any, to the logs.
+        """
+        profiler = self._doc_generator.profiler()
+        if profiler is None:
+            return
 
-                # Output folder location using custom naming
-                else:
+        profiler.detach()
+        self._doc_generator.set_profiler(None)
 
-                    status, msg = self._doc_generator.run(self._docTemplatePath, entity_field_name,
-                                                          record.id, outputMode,
-                                                          dataFields=documentNamingAttrs,
-                                                          fileExtension=fileExtension,
-                                                          data_source=self.ds_entity.name)
-                    self._doc_generator.clear_temporary_layers()
+        report = profiler.report()
+        LOGGER.debug(report)
+        QgsMessageLog.logMessage(report, 'STDM', Qgis.Info)
 
-                if not status:
-                    result = QMessageBox.warning(self,
-                                                 QApplication.translate("DocumentGeneratorDialog",
-                                                                        "Document Generate Error"),
-                                                 msg, QMessageBox.Ignore | QMessageBox.Abort)
+    def _show_generation_error(self, err_msg):
+        """
+        Notifies the user that document generation could not be started.
+        """
+        self._job = None
+        self._stop_profiling()
+        self._progress_dlg.close()
+        self._progress_dlg.deleteLater()
+        self._progress_dlg = None
 
-                    if result == QMessageBox.Abort:
-                        progressDlg.close()
-                        progressDlg.deleteLater()
-                        del progressDlg
-                        success_status = False
+        QMessageBox.critical(
+            self,
+            "STDM",
+            QApplication.translate(
+                "DocumentGeneratorDialog",
+                "Error Generating documents - %s" % (err_msg)
+            )
+        )
 
-                        # Restore cursor
-                        QApplication.restoreOverrideCursor()
+        # Reset UI
+        self.reset(False)
 
-                    # If its the last record and user has selected to ignore
-                    if i + 1 == len(records):
-                        progressDlg.close()
-                        progressDlg.deleteLater()
-                        del progressDlg
-                        success_status = False
+    def _on_record_generated(self, num_processed, record_id, status, msg):
+        """
+        Slot raised when the documents of a record have been generated.
+        """
+        self._progress_dlg.setValue(num_processed)
 
-                        # Restore cursor
-                        QApplication.restoreOverrideCursor()
+        if status:
+            return
+
+        self._job_errors += 1
+        result = QMessageBox.warning(self,
+                                     QApplication.translate("DocumentGeneratorDialog",
+                                                            "Document Generate Error"),
+                                     msg, QMessageBox.Ignore | QMessageBox.Abort)
+
+        if result == QMessageBox.Abort and self._job is not None:
+            self._job_stopped = True
+            self._job.cancel()
+
+    def _on_generation_canceled(self):
+        """
+        Slot raised when the user cancels document generation.
+        """
+        if self._job is not None and self._job.is_running():
+            self._job_stopped = True
+            self._job.cancel()
+
+    def _on_generation_finished(self, status, msg):
+        """
+        Slot raised when document generation has completed or stopped.
+        """
+        if self._job is None:
+            return
 
-                        return
+        self._job = None
+        self._stop_profiling()
+        self._progress_dlg.canceled.disconnect(self._on_generation_canceled)
+        self._progress_dlg.close()
+        self._progress_dlg.deleteLater()
+        self._progress_dlg = None
 
-                else:
-                    progressDlg.setValue(len(records))
+        # Allow the documents of an interrupted run to be skipped
+        self._interrupted_job_key = None if status else self._job_key
 
-            QApplication.restoreOverrideCursor()
+        if not status and not self._job_stopped:
+            QMessageBox.warning(self,
+                                QApplication.translate("DocumentGeneratorDialog",
+                                                       "Document Generate Error"),
+                                msg)
 
+        success_status = status and self._job_errors == 0
+        if success_status:
             QMessageBox.information(self,
                                     QApplication.translate("DocumentGeneratorDialog",
                                                            "Document Generation Complete"),
@@ -716,45 +857,19 @@ class DocumentGeneratorDialog(WIDGET, BASE):
                                                            "Document generation has successfully completed.")
                                     )
 
-
-        except SQLAlchemyError as sqlerr:
-            LOGGER.debug(str(sqlerr))
-            err_msg = QApplication.translate("DocumentGeneratorDialog",
-                                             "Database error occured, check QGIS logs.")
-            QApplication.restoreOverrideCursor()
-
-            QMessageBox.critical(
-                self,
-                "STDM",
-                QApplication.translate(
-                    "DocumentGeneratorDialog",
-                    "Error Generating documents - %s" % (err_msg)
-                )
-            )
-            success_status = False
-
-        except DummyException as ex:
-            LOGGER.debug(str(ex))
-            err_msg = sys.exc_info()[1]
-            QApplication.restoreOverrideCursor()
-
-            QMessageBox.critical(
-                self,
-                "STDM",
-                QApplication.translate(
-                    "DocumentGeneratorDialog",
-                    "Error Generating documents - %s" % (err_msg)
-                )
-            )
-            success_status = False
-
-        progressDlg.deleteLater()
-        del progressDlg
-
         # Reset UI
-        QApplication.restoreOverrideCursor()
         self.reset(success_status)
 
+    def reject(self):
+        """
+        Stops document generation before closing the dialog.
+        """
+        if self._job is not None and self._job.is_running():
+            self._job_stopped = True
+            self._job.cancel()
+
+        QDialog.reject(self)
+
     def _dummy_template_records(self):
         """
         This is applied when records from a template data source are to be
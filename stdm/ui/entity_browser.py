@@ -29,7 +29,8 @@ from qgis.PyQt.QtCore import (
     QSize,
     QModelIndex,
     QItemSelectionModel,
-    QRegExp
+    QRegExp,
+    QTimer
 )
 from qgis.PyQt.QtWidgets import (
     QApplication,
@@ -60,8 +61,8 @@ from stdm.data.configuration.columns import (
     MultipleSelectColumn,
     VirtualColumn
 )
-from stdm.data.globals import ENTITY_TABLE_MODEL
 from stdm.data.configuration.entity import Entity
+from stdm.data.entity_table_model import EntityTableModel
 from stdm.data.pg_utils import (
     table_column_names,
     pg_table_record_count
@@ -70,6 +71,7 @@ from stdm.data.qtmodels import (
     BaseSTDMTableModel,
     VerticalHeaderSortFilterProxyModel
 )
+from stdm.data.table_model_cache import entity_table_models
 from stdm.exceptions import DummyException
 from stdm.navigation.content_group import TableContentGroup
 from stdm.network.filemanager import NetworkFileManager
@@ -106,6 +108,10 @@ from stdm.utils.util import (
 
 __all__ = ["EntityBrowser", "EntityBrowserWithEditor", "ContentGroupEntityBrowser"]
 
+# Time, in milliseconds, after the last change of the filter text before
+# records are filtered in the database
+FILTER_DELAY = 300
+
 
 class _EntityDocumentViewerHandler(object):
     """
@@ -271,6 +277,9 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         self._searchable_columns = OrderedDict()
         self._show_docs_col = False
         self.child_model = OrderedDict()
+        # Whether the table model can be cached once the dialog is closed
+        self._cache_table_model = False
+        self._table_version = None
         # ID of a record to select once records have been added to the table
         self._select_item = None
         self.current_records = 0
@@ -504,6 +513,13 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         """
         Get the number of records in the specified table and updates the window title.
         """
+        if isinstance(self._tableModel, EntityTableModel):
+            # Count is cached by the model until records are added or removed
+            self._tableModel.invalidate_count()
+            self.update_visible_row_count()
+
+            return self._tableModel.total_count()
+
         entity = self._dbmodel()
 
         # Get number of records
@@ -525,15 +541,24 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
         if not self._proxyModel:
             return
 
-        total_records = self._proxyModel.sourceModel().rowCount()
+        source_model = self._proxyModel.sourceModel()
         visible_records = self._proxyModel.rowCount()
+        total_label = ''
+        if isinstance(source_model, EntityTableModel):
+            # Records are fetched as the view is scrolled
+            total_records = max(source_model.total_count(), visible_records)
+            if source_model.is_count_capped():
+                total_label = '{0}+'.format(total_records)
+        else:
+            total_records = source_model.rowCount()
 
         rowStr = QApplication.translate('EntityBrowser', 'row') \
             if total_records == 1 \
             else QApplication.translate('EntityBrowser', 'rows')
         showing = QApplication.translate('EntityBrowser', 'Showing')
         windowTitle = "{0} - {1} {2} of {3} {4}".format(
-            self.title(), showing, visible_records, total_records, rowStr
+            self.title(), showing, visible_records,
+            total_label or total_records, rowStr
         )
         self.setWindowTitle(windowTitle)
 
@@ -635,21 +660,29 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
                 QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows
             )
 
+    def _filter_model(self):
+        # Model which applies the filters, in the database for paged records
+        if isinstance(self._tableModel, EntityTableModel):
+            return self._tableModel
+
+        return self._proxyModel
+
     def on_advanced_search(self):
-        self._search_act.setChecked(bool(self._proxyModel.filter_params))
-        search = AdvancedSearch(self._entity, parent=self, initial_values=self._proxyModel.filter_params)
+        filter_params = self._filter_model().filter_params
+        self._search_act.setChecked(bool(filter_params))
+        search = AdvancedSearch(self._entity, parent=self, initial_values=filter_params)
         search.setAttribute(Qt.WA_DeleteOnClose, True)
 
         search.search_triggered.connect(self._filter_to_search_results)
         search.exec_()
 
-        self._search_act.setChecked(bool(self._proxyModel.filter_params))
+        self._search_act.setChecked(bool(self._filter_model().filter_params))
 
     def _filter_to_search_results(self, search_parameters: dict):
         """
         Filters the view using the specified search parameters
         """
-        self._proxyModel.set_filter_params(search_parameters)
+        self._filter_model().set_filter_params(search_parameters)
         self._search_act.setChecked(bool(search_parameters))
         self.update_visible_row_count()
         self._clear_search_action.setEnabled(bool(search_parameters))
@@ -711,77 +744,77 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
         self._init_entity_columns()
 
-        # Load entity data. There might be a better way in future in order
-        # to ensure that there is a balance between user data discovery
-        # experience and performance.
+        # Records of the entity are fetched from the database one page at a
+        # time as the view is scrolled. Only records which have already been
+        # retrieved, such as those of a parent record in the editor, are
+        # loaded in full.
         if filtered_records is not None:
             self.current_records = filtered_records.rowcount
 
-        numRecords = self.recomputeRecordCount(init_data=True)
-
-        # Load progress dialog
-        progressLabel = QApplication.translate(
-            "EntityBrowser", "Fetching Records..."
-        )
-        progressDialog = QProgressDialog(
-            progressLabel, None, 0, numRecords, parent=self
-        )
-
-        QApplication.processEvents()
-        progressDialog.show()
-        progressDialog.setValue(0)
-
+        progressDialog = None
+        paged = False
+        criteria = []
         entity_records = []
-        # Add records to nested list for enumeration in table model
-        load_data = True
-        if self._entity.name in ENTITY_TABLE_MODEL.keys():
-            if filtered_records is None:
-                self._tableModel = ENTITY_TABLE_MODEL[
-                    self._entity.name
-                ]
 
-        if isinstance(self._parent, EntityEditorDialog):
-            load_data = True
+        if len(self.filtered_records) > 0:
+            entity_records = self.filtered_records
+        elif type(self.parent_record_id) == int and self.parent_record_id > 0:
+            paged = True
+            col = self.filter_col(self._entity)
+            if col is not None:
+                col_name = getattr(self._dbmodel, col.name)
+                criteria.append(col_name == self.parent_record_id)
+        elif not isinstance(self._parent, EntityEditorDialog):
+            paged = True
+
+        if paged:
+            # Records of all the entity's rows can be reused by other browsers
+            self._cache_table_model = len(criteria) == 0
+            self._tableModel = None
+            if self._cache_table_model:
+                self._table_version = entity_table_models.version(
+                    self._entity.name
+                )
+                self._tableModel = self._cached_table_model()
+
+            if self._tableModel is None:
+                self._tableModel = EntityTableModel(
+                    self._entity,
+                    self._dbmodel,
+                    self._headers,
+                    self._entity_attrs,
+                    self._cell_formatters,
+                    None if self._cache_table_model else self,
+                    criteria=criteria,
+                    sort_order=self.sort_order,
+                    max_rows=self.record_limit
+                )
+                self._tableModel.fetchMore()
+            numRecords = self._tableModel.rowCount()
 
-        if load_data:
-            # Only one filter is possible.
-            if len(self.filtered_records) > 0:
-                entity_records = self.filtered_records
-            else:
-                entity_cls = self._dbmodel()
+            entity_table_models.table_changed.connect(self._on_table_changed)
 
-                #ordering = self.get_sorting_order(self._entity)
+        else:
+            numRecords = len(entity_records)
 
-                if type(self.parent_record_id) == int and self.parent_record_id > 0:
-                    col = self.filter_col(self._entity)
-                    if col is None:
-                        entity_records = entity_cls.queryObject().filter().order_by(
-                            self.sort_order).limit(
-                            self.record_limit
-                        ).all()
-                    else:
-                        child_model = entity_model(self._entity)
-                        col_name = getattr(child_model, col.name)
-                        child_model_obj = child_model()
-                        entity_records = child_model_obj.queryObject().filter(
-                            col_name == self.parent_record_id
-                        ).order_by(self.sort_order).all()
-                else:
-                    # if isinstance(self._parent, QMainWindow):
-                    if not isinstance(self._parent, EntityEditorDialog):
-                        entity_records = entity_cls.queryObject().filter().order_by(
-                            self.sort_order).limit(self.record_limit).all()
+            # Load progress dialog
+            progressLabel = QApplication.translate(
+                "EntityBrowser", "Fetching Records..."
+            )
+            progressDialog = QProgressDialog(
+                progressLabel, None, 0, numRecords, parent=self
+            )
 
-                numRecords = len(entity_records)
+            QApplication.processEvents()
+            progressDialog.show()
+            progressDialog.setValue(0)
 
-            # if self._tableModel is None:
             entity_records_collection = []
             entity_raw_records = []
             row_ids = []
             for i, er in enumerate(entity_records):
                 if i == self.record_limit:
                     break
-                QApplication.processEvents()
                 entity_row_info = []
                 entity_raw_values = []
                 progressDialog.setValue(i)
@@ -821,8 +854,6 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
                 row_ids=row_ids
             )
 
-            ENTITY_TABLE_MODEL[self._entity.name] = self._tableModel
-
         # Add filter columns
         for header, info in self._searchable_columns.items():
             column_name, index = info['name'], info['header_index']
@@ -862,13 +893,32 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
         # Connect signals
         self.cboFilterColumn.currentIndexChanged.connect(self.onFilterColumnChanged)
+        # Records are only filtered in the database once typing has paused
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(FILTER_DELAY)
+        self._filter_timer.timeout.connect(self._apply_quick_filter)
         self.txtFilterPattern.textChanged.connect(self.onFilterRegExpChanged)
         self.tbEntity.selectionModel().currentChanged.connect(self._current_row_changed)
 
+        if paged:
+            # Sort and count the records in the database
+            header = self.tbEntity.horizontalHeader()
+            header.setSectionsClickable(True)
+            header.setSortIndicatorShown(True)
+            header.setSortIndicator(-1, Qt.AscendingOrder)
+            header.sortIndicatorChanged.connect(self._tableModel.sort)
+            self._tableModel.rowsInserted.connect(self.update_visible_row_count)
+            self._tableModel.modelReset.connect(self.update_visible_row_count)
+            self.update_visible_row_count()
+
         # Select record with the given ID if specified
         if self._select_item is not None:
             self._select_record(self._select_item)
 
+        if progressDialog is None:
+            return
+
         if numRecords > 0:
             # Set maximum value of the progress dialog
             progressDialog.setValue(numRecords)
@@ -891,6 +941,45 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
                 # if parent_entity == self._entity:
                 # return col
 
+    def _cached_table_model(self):
+        # Returns the model cached by a previous browser of the entity
+        model = entity_table_models.take(self._entity.name)
+        if not isinstance(model, EntityTableModel):
+            return None
+
+        if model.attribute_names != self._entity_attrs or \
+                model.max_rows != self.record_limit or \
+                not model.is_default_view():
+            return None
+
+        return model
+
+    def _on_table_changed(self, table_name):
+        """
+        Slot raised when another session has changed the records of a
+        table.
+        """
+        if table_name == self._entity.name and \
+                isinstance(self._tableModel, EntityTableModel):
+            self._table_version = entity_table_models.version(table_name)
+            self._tableModel.reload()
+
+    def done(self, result):
+        """
+        Caches the records which have been fetched, so that they can be
+        reused when the entity is browsed again, before closing the dialog.
+        """
+        if self._cache_table_model and \
+                isinstance(self._tableModel, EntityTableModel) and \
+                self._tableModel.is_default_view():
+            entity_table_models.put(
+                self._entity.name,
+                self._tableModel,
+                self._table_version
+            )
+
+        super(EntityBrowser, self).done(result)
+
     def get_sorting_value(self):
         """
         Returns a quoted string of sort column and sort order for a given entity.
@@ -917,7 +1006,13 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
     def set_proxy_model_filter_column(self, index):
         # Set the filter column for the proxy model using the combo index
         name, header_idx = self._header_index_from_filter_combo_index(index)
-        self._proxyModel.setFilterKeyColumn(header_idx)
+        if isinstance(self._tableModel, EntityTableModel):
+            self._tableModel.set_quick_filter(
+                self._entity_attrs[header_idx],
+                self.txtFilterPattern.text()
+            )
+        else:
+            self._proxyModel.setFilterKeyColumn(header_idx)
         self.update_visible_row_count()
 
     def onFilterColumnChanged(self, index):
@@ -931,12 +1026,30 @@ class EntityBrowser(SupportsManageMixin, WIDGET, BASE):
 
     def onFilterRegExpChanged(self, text):
         """
-        Slot raised whenever the filter text changes.
+        Slot raised whenever the filter text changes. Records paged from
+        the database are filtered once the text has not changed for
+        FILTER_DELAY milliseconds.
         """
+        if isinstance(self._tableModel, EntityTableModel):
+            self._filter_timer.start()
+            return
+
         regExp = QRegExp(text, Qt.CaseInsensitive, QRegExp.FixedString)
         self._proxyModel.setFilterRegExp(regExp)
         self.update_visible_row_count()
 
+    def _apply_quick_filter(self):
+        # Filters the records paged from the database using the filter text
+        if self.cboFilterColumn.count() > 0:
+            name, header_idx = self._header_index_from_filter_combo_index(
+                self.cboFilterColumn.currentIndex()
+            )
+            self._tableModel.set_quick_filter(
+                self._entity_attrs[header_idx],
+                self.txtFilterPattern.text()
+            )
+        self.update_visible_row_count()
+
     def onDoubleClickView(self, modelindex):
         """
         Slot raised upon double clicking the table view.
@@ -275,12 +275,22 @@ class ExportData(WIDGET, BASE):
 
         targetFile = str(self.field("destFile"))
         writer = OGRWriter(targetFile)
-        resultSet = self.filter_buildQuery()
+        whereStmnt = self.txtWhereQuery.toPlainText()
 
-        if resultSet is None:
+        try:
+            countResult = process_report_filter(
+                self.srcTab, "COUNT(*)", whereStmnt
+            )
+
+        except sqlalchemy.exc.DataError:
+            msg = QApplication.translate(
+                'ExportData', "The SQL statement is invalid!")
+
+            self.ErrorInfoMessage(msg)
             return succeed
 
-        if resultSet.rowcount == 0:
+        numFeat = countResult.scalar()
+        if numFeat == 0:
             msg = QApplication.translate(
                 'ExportData', "There are no records to export.")
 
@@ -289,9 +299,10 @@ class ExportData(WIDGET, BASE):
 
         try:
 
-            writer.db2Feat(
-                self, self.srcTab, resultSet, self.selectedColumns(),
-                self.geomColumn
+            # Records are streamed to the file in batches
+            writer.db2FeatStream(
+                self, self.srcTab, self.selectedColumns(),
+                self.geomColumn, whereStmnt, numFeat
             )
             ft = QApplication.translate('ExportData', 'Features in ')
             succ = QApplication.translate(
@@ -29,11 +29,14 @@ from qgis.PyQt import uic
 from qgis.PyQt.QtCore import QCoreApplication, QDateTime, QDir, QFile, Qt
 from qgis.PyQt.QtWidgets import (QApplication, QDialog, QDialogButtonBox,
                                  QFileDialog, QListWidgetItem, QMessageBox)
+from qgis.core import QgsApplication
 from sqlalchemy.exc import SQLAlchemyError
 
 from stdm.data.configuration.stdm_configuration import StdmConfiguration
 from stdm.exceptions import DummyException
-from stdm.geoodk.importer.entity_importer import EntityImporter, Save2DB
+from stdm.geoodk.importer.bulk_importer import (BulkInstanceImporter,
+                                                InstanceImportTask)
+from stdm.geoodk.importer.import_journal import ImportJournal
 from stdm.geoodk.importer.import_log import ImportLogger
 from stdm.geoodk.importer.uuid_extractor import (EntityNodeData,
                                                  InstanceUUIDExtractor)
@@ -87,6 +90,8 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
         self.relations = OrderedDict()
         self.parent_ids = {}
         self.importlogger = ImportLogger()
+        self._importer = None
+        self._import_task = None
         self._notif_bar_str = NotificationBar(self.vlnotification)
 
         self.chk_all.setCheckState(Qt.Checked)
@@ -251,7 +256,6 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
             directories = self.xform_xpaths()
             for directory in directories:
                 self.extract_guuid_and_rename_file(directory)
-        self.importlogger.start_json_file()
         self.previous_import_instances()
         self.txt_count.setText(str(len(self.instance_list)))
 
@@ -582,22 +586,18 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
         msgbox.show()
         return msgbox
 
-    def save_instance_data_to_db(self, entities : List[str]):
+    def save_instance_data_to_db(self, entities : List[str]) -> bool:
         """
-        Get the user selected entities and insert them into database
+        Get the user selected entities and start inserting them into
+        database in a background task
         params entities: List of names for the selected entities.
+        :return: True if the import has started.
         """
-        cu_obj = ''
-        import_status = False
-
         self.txt_feedback.clear()
         self.txt_feedback.append("Import started, please wait...\n")
 
-        QCoreApplication.processEvents()
         self._notif_bar_str.clear()
 
-        mobile_field_data = self.read_instance_data()
-
         has_fk = self.has_foreign_keys_parent(entities)
 
         if len(self.parent_table_isselected()) > 0:
@@ -608,137 +608,100 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
                                                               'I.e: {} will be imported'
                                                                       .format(self.parent_table_isselected())),
                                        QMessageBox.Ok | QMessageBox.No) == QMessageBox.No:
-                return
+                return False
 
-        if not mobile_field_data:
+        if not self.instance_list:
             self.feedback_message('Not matching data in mobile files')
-            return 
+            return False
+
+        importer = BulkInstanceImporter(
+            self.active_profile().replace(' ', '_'),
+            entities
+        )
+        try:
+            # Lookup tables are read once for all the instances
+            importer.prepare()
+        except SQLAlchemyError as ae:
+            self.feedback_message(str(ae))
+            self.txt_feedback.append(str(ae))
+            self.log_table_entry(str(ae))
+            return False
+
+        self.pgbar.setRange(0, len(self.instance_list))
+        self.pgbar.setValue(0)
+
+        task = InstanceImportTask(importer, self.instance_list)
+        task.chunk_imported.connect(self._on_chunk_imported)
+        task.taskCompleted.connect(lambda: self._on_import_finished(True))
+        task.taskTerminated.connect(lambda: self._on_import_finished(False))
+
+        self._importer = importer
+        self._import_task = task
+        QgsApplication.taskManager().addTask(task)
+
+        return True
+
+    def _set_importing(self, state: bool):
+        """
+        Only allow the import to be canceled while it is running
+        """
+        self.buttonBox.setEnabled(True)
+        self.buttonBox.button(QDialogButtonBox.Save).setEnabled(not state)
+        self.buttonBox.button(QDialogButtonBox.Close).setEnabled(not state)
+
+    def _on_chunk_imported(self, count: int):
+        """
+        Slot raised when a chunk of instances has been committed
+        """
+        self.pgbar.setValue(count)
+        self.txt_feedback.append('saving record "{0}" to database'.format(count))
 
-        counter = 0
+    def _on_import_finished(self, status: bool):
+        """
+        Save the supporting documents of the imported records, which
+        requires the GUI thread, once the import task has finished
+        """
+        task, importer = self._import_task, self._importer
+        self._import_task = None
+        self._importer = None
+        if task is None:
+            return
 
+        if task.pending_documents:
+            self.txt_feedback.append('Saving supporting documents...')
         try:
-            self.pgbar.setRange(counter, len(self.instance_list))
-            self.pgbar.setValue(0)
-            ImportLogger.log_action("Import started ...\n")
-
-            for filename, instance_data in mobile_field_data.items():
-
-                instance_full_filename = instance_data[0]
-                instance_obj_data = instance_data[1]
-
-                ImportLogger.log_action("File {} ...\n".format(filename))
-                parents_info = []
-                self.parent_ids = {}
-                import_status = False
-                counter = counter + 1
-
-                single_occuring, repeated_entities = self.uuid_extractor.instance_data_from_nodelist(
-                    instance_obj_data.field_data_nodes)
-
-                single_occurring_keys = list(single_occuring.keys())
-
-                for entity_name in single_occurring_keys:
-                    entity_data = single_occuring[entity_name]
-                    import_status = False
-                    if entity_name in self.relations:
-                        #if entity_name not in self.parent_ids.keys():
-                        self.count_import_file_step(counter, entity_name)
-                        log_timestamp = '=== parent table import  === : {0}'.format(entity_name)
-                        cu_obj = entity_name
-                        self.log_table_entry(log_timestamp)
-
-                        entity_add = Save2DB(entity_name, entity_data, self.parent_ids)
-
-                        entity_add.objects_from_supporting_doc(instance_full_filename)
-
-                        ref_id = entity_add.save_parent_to_db()
-
-                        import_status = True
-                        self.parent_ids[entity_name] = [ref_id, entity_name]
-                        parents_info.append(entity_name)
-                        single_occuring.pop(entity_name)
-
-                    else: #entity_name not in self.relations:
-                        import_status = False
-                        self.count_import_file_step(counter, entity_name)
-                        log_timestamp = '=== standalone table import  === : {0}'.format(entity_name)
-                        cu_obj = entity_name
-                        self.log_table_entry(log_timestamp)
-                        entity_add = Save2DB(entity_name, entity_data, self.parent_ids)
-                        entity_add.objects_from_supporting_doc(instance_full_filename)
-                        child_id = entity_add.save_to_db()
-                        cu_obj = entity_name
-                        import_status = True
-                        parents_info.append(entity_name)
-                        if entity_name not in self.parent_ids.keys():
-                            self.parent_ids[entity_name] = [child_id, entity_name]
-                        entity_add.cleanup()
-
-                if repeated_entities:
-                    # self.log_table_entry(" ========== starting import of repeated tables ============")
-                    import_status = False
-                    for repeated_entity, entity_data in repeated_entities.items():
-                        """We are assuming that the number of repeat table cannot exceed 99"""
-                        enum_index = repeated_entity[:2]
-                        if enum_index.isdigit():
-                            repeat_table = repeated_entity[2:]
-                        else:
-                            enum_index = repeated_entity[:1]
-                            repeat_table = repeated_entity[1:]
-                        log_timestamp = '          child table {0} >> : {1}' \
-                            .format(repeat_table, enum_index)
-                        self.count_import_file_step(counter, repeat_table)
-                        ImportLogger.log_action(log_timestamp)
-                        if repeat_table in self.profile_entities_names(current_profile()):
-                            entity_add = Save2DB(repeat_table, entity_data, self.parent_ids)
-                            entity_add.objects_from_supporting_doc(instance_full_filename)
-                            child_id = entity_add.save_to_db()
-                            self.parent_ids[repeat_table] = [child_id, repeat_table]
-                            cu_obj = repeat_table
-                            import_status = True
-                            self.log_table_entry(" ------ import succeeded:   {0} ".format(import_status))
-                            entity_add.cleanup()
-                            QCoreApplication.processEvents()
-                        else:
-                            continue
-
-                if instance_obj_data.str_data_nodes:
-                    '''We treat social tenure entities separately because of foreign key references'''
-                    entity_relation = EntityImporter(filename)
-                    single_str, multiple_str = self.uuid_extractor.instance_data_from_nodelist(
-                        instance_obj_data.str_data_nodes)
-                    if len(single_str) > 0:
-                        entity_relation.process_social_tenure(single_str, self.parent_ids)
-
-                    elif len(multiple_str) > 1:
-                        for repeated_entity, entity_data in multiple_str.items():
-                            """We are assuming that the number of repeat str cannot exceed 10"""
-                            entity_relation.process_social_tenure(entity_data, self.parent_ids)
-
-                    self.log_table_entry(" ----- saving social tenure relationship")
-                    # entity_add.cleanup()
-
-                self.txt_feedback.append('saving record "{0}" to database'.format(counter))
-                self.pgbar.setValue(counter)
-                self.log_instance(filename)
-                QCoreApplication.processEvents()
-
-            self.txt_feedback.append('Number of records successfully imported:  {}'
-                                     .format(counter))
-        except DummyException as ex:
-            self.feedback_message(str(ex))
-            QCoreApplication.processEvents()
-            QApplication.restoreOverrideCursor()
-            self.buttonBox.setEnabled(True)
+            for pending in task.pending_documents:
+                importer.save_documents(pending)
         except SQLAlchemyError as ae:
-            QCoreApplication.processEvents()
-            QApplication.restoreOverrideCursor()
             self.feedback_message(str(ae))
-            self.txt_feedback.append("current table {0}import failed...\n".format(cu_obj))
             self.txt_feedback.append(str(ae))
             self.log_table_entry(str(ae))
+
+        importer.invalidate_table_models()
+
+        if not status:
+            if task.error:
+                self.feedback_message(task.error)
+                self.txt_feedback.append("Import failed...\n")
+                self.txt_feedback.append(task.error)
+            else:
+                self.txt_feedback.append("Import canceled.\n")
+
+        self.txt_feedback.append('Number of records successfully imported:  {}'
+                                 .format(task.num_imported))
+        self._set_importing(False)
+
+    def reject(self):
+        """
+        Cancel the import if it is running, else close the dialog
+        """
+        if self._import_task is not None:
+            self.txt_feedback.append('Canceling import, please wait...')
+            self._import_task.cancel()
             return
 
+        super(ProfileInstanceRecords, self).reject()
+
     def count_import_file_step(self, count:int=0, table: str=""):
         """
         Tracking method to record the current import activity
@@ -780,8 +743,10 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
             #         return
             # else:
 
-            self.save_instance_data_to_db(entities)
-            self.buttonBox.setEnabled(True)
+            if self.save_instance_data_to_db(entities):
+                self._set_importing(True)
+            else:
+                self.buttonBox.setEnabled(True)
             QApplication.restoreOverrideCursor()
         except DummyException as ex:
             QApplication.restoreOverrideCursor()
@@ -793,29 +758,22 @@ class ProfileInstanceRecords(QDialog, FORM_CLASS):
         return
 
     def log_instance(self, instance):
-        # instance_short_name = self.importlogger.log_data_name(instance)
-        log_data = self.importlogger.read_log_data()
-        log_data[instance] = self.importlogger.log_date()
-        self.importlogger.write_log_data(log_data)
+        with ImportJournal() as journal:
+            journal.add_instances([instance])
 
     def previous_import_instances(self):
-        count = 0
-        del_list = []
-        log_data = self.importlogger.read_log_data()
-        if len(log_data) > 0:
-            for instance in self.instance_list:
-                # dir_path, file_name = os.path.split(instance)
-                # if log_data.has_key(instance) or log_data.has_key(file_name):
-                try:
-                    if os.path.split(instance)[1] in log_data:
-                        # del_list. append(instance)
-                        self.instance_list.remove(instance)
-                    else:
-                        continue
-                except DummyException:
-                    continue
-            # if len(del_list)>0:
-            # [self.instance_list.remove(inst) for inst in del_list]
+        """
+        Remove the instances that have already been imported from the list
+        """
+        with ImportJournal() as journal:
+            imported = journal.imported_files(
+                [os.path.basename(instance) for instance in self.instance_list]
+            )
+        if len(imported) > 0:
+            self.instance_list = [
+                instance for instance in self.instance_list
+                if os.path.basename(instance) not in imported
+            ]
 
     def close(self):
         """
@@ -115,6 +115,9 @@ class ImportData(WIDGET, BASE):
         # Data Reader
         self.dataReader = None
 
+        # Progress of the last bulk import that failed
+        self._import_checkpoint = None
+
         # Init
         self.registerFields()
 
@@ -663,7 +666,9 @@ class ImportData(WIDGET, BASE):
                     if del_result == QMessageBox.Yes:
                         self.dataReader.featToDb(
                             self.targetTab, matchCols, False, self, geom_column,
-                            translator_manager=value_translator_manager
+                            translator_manager=value_translator_manager,
+                            bulk_insert=True,
+                            resume_from=self._import_checkpoint
                         )
                         # Update directory info in the registry
                         setVectorFileDir(self.field("srcFile"))
@@ -678,7 +683,9 @@ class ImportData(WIDGET, BASE):
             else:
                 self.dataReader.featToDb(
                     self.targetTab, matchCols, True, self, geom_column,
-                    translator_manager=value_translator_manager
+                    translator_manager=value_translator_manager,
+                    bulk_insert=True,
+                    resume_from=self._import_checkpoint
                 )
                 self.show_info_message(
                     "All features have been imported successfully!"
@@ -687,7 +694,23 @@ class ImportData(WIDGET, BASE):
                 setVectorFileDir(self.field("srcFile"))
                 success = True
         except ImportFeatureException as e:
-            self.show_error_message(str(e))
+            msg = str(e)
+            checkpoint = self.dataReader.checkpoint
+            if checkpoint is not None and checkpoint.feature_count > 0:
+                # Resume from the last committed feature in the next attempt
+                self._import_checkpoint = checkpoint
+                msg = '{0}\n\n{1}'.format(
+                    msg,
+                    QApplication.translate(
+                        'ImportData',
+                        '{0} features had already been imported, the '
+                        'import will resume from the next feature.'
+                    ).format(checkpoint.feature_count)
+                )
+            self.show_error_message(msg)
+
+        if success:
+            self._import_checkpoint = None
 
         return success
 
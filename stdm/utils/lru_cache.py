@@ -0,0 +1,111 @@
+"""
+/***************************************************************************
+Name                 : LRUCache
+Description          : A dictionary with a bounded size which discards the
+                       least recently used items when the bound is exceeded.
+Date                 : 18/October/2026
+copyright            : (C) 2026 by UN-Habitat and implementing partners.
+                       See the accompanying file CONTRIBUTORS.txt in the root
+email                : stdm@unhabitat.org
+ ***************************************************************************/
+
+/***************************************************************************
+ *                                                                         *
+ *   This program is free software; you can redistribute it and/or modify  *
+ *   it under the terms of the GNU General Public License as published by  *
+ *   the Free Software Foundation; either version 2 of the License, or     *
+ *   (at your option) any later version.                                   *
+ *                                                                         *
+ ***************************************************************************/
+"""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class LRUCache(MutableMapping):
+    """
+    A ``dict``-like object holding at most ``max_size`` items. Reading or
+    setting an item marks it as the most recently used one and, when the
+    size bound is exceeded, the least recently used items are discarded.
+
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['a']
+        cache['c'] = 3
+        list(cache) == ['a', 'c']  # True
+    """
+
+    def __init__(self, max_size=1000):
+        if max_size < 1:
+            raise ValueError('Maximum size of the cache should be at least 1.')
+
+        self._max_size = max_size
+        self._store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        """
+        :return: Maximum number of items held by the cache.
+        :rtype: int
+        """
+        return self._max_size
+
+    def __setitem__(self, key, value):
+        self._store[key] = value
+        self._store.move_to_end(key)
+
+        while len(self._store) > self._max_size:
+            self._store.popitem(last=False)
+
+    def __getitem__(self, key):
+        try:
+            value = self._store[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        self.hits += 1
+        self._store.move_to_end(key)
+
+        return value
+
+    def __delitem__(self, key):
+        del self._store[key]
+
+    def __contains__(self, key):
+        # Membership test does not affect the usage order
+        return key in self._store
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+    def peek(self, key, default=None):
+        """
+        Returns the value of the given key without marking it as recently
+        used.
+        :param key: Item key.
+        :param default: Value to return if the key does not exist.
+        :return: Value corresponding to the key or the default value.
+        """
+        return self._store.get(key, default)
+
+    def clear(self):
+        """
+        Removes all items from the cache and resets the hit statistics.
+        """
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '{0}({1}, {2!r})'.format(
+            self.__class__.__name__,
+            self._max_size,
+            dict(self._store.items())
+        )